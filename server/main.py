@@ -17,8 +17,11 @@ from dotenv import load_dotenv
 _SRC = Path(__file__).parent.parent / "src"
 sys.path.insert(0, str(_SRC))
 
+from techlingo_workflow.checkpoint import load_checkpoint
+from techlingo_workflow.clients import aclose_clients
 from techlingo_workflow.io import new_run_dir, write_json, write_text
 from techlingo_workflow.models import PipelineState, TextAnalysisResult
+from techlingo_workflow.scheduler import scheduler_stats
 from techlingo_workflow.workflow import build_techlingo_workflow, build_analysis_workflow
 from techlingo_workflow.config import WorkflowConfig, DifficultyLevel
 
@@ -41,11 +44,25 @@ class RunRequest(BaseModel):
     config: Optional[WorkflowConfig] = None
     difficulty: Optional[DifficultyLevel] = None
     model_id: Optional[str] = None
+    # Overrides config.include_reasoning; false skips the thought_process trace for faster runs.
+    include_reasoning: Optional[bool] = None
+    # Continue an interrupted run (a run_id under outputs/) from its last verified artifact.
+    resume_run_id: Optional[str] = None
+
+@app.on_event("shutdown")
+async def close_llm_clients():
+    # Release pooled keep-alive connections shared by all runs (see techlingo_workflow.clients).
+    await aclose_clients()
 
 @app.get("/")
 def read_root():
     return {"status": "ok", "message": "TechLingo API is running"}
 
+@app.get("/scheduler")
+def read_scheduler():
+    # Rate-limit queue depth and wait times shared by all runs (TECHLINGO_RPM / TECHLINGO_TPM).
+    return scheduler_stats()
+
 @app.websocket("/ws/run")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
@@ -60,6 +77,9 @@ async def websocket_endpoint(websocket: WebSocket):
         # Handle config if provided
         config_dict = request_data.get("config")
         config = WorkflowConfig(**config_dict) if config_dict else WorkflowConfig()
+        include_reasoning = request_data.get("include_reasoning")
+        if include_reasoning is not None:
+            config.include_reasoning = bool(include_reasoning)
         
         difficulty_str = request_data.get("difficulty")
         difficulty = DifficultyLevel(difficulty_str) if difficulty_str else config.difficulty
@@ -79,19 +99,40 @@ async def websocket_endpoint(websocket: WebSocket):
 
         # 2. Setup Workflow
         out_dir = Path("outputs")
-        run_id, run_dir = new_run_dir(out_dir)
-        
-        state = PipelineState(
-            run_id=run_id,
-            run_dir=str(run_dir),
-            input_text=input_text,
-            model_id=model_id,
-            difficulty=difficulty,
-            config=config,
-            override_title=override_title,
-        )
-        
-        workflow = build_techlingo_workflow()
+        resume_run_id = request_data.get("resume_run_id")
+        if resume_run_id:
+            if Path(resume_run_id).name != resume_run_id:
+                await websocket.send_json({"type": "error", "message": "Invalid resume_run_id."})
+                await websocket.close()
+                return
+            try:
+                state, next_executor_id = load_checkpoint(out_dir / resume_run_id)
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "message": str(e)})
+                await websocket.close()
+                return
+            if request_data.get("model_id"):
+                state.model_id = model_id
+            # A resumed run keeps its checkpointed config; only the explicit override applies.
+            if include_reasoning is not None:
+                state.config.include_reasoning = bool(include_reasoning)
+            run_id, run_dir, config = state.run_id, Path(state.run_dir), state.config
+            workflow = build_techlingo_workflow(next_executor_id)
+        else:
+            run_id, run_dir = new_run_dir(out_dir)
+
+            state = PipelineState(
+                run_id=run_id,
+                run_dir=str(run_dir),
+                input_text=input_text,
+                model_id=model_id,
+                difficulty=difficulty,
+                config=config,
+                override_title=override_title,
+            )
+
+            # A workflow instance runs one state at a time; websocket runs may overlap.
+            workflow = build_techlingo_workflow(fresh=True)
         
         await websocket.send_json({
             "type": "start", 
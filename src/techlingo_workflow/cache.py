@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from .io import ensure_dir, env_flag
+
+
+DEFAULT_CACHE_DIR = ".techlingo_cache/llm"
+DEFAULT_MAX_MB = 256
+DEFAULT_MAX_AGE_DAYS = 14
+
+
+def cache_key(*parts: str) -> str:
+    """Stable content hash over the given parts (order-sensitive, separator-safe)."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """Content-addressed on-disk store for parsed LLM JSON responses.
+
+    Entries live under ``<root>/<key[:2]>/<key>.json``. Reads touch the file mtime so
+    size-based eviction drops the least recently used entries first. The store is scanned
+    once, on the first write; after that a running byte count triggers the next prune.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        *,
+        max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024,
+        max_age_seconds: float = DEFAULT_MAX_AGE_DAYS * 86400,
+    ) -> None:
+        self.root = ensure_dir(root)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._bytes: int | None = None
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+                return None
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return payload.get("data")
+
+    def put(self, key: str, data: Any) -> None:
+        path = self._path(key)
+        ensure_dir(path.parent)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        text = json.dumps({"created_at": time.time(), "data": data}, ensure_ascii=False)
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+        if self._bytes is None:
+            self.prune()
+            return
+        # Overwrites are counted twice; that only makes the next prune come early.
+        self._bytes += len(text.encode("utf-8"))
+        if self._bytes > self.max_bytes:
+            self.prune()
+
+    def discard(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def prune(self) -> None:
+        """Drop expired entries, then the least recently used ones until under max_bytes."""
+        now = time.time()
+        entries: list[tuple[float, int, Path]] = []
+        for path in self.root.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            if now - st.st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                path.unlink(missing_ok=True)
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        self._bytes = total
+
+
+_response_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache | None:
+    """Process-wide response cache configured from the environment (None when disabled).
+
+    - TECHLINGO_LLM_CACHE: set to 0/false to disable caching entirely.
+    - TECHLINGO_CACHE_DIR: cache location (default: .techlingo_cache/llm).
+    - TECHLINGO_CACHE_MAX_MB / TECHLINGO_CACHE_MAX_AGE_DAYS: eviction limits.
+    """
+    global _response_cache
+    if not env_flag("TECHLINGO_LLM_CACHE", default=True):
+        return None
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            os.getenv("TECHLINGO_CACHE_DIR", DEFAULT_CACHE_DIR),
+            max_bytes=int(float(os.getenv("TECHLINGO_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024),
+            max_age_seconds=float(os.getenv("TECHLINGO_CACHE_MAX_AGE_DAYS", DEFAULT_MAX_AGE_DAYS)) * 86400,
+        )
+    return _response_cache
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any
+
+from .io import write_json, write_text
+from .models import Course, PipelineState, ValidationReport
+
+MANIFEST_NAME = "manifest.json"
+INPUT_NAME = "input.txt"
+
+# Artifact -> (PipelineState field, model used to load it, executor that runs next).
+# a5_retry_* are written when A5 loops back, so a resumed retry keeps its feedback and scope.
+RESUMABLE_ARTIFACTS: dict[str, tuple[str, type | None, str]] = {
+    "a1_course_map.json": ("a1_course_map", None, "a2_scaffolder"),
+    "a2_course.json": ("a2_course", Course, "a3_scenario_designer"),
+    "a3_course.json": ("a3_course", Course, "a4_feedback_architect"),
+    "a4_course.json": ("a4_course", Course, "a5_validator"),
+    "a5_retry_course.json": ("a5_course", Course, "a2_scaffolder"),
+    "a5_retry_report.json": ("validation_report", ValidationReport, "a2_scaffolder"),
+}
+FINAL_ARTIFACT = "a5_course.json"
+
+# PipelineState fields persisted in the manifest (input_text lives in artifacts/input.txt).
+_STATE_FIELDS = {
+    "run_id",
+    "run_dir",
+    "model_id",
+    "difficulty",
+    "config",
+    "override_title",
+    "retry_count",
+    "retry_lessons",
+    "llm_stats",
+}
+
+
+def sha256_file(path: str | Path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def _artifacts_dir(run_dir: str | Path) -> Path:
+    return Path(run_dir) / "artifacts"
+
+
+def _load_manifest(run_dir: str | Path) -> dict[str, Any]:
+    path = _artifacts_dir(run_dir) / MANIFEST_NAME
+    if not path.exists():
+        return {"artifacts": {}, "seq": 0}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def write_artifact(state: PipelineState, name: str, data: Any) -> None:
+    """Write an artifact and record its content hash plus the run state in the manifest."""
+    artifacts = _artifacts_dir(state.run_dir)
+    write_json(artifacts / name, data)
+
+    manifest = _load_manifest(state.run_dir)
+    input_path = artifacts / INPUT_NAME
+    if "input_sha256" not in manifest or not input_path.exists():
+        write_text(input_path, state.input_text)
+        manifest["input_sha256"] = sha256_file(input_path)
+    manifest["seq"] += 1
+    manifest["artifacts"][name] = {"sha256": sha256_file(artifacts / name), "seq": manifest["seq"]}
+    manifest["state"] = state.model_dump(mode="json", include=_STATE_FIELDS)
+    write_json(artifacts / MANIFEST_NAME, manifest)
+
+
+def _verified(artifacts: Path, name: str, entry: dict[str, Any]) -> bool:
+    path = artifacts / name
+    return path.exists() and sha256_file(path) == entry.get("sha256")
+
+
+def load_checkpoint(run_dir: str | Path) -> tuple[PipelineState, str]:
+    """Rebuild PipelineState from the hash-verified artifacts of a run.
+
+    Returns the state and the id of the executor to continue with (the one after the
+    most recent verified artifact). Raises ValueError if the run cannot be resumed.
+    """
+    artifacts = _artifacts_dir(run_dir)
+    manifest = _load_manifest(run_dir)
+    if "state" not in manifest:
+        raise ValueError(f"No checkpoint manifest in {artifacts}.")
+
+    entries = manifest["artifacts"]
+    if FINAL_ARTIFACT in entries and _verified(artifacts, FINAL_ARTIFACT, entries[FINAL_ARTIFACT]):
+        raise ValueError(f"Run in {run_dir} already completed ({FINAL_ARTIFACT} exists).")
+
+    input_path = artifacts / INPUT_NAME
+    if not input_path.exists() or sha256_file(input_path) != manifest.get("input_sha256"):
+        raise ValueError(f"Input text checkpoint in {artifacts} is missing or does not match its hash.")
+
+    state = PipelineState.model_validate(
+        {**manifest["state"], "input_text": input_path.read_text(encoding="utf-8"), "run_dir": str(run_dir)}
+    )
+
+    next_executor = "a1_modularizer"
+    latest_seq = -1
+    for name, entry in entries.items():
+        if name not in RESUMABLE_ARTIFACTS or not _verified(artifacts, name, entry):
+            continue
+        field, model, after = RESUMABLE_ARTIFACTS[name]
+        data = json.loads((artifacts / name).read_text(encoding="utf-8"))
+        setattr(state, field, model.model_validate(data) if model is not None else data)
+        if entry["seq"] > latest_seq:
+            latest_seq, next_executor = entry["seq"], after
+
+    if next_executor == "a2_scaffolder" and state.a1_course_map is None:
+        next_executor = "a1_modularizer"
+    return state, next_executor
@@ -1,17 +1,22 @@
 from __future__ import annotations
 
 import asyncio
+import glob
 import os
 import time
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 import typer
 from dotenv import load_dotenv
 
+from .checkpoint import load_checkpoint
+from .clients import aclose_clients, configure_client_pool
 from .config import load_workflow_config, DifficultyLevel
-from .io import read_input_text, write_json, write_text
+from .fanout import gather_bounded
+from .io import new_run_dir, read_input_text, write_json, write_text
 from .models import PipelineState, WorkflowRunResult, TextAnalysisResult
+from .scheduler import scheduler_stats
 from .workflow import build_techlingo_workflow, build_analysis_workflow
 
 
@@ -25,6 +30,178 @@ def _root() -> None:
     return
 
 
+def _get_executor_id(evt: object) -> str | None:
+    # Different AF versions may use slightly different attribute names.
+    return (
+        getattr(evt, "executor_id", None)
+        or getattr(evt, "executorId", None)
+        or getattr(evt, "ExecutorId", None)
+    )
+
+
+async def _stream_workflow(
+    workflow: Any, state: PipelineState, *, verbose: bool, prefix: str = ""
+) -> WorkflowRunResult:
+    """Stream a TechLingo workflow, echoing progress lines (prefixed with ``prefix``) as they arrive."""
+    output: WorkflowRunResult | None = None
+    started_at: dict[str, float] = {}
+
+    async for evt in workflow.run_stream(state):
+        name = evt.__class__.__name__
+        executor_id = _get_executor_id(evt)
+
+        # Always surface explicit stage logs emitted from inside executors.
+        if name == "StageLogEvent":
+            msg = getattr(evt, "message", None)
+            ts = time.strftime("%H:%M:%S")
+            if msg:
+                typer.echo(f"[{ts}] {prefix}{msg}")
+
+        # Always show stage progress (so it never looks "stuck").
+        ts = time.strftime("%H:%M:%S")
+        if name in {"ExecutorInvokedEvent", "ExecutorInvokeEvent"} and executor_id:
+            started_at[executor_id] = time.monotonic()
+            typer.echo(f"[{ts}] {prefix}START {executor_id}")
+
+        elif name in {"ExecutorCompletedEvent", "ExecutorCompleteEvent"} and executor_id:
+            dt = ""
+            if executor_id in started_at:
+                dt = f" ({time.monotonic() - started_at[executor_id]:.1f}s)"
+            typer.echo(f"[{ts}] {prefix}DONE  {executor_id}{dt}")
+
+        elif name == "ExecutorFailedEvent" and executor_id:
+            details = getattr(evt, "details", None)
+            msg = getattr(details, "message", None) if details is not None else None
+            typer.echo(f"[{ts}] {prefix}FAIL  {executor_id}: {msg or 'unknown error'}")
+
+        # Extra noisier logs only when requested.
+        if verbose:
+            # If we see an unknown event type, print it (helps debugging "stuck" runs).
+            if name not in {
+                "StageLogEvent",
+                "ExecutorInvokedEvent",
+                "ExecutorInvokeEvent",
+                "ExecutorCompletedEvent",
+                "ExecutorCompleteEvent",
+                "ExecutorFailedEvent",
+                "WorkflowOutputEvent",
+                "WorkflowErrorEvent",
+                "WorkflowWarningEvent",
+                "AgentRunUpdateEvent",
+                "AgentRunEvent",
+                "WorkflowStatusEvent",
+                "WorkflowStartedEvent",
+                "SuperStepStartedEvent",
+                "SuperStepCompletedEvent",
+            }:
+                typer.echo(f"[{ts}] {prefix}EVENT {name}: {evt}")
+
+            if name in {"AgentRunUpdateEvent", "AgentRunEvent"} and executor_id:
+                data = getattr(evt, "data", None)
+                s = str(data) if data is not None else ""
+                s = s.replace("\n", " ").strip()
+                if s:
+                    typer.echo(f"[{ts}] {prefix}STREAM {executor_id}: {s[:120]}")
+
+            elif name == "WorkflowWarningEvent":
+                details = getattr(evt, "details", None)
+                msg = getattr(details, "message", None) if details is not None else None
+                typer.echo(f"[{ts}] {prefix}WARN: {msg or evt}")
+
+        # Capture the final output
+        if name == "WorkflowOutputEvent":
+            output = getattr(evt, "data", None)
+
+        if name == "WorkflowErrorEvent":
+            exc = getattr(evt, "exception", None)
+            raise RuntimeError(str(exc) if exc is not None else "WorkflowErrorEvent")
+
+    if output is None:
+        raise RuntimeError("Workflow completed without WorkflowOutputEvent.")
+    return output
+
+
+def _run_to_completion(workflow: Any, state: PipelineState, *, verbose: bool) -> WorkflowRunResult:
+    """Run a TechLingo workflow on ``state`` with progress output, closing pooled clients afterwards."""
+
+    async def _run_and_close() -> WorkflowRunResult:
+        try:
+            return await _stream_workflow(workflow, state, verbose=verbose)
+        finally:
+            await aclose_clients()
+
+    try:
+        return asyncio.run(_run_and_close())
+    except KeyboardInterrupt:
+        typer.echo("\nInterrupted (Ctrl+C). Partial outputs may exist in the run dir above.")
+        typer.echo(f"Resume with: python main.py resume --run-dir {state.run_dir}")
+        raise typer.Exit(code=130)
+
+
+def _write_run_outputs(result: WorkflowRunResult) -> None:
+    # Write canonical outputs at run root
+    run_dir = Path(result.run_dir)
+    write_json(run_dir / "course.json", result.course.model_dump(mode="json"))
+    write_json(run_dir / "validation_report.json", result.validation_report.model_dump())
+
+    # Minimal human-readable summary
+    md_lines: list[str] = []
+    md_lines.append(f"# {result.course.title}")
+    md_lines.append("")
+    for mod in result.course.modules:
+        md_lines.append(f"## {mod.title}")
+        for lesson in mod.lessons:
+            md_lines.append(f"- **{lesson.title}** — {lesson.slo}")
+            # Include one example question with rationales to show the new feature
+            if lesson.exercises:
+                ex = lesson.exercises[0]
+                if hasattr(ex, "options"):
+                    md_lines.append(f"  - Example Question: {ex.prompt}")
+                    for opt in ex.options:
+                        status = "✅" if opt.is_correct else "❌"
+                        md_lines.append(f"    - {status} {opt.text}")
+                        if opt.rationale:
+                            md_lines.append(f"      - Rationale: {opt.rationale}")
+                        if opt.better_fit:
+                            md_lines.append(f"      - Better Fit: {opt.better_fit}")
+    write_text(run_dir / "course.md", "\n".join(md_lines) + "\n")
+
+
+def _batch_inputs(inputs: str, pattern: str) -> list[Path]:
+    """Source files for a batch: ``pattern`` matches inside a directory, else ``inputs`` as a glob."""
+    root = Path(inputs)
+    paths = root.glob(pattern) if root.is_dir() else (Path(p) for p in glob.glob(inputs, recursive=True))
+    return sorted(p for p in paths if p.is_file())
+
+
+def _batch_names(paths: list[Path]) -> list[str]:
+    # Per-input output folder names: the file stem, suffixed when two inputs share it.
+    seen: dict[str, int] = {}
+    names: list[str] = []
+    for path in paths:
+        seen[path.stem] = seen.get(path.stem, 0) + 1
+        names.append(path.stem if seen[path.stem] == 1 else f"{path.stem}-{seen[path.stem]}")
+    return names
+
+
+def _write_batch_summary(out_dir: Path, rows: list[dict[str, Any]]) -> Path:
+    write_json(out_dir / "batch_summary.json", rows)
+
+    md_lines = [
+        "| Input | Status | Duration (s) | Errors | Warnings | Run dir |",
+        "|---|---|---|---|---|---|",
+    ]
+    for row in rows:
+        status = row["status"] if "error" not in row else f"{row['status']}: {row['error']}"
+        md_lines.append(
+            f"| {row['input']} | {status} | {row['duration_s']} | {row.get('errors', '')} "
+            f"| {row.get('warnings', '')} | {row['run_dir']} |"
+        )
+    md_path = out_dir / "batch_summary.md"
+    write_text(md_path, "\n".join(md_lines) + "\n")
+    return md_path
+
+
 @app.command()
 def run(
     input_text: Optional[str] = typer.Option(None, help="Raw source text to convert into a course."),
@@ -54,6 +231,11 @@ def run(
         "--title",
         help="Manual override for the output course/module title.",
     ),
+    reasoning: Optional[bool] = typer.Option(
+        None,
+        "--reasoning/--no-reasoning",
+        help="Ask stages for a thought_process trace (include_reasoning). Overrides config if set.",
+    ),
 ) -> None:
     """Run the Techlingo A1–A5 workflow and write JSON artifacts to disk."""
     # Important: load .env BEFORE reading OPENAI_* vars. (Typer's envvar= reads too early.)
@@ -74,8 +256,6 @@ def run(
     text = read_input_text(input_text, str(input_file) if input_file else None)
 
     # Build workflow and state in-process so we can stream progress events.
-    from .io import new_run_dir
-
     workflow = build_techlingo_workflow()
     run_id, run_dir = new_run_dir(out_dir)
     
@@ -86,6 +266,8 @@ def run(
             config_path = default_config
             
     loaded_config = load_workflow_config(config_path)
+    if reasoning is not None:
+        loaded_config.include_reasoning = reasoning
     
     # Resolve difficulty: CLI arg > Config > Default(Beginner)
     final_difficulty = difficulty or loaded_config.difficulty
@@ -106,128 +288,175 @@ def run(
     if title:
         typer.echo(f"Title Override: {title}")
 
-    def _get_executor_id(evt: object) -> str | None:
-        # Different AF versions may use slightly different attribute names.
-        return (
-            getattr(evt, "executor_id", None)
-            or getattr(evt, "executorId", None)
-            or getattr(evt, "ExecutorId", None)
-        )
+    result = _run_to_completion(workflow, state, verbose=verbose)
+    _write_run_outputs(result)
 
-    async def _run() -> WorkflowRunResult:
-        output: WorkflowRunResult | None = None
-        started_at: dict[str, float] = {}
+    typer.echo(f"Run complete: {result.run_id}")
+    typer.echo(f"Outputs: {result.run_dir}")
 
-        async for evt in workflow.run_stream(state):
-            name = evt.__class__.__name__
-            executor_id = _get_executor_id(evt)
 
-            # Always surface explicit stage logs emitted from inside executors.
-            if name == "StageLogEvent":
-                msg = getattr(evt, "message", None)
-                ts = time.strftime("%H:%M:%S")
-                if msg:
-                    typer.echo(f"[{ts}] {msg}")
+@app.command()
+def resume(
+    run_dir: Path = typer.Option(..., exists=True, file_okay=False, help="Run directory of an interrupted run."),
+    dotenv_path: Optional[Path] = typer.Option(None, help="Optional .env path (defaults to .env in repo root)."),
+    model_id: Optional[str] = typer.Option(
+        None,
+        help="Override the model id recorded for the run.",
+    ),
+    verbose: bool = typer.Option(
+        False,
+        "--verbose/--no-verbose",
+        help="Print workflow progress events (and agent streaming updates when available).",
+    ),
+) -> None:
+    """Resume an interrupted A1–A5 run from its last verified artifact."""
+    env_path = dotenv_path if dotenv_path is not None else Path(".env")
+    load_dotenv(env_path, override=False)
 
-            # Always show stage progress (so it never looks "stuck").
-            ts = time.strftime("%H:%M:%S")
-            if name in {"ExecutorInvokedEvent", "ExecutorInvokeEvent"} and executor_id:
-                started_at[executor_id] = time.monotonic()
-                typer.echo(f"[{ts}] START {executor_id}")
+    if not os.getenv("OPENAI_API_KEY"):
+        raise typer.BadParameter("OPENAI_API_KEY is required. Set it in .env.")
 
-            elif name in {"ExecutorCompletedEvent", "ExecutorCompleteEvent"} and executor_id:
-                dt = ""
-                if executor_id in started_at:
-                    dt = f" ({time.monotonic() - started_at[executor_id]:.1f}s)"
-                typer.echo(f"[{ts}] DONE  {executor_id}{dt}")
+    try:
+        state, next_executor_id = load_checkpoint(run_dir)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+    if model_id:
+        state.model_id = model_id
 
-            elif name == "ExecutorFailedEvent" and executor_id:
-                details = getattr(evt, "details", None)
-                msg = getattr(details, "message", None) if details is not None else None
-                typer.echo(f"[{ts}] FAIL  {executor_id}: {msg or 'unknown error'}")
+    workflow = build_techlingo_workflow(next_executor_id)
 
-            # Extra noisier logs only when requested.
-            if verbose:
-                # If we see an unknown event type, print it (helps debugging "stuck" runs).
-                if name not in {
-                    "StageLogEvent",
-                    "ExecutorInvokedEvent",
-                    "ExecutorInvokeEvent",
-                    "ExecutorCompletedEvent",
-                    "ExecutorCompleteEvent",
-                    "ExecutorFailedEvent",
-                    "WorkflowOutputEvent",
-                    "WorkflowErrorEvent",
-                    "WorkflowWarningEvent",
-                    "AgentRunUpdateEvent",
-                    "AgentRunEvent",
-                    "WorkflowStatusEvent",
-                    "WorkflowStartedEvent",
-                    "SuperStepStartedEvent",
-                    "SuperStepCompletedEvent",
-                }:
-                    typer.echo(f"[{ts}] EVENT {name}: {evt}")
+    typer.echo(f"Run resumed: {state.run_id}")
+    typer.echo(f"Run dir: {state.run_dir}")
+    typer.echo(f"Continuing from: {next_executor_id}")
 
-                if name in {"AgentRunUpdateEvent", "AgentRunEvent"} and executor_id:
-                    data = getattr(evt, "data", None)
-                    s = str(data) if data is not None else ""
-                    s = s.replace("\n", " ").strip()
-                    if s:
-                        typer.echo(f"[{ts}] STREAM {executor_id}: {s[:120]}")
+    result = _run_to_completion(workflow, state, verbose=verbose)
+    _write_run_outputs(result)
 
-                elif name == "WorkflowWarningEvent":
-                    details = getattr(evt, "details", None)
-                    msg = getattr(details, "message", None) if details is not None else None
-                    typer.echo(f"[{ts}] WARN: {msg or evt}")
+    typer.echo(f"Run complete: {result.run_id}")
+    typer.echo(f"Outputs: {result.run_dir}")
 
-            # Capture the final output
-            if name == "WorkflowOutputEvent":
-                output = getattr(evt, "data", None)
 
-            if name == "WorkflowErrorEvent":
-                exc = getattr(evt, "exception", None)
-                raise RuntimeError(str(exc) if exc is not None else "WorkflowErrorEvent")
+@app.command()
+def batch(
+    inputs: str = typer.Argument(..., help="Directory of source files, or a glob such as 'sources/**/*.md'."),
+    pattern: str = typer.Option("*.txt", help="File pattern used when INPUTS is a directory."),
+    out_dir: Path = typer.Option(Path("outputs"), help="Output directory; each input gets <out-dir>/<name>/run-*."),
+    dotenv_path: Optional[Path] = typer.Option(None, help="Optional .env path (defaults to .env in repo root)."),
+    model_id: Optional[str] = typer.Option(
+        None,
+        help="OpenAI chat model id. If omitted, uses OPENAI_CHAT_MODEL_ID from .env/environment.",
+    ),
+    difficulty: Optional[DifficultyLevel] = typer.Option(
+        None,
+        help="Difficulty of generated questions. Overrides config if set.",
+    ),
+    config_path: Optional[Path] = typer.Option(
+        None,
+        "--config",
+        help="Path to workflow_config.json. Defaults to workflow_config.json if present, or internal defaults.",
+    ),
+    max_runs: int = typer.Option(4, min=1, help="Number of courses generated at the same time."),
+    max_requests: int = typer.Option(
+        8, min=1, help="Cap on in-flight LLM requests across all runs (shared connection pool)."
+    ),
+    verbose: bool = typer.Option(
+        False,
+        "--verbose/--no-verbose",
+        help="Print workflow progress events (and agent streaming updates when available).",
+    ),
+    reasoning: Optional[bool] = typer.Option(
+        None,
+        "--reasoning/--no-reasoning",
+        help="Ask stages for a thought_process trace (include_reasoning). Overrides config if set.",
+    ),
+) -> None:
+    """Run the A1–A5 workflow for many inputs concurrently and write a summary table."""
+    env_path = dotenv_path if dotenv_path is not None else Path(".env")
+    load_dotenv(env_path, override=False)
 
-        if output is None:
-            raise RuntimeError("Workflow completed without WorkflowOutputEvent.")
-        return output
+    if not model_id:
+        model_id = os.getenv("OPENAI_CHAT_MODEL_ID")
 
-    try:
-        result = asyncio.run(_run())
-    except KeyboardInterrupt:
-        typer.echo("\nInterrupted (Ctrl+C). Partial outputs may exist in the run dir above.")
-        raise typer.Exit(code=130)
+    if not os.getenv("OPENAI_API_KEY"):
+        raise typer.BadParameter("OPENAI_API_KEY is required. Set it in .env.")
 
-    # Write canonical outputs at run root
-    run_dir = Path(result.run_dir)
-    write_json(run_dir / "course.json", result.course.model_dump(mode="json"))
-    write_json(run_dir / "validation_report.json", result.validation_report.model_dump())
+    if not model_id:
+        raise typer.BadParameter(
+            "OpenAI model id is required. Set OPENAI_CHAT_MODEL_ID in .env or pass --model-id."
+        )
 
-    # Minimal human-readable summary
-    md_lines: list[str] = []
-    md_lines.append(f"# {result.course.title}")
-    md_lines.append("")
-    for mod in result.course.modules:
-        md_lines.append(f"## {mod.title}")
-        for lesson in mod.lessons:
-            md_lines.append(f"- **{lesson.title}** — {lesson.slo}")
-            # Include one example question with rationales to show the new feature
-            if lesson.exercises:
-                ex = lesson.exercises[0]
-                if hasattr(ex, "options"):
-                    md_lines.append(f"  - Example Question: {ex.prompt}")
-                    for opt in ex.options:
-                        status = "✅" if opt.is_correct else "❌"
-                        md_lines.append(f"    - {status} {opt.text}")
-                        if opt.rationale:
-                            md_lines.append(f"      - Rationale: {opt.rationale}")
-                        if opt.better_fit:
-                            md_lines.append(f"      - Better Fit: {opt.better_fit}")
-    write_text(run_dir / "course.md", "\n".join(md_lines) + "\n")
+    paths = _batch_inputs(inputs, pattern)
+    if not paths:
+        raise typer.BadParameter(f"No input files match {inputs!r}.")
 
-    typer.echo(f"Run complete: {result.run_id}")
-    typer.echo(f"Outputs: {result.run_dir}")
+    if not config_path and Path("workflow_config.json").exists():
+        config_path = Path("workflow_config.json")
+    loaded_config = load_workflow_config(config_path)
+    if reasoning is not None:
+        loaded_config.include_reasoning = reasoning
+    final_difficulty = difficulty or loaded_config.difficulty
+
+    jobs: list[tuple[Path, str, PipelineState]] = []
+    for path, name in zip(paths, _batch_names(paths)):
+        run_id, run_dir = new_run_dir(out_dir / name)
+        state = PipelineState(
+            run_id=run_id,
+            run_dir=str(run_dir),
+            input_text=path.read_text(encoding="utf-8"),
+            model_id=model_id,
+            difficulty=final_difficulty,
+            config=loaded_config.model_copy(deep=True),
+        )
+        jobs.append((path, name, state))
+
+    # One event loop and one connection pool for every run; LLM requests are capped process-wide.
+    configure_client_pool(max_concurrent_requests=max_requests)
+
+    typer.echo(f"Batch started: {len(jobs)} inputs, {max_runs} at a time, {max_requests} LLM requests in flight")
+
+    async def _one(path: Path, name: str, state: PipelineState) -> dict[str, Any]:
+        row: dict[str, Any] = {"input": str(path), "run_id": state.run_id, "run_dir": state.run_dir}
+        started = time.monotonic()
+        try:
+            # Workflow instances cannot run concurrently, so each input gets its own.
+            workflow = build_techlingo_workflow(fresh=True)
+            result = await _stream_workflow(workflow, state, verbose=verbose, prefix=f"[{name}] ")
+            _write_run_outputs(result)
+            issues = result.validation_report.issues
+            row["status"] = "ok" if result.validation_report.ok else "invalid"
+            row["errors"] = sum(1 for i in issues if i.severity == "error")
+            row["warnings"] = sum(1 for i in issues if i.severity == "warning")
+        except Exception as e:
+            row["status"] = "failed"
+            row["error"] = f"{type(e).__name__}: {e}"
+        row["duration_s"] = round(time.monotonic() - started, 1)
+        typer.echo(f"[{time.strftime('%H:%M:%S')}] [{name}] {row['status'].upper()} ({row['duration_s']}s)")
+        return row
+
+    async def _run_all() -> list[dict[str, Any]]:
+        try:
+            return await gather_bounded((_one(*job) for job in jobs), max_runs)
+        finally:
+            for model, stats in scheduler_stats().items():
+                if stats["waited"]:
+                    typer.echo(
+                        f"Rate limit ({model}): {stats['waited']}/{stats['granted']} requests waited, "
+                        f"avg {stats['avg_wait_seconds']}s, max {stats['max_wait_seconds']}s"
+                    )
+            await aclose_clients()
 
+    try:
+        rows = asyncio.run(_run_all())
+    except KeyboardInterrupt:
+        typer.echo("\nInterrupted (Ctrl+C). Resume individual runs with: python main.py resume --run-dir <run dir>")
+        raise typer.Exit(code=130)
+
+    summary_path = _write_batch_summary(out_dir, rows)
+    typer.echo(summary_path.read_text(encoding="utf-8"))
+    failed = sum(1 for row in rows if row["status"] == "failed")
+    typer.echo(f"Batch complete: {len(rows) - failed}/{len(rows)} runs finished. Summary: {summary_path}")
+    if failed:
+        raise typer.Exit(code=1)
 
 
 @app.command()
@@ -263,8 +492,6 @@ def analyze(
 
     text = read_input_text(input_text, str(input_file) if input_file else None)
 
-    from .io import new_run_dir
-
     workflow = build_analysis_workflow()
     run_id, run_dir = new_run_dir(out_dir)
     
@@ -344,8 +571,14 @@ def analyze(
             raise RuntimeError("Workflow completed without WorkflowOutputEvent.")
         return output
 
+    async def _run_and_close() -> TextAnalysisResult:
+        try:
+            return await _run()
+        finally:
+            await aclose_clients()
+
     try:
-        result = asyncio.run(_run())
+        result = asyncio.run(_run_and_close())
     except KeyboardInterrupt:
         typer.echo("\nInterrupted (Ctrl+C).")
         raise typer.Exit(code=130)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+from typing import AsyncIterator, Optional
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from agent_framework import ChatAgent
+from agent_framework.openai import OpenAIChatClient, OpenAISettings
+
+
+DEFAULT_MAX_CONNECTIONS = 20
+KEEPALIVE_EXPIRY_SECONDS = 120.0
+
+_max_connections: Optional[int] = None
+_max_concurrent_requests: Optional[int] = None
+_request_slots: Optional[asyncio.Semaphore] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_openai_client: Optional[AsyncOpenAI] = None
+_closer: Optional[asyncio.Task[None]] = None
+_chat_clients: dict[str, OpenAIChatClient] = {}
+_agents: dict[tuple[str, str, str], ChatAgent] = {}
+
+
+def configure_client_pool(
+    *, max_connections: int | None = None, max_concurrent_requests: int | None = None
+) -> None:
+    """Override the connection limit (default: TECHLINGO_MAX_CONNECTIONS or 20) and the
+    process-wide cap on in-flight LLM requests (default: TECHLINGO_MAX_CONCURRENT_REQUESTS, or none).
+
+    Takes effect for the next pool that is created; call before the first LLM request.
+    """
+    global _max_connections, _max_concurrent_requests, _request_slots
+    _max_connections = max_connections
+    _max_concurrent_requests = max_concurrent_requests
+    _request_slots = None
+
+
+def _pool_limits() -> httpx.Limits:
+    limit = _max_connections or int(os.getenv("TECHLINGO_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS))
+    return httpx.Limits(
+        max_connections=limit,
+        max_keepalive_connections=limit,
+        keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def _reset_if_loop_changed() -> None:
+    # httpx connections are bound to the event loop that opened them. The server and the
+    # CLI each run a single loop, but separate asyncio.run() calls need a fresh pool; the
+    # previous pool is closed on its own loop by _close_with_loop.
+    global _loop, _openai_client, _closer, _request_slots
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if loop is not _loop:
+        _loop = loop
+        _openai_client = None
+        _closer = None
+        _request_slots = None
+        _chat_clients.clear()
+        _agents.clear()
+
+
+async def _close_with_loop(client: AsyncOpenAI) -> None:
+    # Parked for the loop's lifetime: asyncio.run() cancels leftover tasks before closing the
+    # loop, so the pool's connections are closed while their loop can still run the close.
+    try:
+        await asyncio.get_running_loop().create_future()
+    finally:
+        await client.close()
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Process-wide AsyncOpenAI client backed by a keep-alive httpx connection pool.
+
+    Credentials and endpoint resolve like OpenAIChatClient's own (OPENAI_API_KEY,
+    OPENAI_BASE_URL, OPENAI_ORG_ID via OpenAISettings).
+    """
+    global _openai_client, _closer
+    _reset_if_loop_changed()
+    if _openai_client is None:
+        settings = OpenAISettings()
+        _openai_client = AsyncOpenAI(
+            api_key=settings.api_key.get_secret_value() if settings.api_key else None,
+            base_url=settings.base_url or None,
+            organization=settings.org_id,
+            http_client=DefaultAsyncHttpxClient(limits=_pool_limits()),
+        )
+        if _loop is not None:
+            _closer = _loop.create_task(_close_with_loop(_openai_client))
+    return _openai_client
+
+
+def get_chat_agent(*, model_id: str, instructions: str, name: str) -> ChatAgent:
+    """Shared ChatAgent for (model_id, instructions, name); all agents reuse one connection pool."""
+    _reset_if_loop_changed()
+    key = (model_id, instructions, name)
+    agent = _agents.get(key)
+    if agent is None:
+        chat_client = _chat_clients.get(model_id)
+        if chat_client is None:
+            chat_client = OpenAIChatClient(model_id=model_id, async_client=get_openai_client())
+            _chat_clients[model_id] = chat_client
+        agent = ChatAgent(chat_client=chat_client, name=name, instructions=instructions)
+        _agents[key] = agent
+    return agent
+
+
+@contextlib.asynccontextmanager
+async def request_slot() -> AsyncIterator[None]:
+    """Hold one of the process-wide LLM request slots (shared by every stage and every run)."""
+    global _request_slots
+    _reset_if_loop_changed()
+    limit = _max_concurrent_requests or int(os.getenv("TECHLINGO_MAX_CONCURRENT_REQUESTS", 0))
+    if limit <= 0:
+        yield
+        return
+    if _request_slots is None:
+        _request_slots = asyncio.Semaphore(limit)
+    async with _request_slots:
+        yield
+
+
+async def aclose_clients() -> None:
+    """Close pooled connections and drop cached clients (server shutdown / end of CLI run)."""
+    global _openai_client, _closer
+    client, closer = _openai_client, _closer
+    _openai_client = _closer = None
+    _chat_clients.clear()
+    _agents.clear()
+    if closer is not None:
+        closer.cancel()
+    if client is not None:
+        await client.close()
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field, model_validator
 
@@ -16,6 +16,23 @@ class DifficultyLevel(str, Enum):
     advanced = "advanced"
 
 
+# A5 sub-steps that can run on their own model; otherwise they follow the a5_validator entry.
+A5_SUBSTAGES = ("source_check", "repair")
+
+# Keys accepted in WorkflowConfig.stage_models: executor ids plus the A5 sub-steps.
+MODEL_STAGES = (
+    "a1_modularizer",
+    "a2_scaffolder",
+    "a3_scenario_designer",
+    "a4_feedback_architect",
+    "a5_validator",
+    "source_check",
+    "repair",
+    "text_analyzer",
+    "text_reviewer",
+)
+
+
 class WorkflowConfig(BaseModel):
     """Configuration for the Techlingo workflow constraints."""
     
@@ -53,6 +70,62 @@ class WorkflowConfig(BaseModel):
         description="Number of exercises per question type."
     )
 
+    # Performance
+    llm_concurrency: int = Field(4, description="Max concurrent LLM requests when a stage fans out into chunks.")
+    a2_lessons_per_batch: int = Field(1, description="Lessons per A2 request; batches are generated concurrently.")
+    lessons_per_chunk: int = Field(3, description="Lessons per A3 request; chunks are processed concurrently.")
+    a4_lessons_per_chunk: int = Field(3, description="Lessons per A4 request; chunks are processed concurrently.")
+    retrieval_top_k: int = Field(6, description="Source passages retrieved for each per-lesson prompt (A2 batches, fidelity checks, repairs).")
+    fidelity_lessons_per_chunk: int = Field(1, description="Lessons per A5 source-fidelity request; chunks are checked concurrently.")
+    fidelity_source_chars: int = Field(6000, description="Max characters of relevant source text paired with each fidelity chunk.")
+    fidelity_prescreen: bool = Field(True, description="Flag scraping artifacts and meta-references locally; clean, grounded exercises skip the LLM fidelity check.")
+    grounding_threshold: float = Field(
+        0.8,
+        ge=0.0,
+        le=1.0,
+        description="Pre-screen: exercises/flashcards whose answer n-gram overlap with the source is below this get the LLM grounding check (all exercises get the logic checks).",
+    )
+    coverage_max_concepts: int = Field(40, ge=0, description="Source concepts A5 checks exercises/flashcards against (report counts['coverage']); 0 disables.")
+    min_concept_coverage: float = Field(
+        0.0, ge=0.0, le=1.0, description="A5 adds a warning when fewer than this share of source key phrases are practiced; 0 keeps coverage report-only."
+    )
+    scoped_repair: bool = Field(True, description="A5 repairs only the lessons with errors (in parallel) instead of the whole course.")
+    stage_models: Dict[str, str] = Field(
+        default_factory=dict,
+        description="Model id per stage (executor id, 'source_check' or 'repair'); unlisted stages use the run's model. "
+        "'source_check' and 'repair' fall back to the 'a5_validator' entry.",
+    )
+    hedge_percentile: Optional[float] = Field(
+        None,
+        gt=0.0,
+        lt=1.0,
+        description="Opt-in: re-issue an LLM request once it runs longer than this latency percentile (e.g. 0.95) of its stage's history; the first valid result wins.",
+    )
+    hedge_min_samples: int = Field(20, description="Latency samples a stage needs before hedging applies.")
+    include_reasoning: bool = Field(True, description="Ask every stage for a thought_process trace and log/store it; turn off for faster production runs.")
+    patch_output: bool = Field(True, description="A3, A4 and A5 repair return path-addressed edits applied locally instead of the full course JSON (full output on failure).")
+    structured_output: bool = Field(True, description="Constrain stage output to the target Pydantic schema (response_format) where the model supports it.")
+    stage_memo: bool = Field(True, description="Reuse a stage's stored output when its inputs (source, config fields, model, upstream artifact) are unchanged.")
+    llm_cache: bool = Field(True, description="Reuse cached LLM responses for identical (model, instructions, prompt).")
+    llm_cache_skip_stages: List[str] = Field(
+        default_factory=list,
+        description="Executor ids (e.g. 'a2_scaffolder') that always call the model, bypassing the response cache and stage memo.",
+    )
+
+    def model_for(self, stage: str, default: str) -> str:
+        """Model id that serves ``stage`` (see stage_models)."""
+        model = self.stage_models.get(stage)
+        if model is None and stage in A5_SUBSTAGES:
+            model = self.stage_models.get("a5_validator")
+        return model or default
+
+    @model_validator(mode='after')
+    def check_stage_models(self) -> WorkflowConfig:
+        unknown = sorted(set(self.stage_models) - set(MODEL_STAGES))
+        if unknown:
+            raise ValueError(f"Unknown stage_models keys {unknown}; expected some of {list(MODEL_STAGES)}.")
+        return self
+
     @model_validator(mode='after')
     def check_distributions(self) -> WorkflowConfig:
         # Check Bloom's
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import math
+from collections import Counter
+import numpy as np
+from pydantic import BaseModel, Field
+
+from .grounding import shingles
+from .models import Course
+from .prescreen import learner_texts
+from .retrieval import split_passages, tokenize
+
+# Frequent in prose but never a concept on their own (on top of retrieval.STOPWORDS).
+GENERIC_WORDS = frozenset(
+    "about also any based been both but could common each even first following include includes including "
+    "just key like made make many may might more most much need new one only other our over same should "
+    "some such than then there these they those through two understand us use used uses using very want we well were where would".split()
+)
+
+
+class ModuleCoverage(BaseModel):
+    module_index: int
+    title: str
+    concepts: int = Field(..., description="Source concepts attributed to this module.")
+    uncovered: list[str] = Field(default_factory=list)
+
+
+class CoverageReport(BaseModel):
+    """Which source concepts the course's exercises and flashcards practice."""
+
+    concepts: int
+    covered: int
+    ratio: float
+    modules: list[ModuleCoverage] = Field(default_factory=list)
+    unassigned: list[str] = Field(default_factory=list, description="Uncovered concepts no module mentions at all.")
+
+
+def key_phrases(source_text: str, limit: int) -> list[str]:
+    """Top ``limit`` one- and two-word phrases of the source by TF-IDF over its passages."""
+    passages = split_passages(source_text) or [source_text]
+    tf: Counter[str] = Counter()
+    df: Counter[str] = Counter()
+    for passage in passages:
+        tokens = tokenize(passage)
+        grams = [g for g in shingles(tokens, 1) + shingles(tokens, 2) if not GENERIC_WORDS.intersection(g.split())]
+        tf.update(grams)
+        df.update(set(grams))
+    # A two-word phrase seen once is usually an accident of stopword removal.
+    scored = sorted(
+        ((count * math.log(1 + len(passages) / df[g]), g) for g, count in tf.items() if " " not in g or count > 1),
+        reverse=True,
+    )
+    phrases: list[str] = []
+    taken: set[str] = set()
+    for _, phrase in scored:
+        if len(phrases) >= limit:
+            break
+        # Plural/singular variants ("model", "models") count as one concept.
+        words = {w.rstrip("s") for w in phrase.split()}
+        if words <= taken:
+            continue
+        phrases.append(phrase)
+        taken |= words
+    return phrases
+
+
+def _term_matrix(texts: list[str], vocab: dict[str, int]) -> np.ndarray:
+    matrix = np.zeros((len(texts), len(vocab)))
+    for row, text in enumerate(texts):
+        for token in tokenize(text):
+            col = vocab.get(token)
+            if col is not None:
+                matrix[row, col] += 1
+    return matrix
+
+
+def concept_coverage(
+    course: Course,
+    source_text: str,
+    *,
+    max_concepts: int = 40,
+) -> CoverageReport:
+    """Match the source's key phrases against each module's exercises and flashcards in one matrix pass.
+
+    A concept is covered when every one of its words occurs in some module's practice items.
+    An uncovered concept is attributed to the module whose full text (titles, SLOs, items)
+    is most TF-IDF-similar to it, or listed as unassigned when no module mentions it.
+    """
+    concepts = key_phrases(source_text, max_concepts)
+    if not concepts or not course.modules:
+        return CoverageReport(concepts=len(concepts), covered=0, ratio=1.0 if not concepts else 0.0, unassigned=concepts)
+
+    vocab: dict[str, int] = {}
+    for concept in concepts:
+        for token in concept.split():
+            vocab.setdefault(token, len(vocab))
+
+    practice: list[str] = []
+    full: list[str] = []
+    for mod in course.modules:
+        items = " ".join(
+            text
+            for lesson in mod.lessons
+            for item in (*lesson.exercises, *lesson.flashcards)
+            for _, text in learner_texts(item.model_dump(mode="json"), "")
+        )
+        practice.append(items)
+        full.append(" ".join([mod.title, *(f"{lesson.title} {lesson.slo}" for lesson in mod.lessons), items]))
+
+    concept_terms = _term_matrix(concepts, vocab) > 0
+    practice_terms = _term_matrix(practice, vocab) > 0
+    module_tf = _term_matrix(full, vocab)
+
+    # concept x module: words of the concept present in the module's items.
+    hits = concept_terms.astype(float) @ practice_terms.T.astype(float)
+    covered = (hits >= concept_terms.sum(axis=1, keepdims=True)).any(axis=1)
+
+    # TF-IDF similarity over modules attributes each concept to its best-matching module.
+    idf = np.log(1 + len(full) / np.maximum((module_tf > 0).sum(axis=0), 1))
+    similarity = (concept_terms * idf) @ (module_tf * idf).T
+    best = similarity.argmax(axis=1)
+    mentioned = similarity.max(axis=1) > 0
+
+    modules = [
+        ModuleCoverage(module_index=mi, title=mod.title, concepts=int((mentioned & (best == mi)).sum()))
+        for mi, mod in enumerate(course.modules)
+    ]
+    unassigned: list[str] = []
+    for ci in np.flatnonzero(~covered):
+        if mentioned[ci]:
+            modules[best[ci]].uncovered.append(concepts[ci])
+        else:
+            unassigned.append(concepts[ci])
+    return CoverageReport(
+        concepts=len(concepts),
+        covered=int(covered.sum()),
+        ratio=round(float(covered.mean()), 3),
+        modules=modules,
+        unassigned=unassigned,
+    )
@@ -1,14 +1,45 @@
 from __future__ import annotations
 
 import json
+from typing import Callable
 
 from agent_framework import WorkflowContext, executor
 from typing_extensions import Never
 
+from .cache import get_response_cache
+from .checkpoint import write_artifact
+from .config import A5_SUBSTAGES
+from .coverage import concept_coverage
 from .events import StageLogEvent
+from .fanout import (
+    CourseChunk,
+    LessonBatch,
+    LessonSpan,
+    align_batch_lessons,
+    chunk_lessons,
+    course_chunks,
+    course_map_batches,
+    gather_bounded,
+    join_split_results,
+    lesson_batches,
+    lesson_index,
+    merge_lesson_batches,
+    splice_chunks,
+)
+from .hedging import get_latency_tracker
 from .io import write_json
-from .llm import LLMClient
-from .models import Course, PipelineState, ValidationReport, WorkflowRunResult, TextAnalysisResult
+from .llm import LLMClient, T, TruncatedOutputError
+from .memo import StageMemo
+from .models import (
+    Course,
+    Lesson,
+    Module,
+    PipelineState,
+    TextAnalysisResult,
+    ValidationIssue,
+    ValidationReport,
+    WorkflowRunResult,
+)
 from .prompts import (
     a1_modularizer_prompt,
     a2_scaffolder_prompt,
@@ -17,6 +48,7 @@ from .prompts import (
     analyzer_prompt,
     reviewer_prompt,
 )
+from .serialize import prompt_json, restore_omitted
 from .validate import repair_course_if_needed, validate_course
 
 
@@ -24,31 +56,188 @@ def _artifact_path(state: PipelineState, name: str) -> str:
     return f"{state.run_dir}/artifacts/{name}"
 
 
+def _llm(state: PipelineState, stage: str, name: str) -> LLMClient:
+    cache = None
+    executor_id = "a5_validator" if stage in A5_SUBSTAGES else stage
+    if state.config.llm_cache and executor_id not in state.config.llm_cache_skip_stages:
+        cache = get_response_cache()
+    return LLMClient(
+        model_id=state.config.model_for(stage, state.model_id),
+        name=name,
+        cache=cache,
+        # After an A5 failure, cached generations would reproduce the output that failed;
+        # fact checks of unchanged content are still valid.
+        refresh_cache=state.retry_count > 0 and stage != "source_check",
+        run_id=state.run_id,
+        structured_output=state.config.structured_output,
+        stage=stage,
+        hedge_percentile=state.config.hedge_percentile,
+        hedge_min_samples=state.config.hedge_min_samples,
+    )
+
+
+def _retry_keys(state: PipelineState) -> set[tuple[int, int]]:
+    return {(mi, li) for mi, li in state.retry_lessons or []}
+
+
+def _span_keys(span: LessonSpan) -> set[tuple[int, int]]:
+    return {(span.module_index, li) for li in span.lesson_indices}
+
+
+def _parse(llm: LLMClient, prompt: str, model: type[T], data: dict) -> T:
+    try:
+        return model.model_validate(data)
+    except Exception:
+        # Never replay a response that failed schema validation on the next run.
+        llm.forget(prompt, model)
+        raise
+
+
+async def _rewrite_in_chunks(
+    state: PipelineState,
+    ctx: WorkflowContext,
+    llm: LLMClient,
+    label: str,
+    course: Course,
+    lessons_per_chunk: int,
+    build_prompt: Callable[[str, bool], str],
+) -> Course:
+    """Run a full-course rewrite stage (A3/A4) over lesson chunks concurrently and splice the results.
+
+    ``build_prompt(course_json, patch)`` builds the chunk prompt; with config.patch_output the
+    model returns edits (paths local to the chunk) and the full-output prompt is the fallback.
+    On a scoped retry only the regenerated lessons are sent; the rest already passed A3/A4.
+    """
+    only = _retry_keys(state) if state.retry_lessons else None
+    chunks = course_chunks(course, lessons_per_chunk, only=only)
+
+    async def _process(chunk: CourseChunk) -> Course:
+        course_json = prompt_json(chunk.course, stage=llm.stage, stats=llm.stats)
+        result: Course | None = None
+        prompt, schema = build_prompt(course_json, False), Course
+        if state.config.patch_output:
+            patch_prompt = build_prompt(course_json, True)
+            patched = await llm.run_patch(patch_prompt, chunk.course)
+            if patched is None:
+                await ctx.add_event(StageLogEvent(
+                    f"{label}: chunk {chunk.label} edits did not apply; requesting the full chunk"
+                ))
+            else:
+                result, thoughts = patched
+                result.thought_process = thoughts or None
+                prompt, schema = patch_prompt, None
+        if result is None:
+            data = await llm.run_json(prompt, Course)
+            result = restore_omitted(chunk.course, _parse(llm, prompt, Course, data), llm.stage)
+        returned = len(chunk_lessons(result))
+        if returned != len(chunk.lesson_indices):
+            llm.forget(prompt, schema)
+            await ctx.add_event(StageLogEvent(
+                f"{label}: chunk {chunk.label} returned {returned} lessons instead of "
+                f"{len(chunk.lesson_indices)}; keeping its input unchanged"
+            ))
+            return chunk.course
+        await ctx.add_event(StageLogEvent(f"{label}: chunk {chunk.label} done"))
+        return result
+
+    async def _process_or_split(chunk: CourseChunk) -> Course:
+        try:
+            return await _process(chunk)
+        except TruncatedOutputError:
+            if len(chunk.lesson_indices) < 2:
+                raise
+            halves = chunk.split()
+            await ctx.add_event(StageLogEvent(
+                f"{label}: chunk {chunk.label} hit the output limit; splitting into {halves[0].label} and {halves[1].label}"
+            ))
+            # One half after the other, inside this chunk's gather_bounded slot, so llm_concurrency holds.
+            return join_split_results([await _process_or_split(h) for h in halves])
+
+    await ctx.add_event(StageLogEvent(
+        f"{label}: calling LLM for {len(chunks)} lesson chunks (concurrency {state.config.llm_concurrency})"
+    ))
+    results = await gather_bounded((_process_or_split(c) for c in chunks), state.config.llm_concurrency)
+    await ctx.add_event(StageLogEvent(f"{label}: received all chunks, validating schema"))
+    return splice_chunks(course, chunks, results)
+
+
+def _retry_inputs(state: PipelineState) -> tuple:
+    """What a scoped A2 retry reads besides the course map (part of the A2 memo key)."""
+    if not state.validation_report or state.validation_report.ok:
+        return ()
+    return (state.validation_report, state.retry_lessons, state.a5_course if state.retry_lessons else None)
+
+
+async def _memo_hit(state: PipelineState, ctx: WorkflowContext, label: str) -> None:
+    state.llm_stats["stage_memo_hits"] = state.llm_stats.get("stage_memo_hits", 0) + 1
+    await ctx.add_event(StageLogEvent(f"{label}: inputs unchanged, reusing memoized output"))
+
+
+async def _report_thoughts(state: PipelineState, ctx: WorkflowContext, label: str, result: Course | dict) -> None:
+    """Log a stage's thought_process, or drop it from ``result`` when config.include_reasoning is off."""
+    if not state.config.include_reasoning:
+        if isinstance(result, dict):
+            result.pop("thought_process", None)
+        else:
+            result.thought_process = None
+        return
+    thoughts = result.get("thought_process") if isinstance(result, dict) else result.thought_process
+    if isinstance(thoughts, list) and thoughts:
+        thought_str = "\n".join([f"  > {t}" for t in thoughts])
+        await ctx.add_event(StageLogEvent(f"{label} Thought Process:\n{thought_str}"))
+
+
+async def _log_llm_stats(state: PipelineState, ctx: WorkflowContext, label: str, llm: LLMClient) -> None:
+    if state.config.hedge_percentile:
+        get_latency_tracker().flush()
+    for key, value in llm.stats.items():
+        state.llm_stats[key] = state.llm_stats.get(key, 0) + value
+    stats_str = ", ".join(f"{k}={v}" for k, v in sorted(llm.stats.items()))
+    prefix_str = ""
+    if llm.stats["prompt_tokens"]:
+        share = llm.stats["prompt_prefix_tokens"] / llm.stats["prompt_tokens"]
+        prefix_str = f"; cacheable prompt prefix {share:.0%}"
+    await ctx.add_event(StageLogEvent(
+        f"{label}: served by {llm.model_id}" + (f"; LLM stats ({stats_str})" if stats_str else "") + prefix_str
+    ))
+
+
 @executor(id="a1_modularizer")
 async def a1_modularizer(state: PipelineState, ctx: WorkflowContext[PipelineState]) -> None:
     await ctx.add_event(StageLogEvent("A1: starting modularizer (course map)"))
-    llm = LLMClient(model_id=state.model_id, name="A1_Modularizer")
-    await ctx.add_event(StageLogEvent("A1: calling LLM"))
-    data = await llm.run_json(a1_modularizer_prompt(state.input_text, difficulty=state.difficulty, config=state.config, override_title=state.override_title))
-    await ctx.add_event(StageLogEvent("A1: received LLM response, writing artifact"))
+    memo = StageMemo(state, "a1_modularizer")
+    data = memo.get()
+    if data is not None:
+        await _memo_hit(state, ctx, "A1")
+    else:
+        llm = _llm(state, "a1_modularizer", "A1_Modularizer")
+        await ctx.add_event(StageLogEvent("A1: calling LLM"))
+        data = await llm.run_json(a1_modularizer_prompt(state.input_text, difficulty=state.difficulty, config=state.config, override_title=state.override_title))
+        await ctx.add_event(StageLogEvent("A1: received LLM response, writing artifact"))
+        await _log_llm_stats(state, ctx, "A1", llm)
+        memo.put(data)
 
-    if "thought_process" in data and isinstance(data["thought_process"], list):
-        thought_str = "\n".join([f"  > {t}" for t in data["thought_process"]])
-        await ctx.add_event(StageLogEvent(f"A1 Thought Process:\n{thought_str}"))
+    await _report_thoughts(state, ctx, "A1", data)
 
     state.a1_course_map = data
-    write_json(_artifact_path(state, "a1_course_map.json"), data)
+    write_artifact(state, "a1_course_map.json", data)
     await ctx.add_event(StageLogEvent("A1: done, forwarding to A2"))
     await ctx.send_message(state)
 
 
-@executor(id="a2_scaffolder")
-async def a2_scaffolder(state: PipelineState, ctx: WorkflowContext[PipelineState]) -> None:
-    if state.a1_course_map is None:
-        raise RuntimeError("A2 requires A1 course map.")
-    await ctx.add_event(StageLogEvent("A2: starting scaffolder (8 exercises per lesson)"))
-    llm = LLMClient(model_id=state.model_id, name="A2_Scaffolder")
-    course_map_json = json.dumps(state.a1_course_map, ensure_ascii=False, indent=2)
+async def _scaffold_course(state: PipelineState, ctx: WorkflowContext) -> Course:
+    """A2 generation: lesson batches from the A1 map, or only the failing lessons on a scoped retry."""
+    llm = _llm(state, "a2_scaffolder", "A2_Scaffolder")
+    # Scoped retry: regenerate only the failing lessons and splice them into the last A5 course.
+    base_course = state.a5_course if state.retry_lessons else None
+    if base_course is not None:
+        batches = lesson_batches(base_course, _retry_keys(state), state.config.a2_lessons_per_batch)
+        await ctx.add_event(StageLogEvent(
+            f"A2: scoped retry, regenerating {len(state.retry_lessons)} lessons: "
+            + ", ".join(b.label for b in batches)
+        ))
+    else:
+        batches = course_map_batches(state.a1_course_map, state.config.a2_lessons_per_batch)
     
     # Check for previous validation errors to pass for self-correction
     validation_issues = None
@@ -57,25 +246,114 @@ async def a2_scaffolder(state: PipelineState, ctx: WorkflowContext[PipelineState
          validation_issues = [i.model_dump() for i in state.validation_report.issues if i.severity == "error"]
          await ctx.add_event(StageLogEvent(f"A2: self-correcting retry {state.retry_count}. Injecting {len(validation_issues)} errors."))
 
-    await ctx.add_event(StageLogEvent("A2: calling LLM (this step can take a few minutes)"))
-    data = await llm.run_json(a2_scaffolder_prompt(
-        course_map_json, 
-        difficulty=state.difficulty, 
-        config=state.config,
-        override_title=state.override_title,
-        validation_issues=validation_issues
+    async def _generate(batch: LessonBatch, attempt: int = 0) -> Course:
+        batch_issues = None
+        if validation_issues:
+            # Hand each batch only its own lessons' errors (re-indexed) plus course-level ones.
+            batch_issues = [
+                {**issue, "path": local}
+                for issue in validation_issues
+                if (local := batch.local_path(issue["path"])) is not None
+            ]
+        lessons_query = "\n".join(
+            f"{lesson.get('title', '')} {lesson.get('slo', '')}"
+            for mod in batch.course_map["modules"]
+            for lesson in mod["lessons"]
+        )
+        prompt = a2_scaffolder_prompt(
+            prompt_json(batch.course_map, stats=llm.stats),
+            difficulty=state.difficulty,
+            config=state.config,
+            override_title=state.override_title,
+            validation_issues=batch_issues,
+            source_passages=state.source_index().relevant(
+                lessons_query, k=state.config.retrieval_top_k, max_chars=state.config.fidelity_source_chars
+            ),
+        )
+        data = await llm.run_json(prompt, Course)
+        result = _parse(llm, prompt, Course, data)
+        if base_course is not None and len(chunk_lessons(result)) != len(batch.lesson_indices):
+            llm.forget(prompt, Course)
+            await ctx.add_event(StageLogEvent(f"A2: batch {batch.label} returned a different lesson count; keeping previous lessons"))
+            return course_chunks(base_course, len(batch.lesson_indices), only=_span_keys(batch))[0].course
+        if base_course is None:
+            lessons = align_batch_lessons(batch, result)
+            if lessons is None:
+                # A short or long batch would shift lessons between modules; ask again, smaller.
+                llm.forget(prompt, Course)
+                returned = len(chunk_lessons(result))
+                if len(batch.lesson_indices) > 1:
+                    halves = batch.split()
+                    await ctx.add_event(StageLogEvent(
+                        f"A2: batch {batch.label} returned {returned} lessons instead of {len(batch.lesson_indices)}; "
+                        f"splitting into {halves[0].label} and {halves[1].label}"
+                    ))
+                    return join_split_results([await _generate_or_split(h) for h in halves])
+                if attempt == 0:
+                    await ctx.add_event(StageLogEvent(
+                        f"A2: batch {batch.label} returned {returned} lessons instead of 1; retrying"
+                    ))
+                    return await _generate(batch, attempt + 1)
+                # Leave an empty lesson under the planned title: A5 flags it and the scoped retry regenerates it.
+                plan = batch.course_map["modules"][0]["lessons"][0]
+                await ctx.add_event(StageLogEvent(
+                    f"A2: batch {batch.label} still returned {returned} lessons; leaving it empty for the A5 retry"
+                ))
+                lessons = [Lesson(title=plan.get("title") or "", slo=plan.get("slo") or "")]
+            module_title = result.modules[0].title if result.modules else batch.course_map["modules"][0].get("title") or ""
+            result = result.model_copy(update={"modules": [Module(title=module_title, lessons=lessons)]})
+        await ctx.add_event(StageLogEvent(f"A2: batch {batch.label} done"))
+        return result
+
+    async def _generate_or_split(batch: LessonBatch) -> Course:
+        try:
+            return await _generate(batch)
+        except TruncatedOutputError:
+            if len(batch.lesson_indices) < 2:
+                raise
+            halves = batch.split()
+            await ctx.add_event(StageLogEvent(
+                f"A2: batch {batch.label} hit the output limit; splitting into {halves[0].label} and {halves[1].label}"
+            ))
+            # Sequential, like the A3/A4 chunk split: the halves share this batch's concurrency slot.
+            return join_split_results([await _generate_or_split(h) for h in halves])
+
+    await ctx.add_event(StageLogEvent(
+        f"A2: calling LLM for {len(batches)} lesson batches (concurrency {state.config.llm_concurrency})"
     ))
-    await ctx.add_event(StageLogEvent("A2: received LLM response, validating schema"))
+    results = await gather_bounded((_generate_or_split(b) for b in batches), state.config.llm_concurrency)
+    await ctx.add_event(StageLogEvent("A2: received all batches, merging course"))
+    await _log_llm_stats(state, ctx, "A2", llm)
+
+    if base_course is not None:
+        course = splice_chunks(base_course, batches, results)
+    else:
+        course = merge_lesson_batches(state.a1_course_map, batches, results)
+    if state.override_title:
+        course.title = state.override_title
+    return course
 
-    if "thought_process" in data and isinstance(data["thought_process"], list):
-        thought_str = "\n".join([f"  > {t}" for t in data["thought_process"]])
-        await ctx.add_event(StageLogEvent(f"A2 Thought Process:\n{thought_str}"))
 
-    course = Course.model_validate(data)
+@executor(id="a2_scaffolder")
+async def a2_scaffolder(state: PipelineState, ctx: WorkflowContext[PipelineState]) -> None:
+    if state.a1_course_map is None:
+        raise RuntimeError("A2 requires A1 course map.")
+    await ctx.add_event(StageLogEvent(f"A2: starting scaffolder ({state.config.exercises_per_lesson} exercises per lesson)"))
+    memo = StageMemo(state, "a2_scaffolder", state.a1_course_map, *_retry_inputs(state))
+    cached = memo.get()
+    if cached is not None:
+        course = Course.model_validate(cached)
+        await _memo_hit(state, ctx, "A2")
+    else:
+        course = await _scaffold_course(state, ctx)
+        memo.put(course.model_dump(mode="json"))
+
+    await _report_thoughts(state, ctx, "A2", course)
+
     course.difficulty = state.difficulty
     state.a2_course = course
     await ctx.add_event(StageLogEvent("A2: writing artifact, forwarding to A3"))
-    write_json(_artifact_path(state, "a2_course.json"), course.model_dump(mode="json"))
+    write_artifact(state, "a2_course.json", course.model_dump(mode="json"))
     await ctx.send_message(state)
 
 
@@ -84,21 +362,33 @@ async def a3_scenario_designer(state: PipelineState, ctx: WorkflowContext[Pipeli
     if state.a2_course is None:
         raise RuntimeError("A3 requires A2 course.")
     await ctx.add_event(StageLogEvent("A3: starting scenario designer (make L3/L4 scenario-based)"))
-    llm = LLMClient(model_id=state.model_id, name="A3_ScenarioDesigner")
-    course_json = state.a2_course.model_dump_json(indent=2)
-    await ctx.add_event(StageLogEvent("A3: calling LLM"))
-    data = await llm.run_json(a3_scenario_designer_prompt(course_json, difficulty=state.difficulty, config=state.config))
-    await ctx.add_event(StageLogEvent("A3: received LLM response, validating schema"))
+    memo = StageMemo(state, "a3_scenario_designer", state.a2_course, state.retry_lessons)
+    cached = memo.get()
+    if cached is not None:
+        course = Course.model_validate(cached)
+        await _memo_hit(state, ctx, "A3")
+    else:
+        llm = _llm(state, "a3_scenario_designer", "A3_ScenarioDesigner")
+        course = await _rewrite_in_chunks(
+            state,
+            ctx,
+            llm,
+            "A3",
+            state.a2_course,
+            state.config.lessons_per_chunk,
+            lambda course_json, patch: a3_scenario_designer_prompt(
+                course_json, difficulty=state.difficulty, config=state.config, patch=patch
+            ),
+        )
+        await _log_llm_stats(state, ctx, "A3", llm)
+        memo.put(course.model_dump(mode="json"))
 
-    if "thought_process" in data and isinstance(data["thought_process"], list):
-        thought_str = "\n".join([f"  > {t}" for t in data["thought_process"]])
-        await ctx.add_event(StageLogEvent(f"A3 Thought Process:\n{thought_str}"))
+    await _report_thoughts(state, ctx, "A3", course)
 
-    course = Course.model_validate(data)
     course.difficulty = state.difficulty
     state.a3_course = course
     await ctx.add_event(StageLogEvent("A3: writing artifact, forwarding to A4"))
-    write_json(_artifact_path(state, "a3_course.json"), course.model_dump(mode="json"))
+    write_artifact(state, "a3_course.json", course.model_dump(mode="json"))
     await ctx.send_message(state)
 
 
@@ -107,21 +397,33 @@ async def a4_feedback_architect(state: PipelineState, ctx: WorkflowContext[Pipel
     if state.a3_course is None:
         raise RuntimeError("A4 requires A3 course.")
     await ctx.add_event(StageLogEvent("A4: starting feedback architect (paired feedback for distractors)"))
-    llm = LLMClient(model_id=state.model_id, name="A4_FeedbackArchitect")
-    course_json = state.a3_course.model_dump_json(indent=2)
-    await ctx.add_event(StageLogEvent("A4: calling LLM"))
-    data = await llm.run_json(a4_feedback_architect_prompt(course_json, difficulty=state.difficulty, config=state.config))
-    await ctx.add_event(StageLogEvent("A4: received LLM response, validating schema"))
+    memo = StageMemo(state, "a4_feedback_architect", state.a3_course, state.retry_lessons)
+    cached = memo.get()
+    if cached is not None:
+        course = Course.model_validate(cached)
+        await _memo_hit(state, ctx, "A4")
+    else:
+        llm = _llm(state, "a4_feedback_architect", "A4_FeedbackArchitect")
+        course = await _rewrite_in_chunks(
+            state,
+            ctx,
+            llm,
+            "A4",
+            state.a3_course,
+            state.config.a4_lessons_per_chunk,
+            lambda course_json, patch: a4_feedback_architect_prompt(
+                course_json, difficulty=state.difficulty, config=state.config, patch=patch
+            ),
+        )
+        await _log_llm_stats(state, ctx, "A4", llm)
+        memo.put(course.model_dump(mode="json"))
 
-    if "thought_process" in data and isinstance(data["thought_process"], list):
-        thought_str = "\n".join([f"  > {t}" for t in data["thought_process"]])
-        await ctx.add_event(StageLogEvent(f"A4 Thought Process:\n{thought_str}"))
+    await _report_thoughts(state, ctx, "A4", course)
 
-    course = Course.model_validate(data)
     course.difficulty = state.difficulty
     state.a4_course = course
     await ctx.add_event(StageLogEvent("A4: writing artifact, forwarding to A5"))
-    write_json(_artifact_path(state, "a4_course.json"), course.model_dump(mode="json"))
+    write_artifact(state, "a4_course.json", course.model_dump(mode="json"))
     await ctx.send_message(state)
 
 
@@ -131,19 +433,52 @@ async def a5_validator(state: PipelineState, ctx: WorkflowContext[Never, Workflo
         raise RuntimeError("A5 requires A4 course.")
 
     # Deterministic validation + optional repair
-    llm = LLMClient(model_id=state.model_id, name="A5_ValidatorRepair")
-    await ctx.add_event(StageLogEvent("A5: validating output + repairing if needed"))
-    repaired_course, report = await repair_course_if_needed(
-        state.a4_course, llm, state.config, max_repairs=1, source_text=state.input_text
-    )
+    memo = StageMemo(state, "a5_validator", state.a4_course)
+    cached = memo.get()
+    if cached is not None:
+        repaired_course = Course.model_validate(cached["course"])
+        report = ValidationReport.model_validate(cached["report"])
+        await _memo_hit(state, ctx, "A5")
+    else:
+        llm = _llm(state, "repair", "A5_ValidatorRepair")
+        check_llm = _llm(state, "source_check", "A5_SourceCheck")
+        await ctx.add_event(StageLogEvent("A5: validating output + repairing if needed"))
+        repaired_course, report = await repair_course_if_needed(
+            state.a4_course,
+            llm,
+            state.config,
+            max_repairs=1,
+            source_text=state.input_text,
+            source_index=state.source_index(),
+            grounding_index=state.grounding_index(),
+            check_llm=check_llm,
+        )
+        await _log_llm_stats(state, ctx, "A5 source check", check_llm)
+        await _log_llm_stats(state, ctx, "A5 repair", llm)
+        memo.put({"course": repaired_course.model_dump(mode="json"), "report": report.model_dump(mode="json")})
     repaired_course.difficulty = state.difficulty
     state.a5_course = repaired_course
     state.validation_report = report
 
+    # Local concept coverage: no model call, so it is recomputed rather than memoized.
+    if state.config.coverage_max_concepts:
+        coverage = concept_coverage(repaired_course, state.input_text, max_concepts=state.config.coverage_max_concepts)
+        report.counts["coverage"] = coverage.model_dump(mode="json")
+        await ctx.add_event(
+            StageLogEvent(f"A5: source concept coverage {coverage.covered}/{coverage.concepts} ({coverage.ratio:.0%})")
+        )
+        if coverage.ratio < state.config.min_concept_coverage:
+            missing = [c for m in coverage.modules for c in m.uncovered] + coverage.unassigned
+            report.issues.append(
+                ValidationIssue(
+                    severity="warning",
+                    path="modules",
+                    message=f"Only {coverage.ratio:.0%} of source concepts are practiced; missing: {', '.join(missing[:10])}.",
+                )
+            )
+
     # Log repairs thought process if available
-    if repaired_course.thought_process:
-        thought_str = "\n".join([f"  > {t}" for t in repaired_course.thought_process])
-        await ctx.add_event(StageLogEvent(f"A5 Repair Thought Process:\n{thought_str}"))
+    await _report_thoughts(state, ctx, "A5 Repair", repaired_course)
 
     # Log validation issues
     if not report.ok:
@@ -156,15 +491,28 @@ async def a5_validator(state: PipelineState, ctx: WorkflowContext[Never, Workflo
     MAX_RETRIES = 2
     if not report.ok and state.retry_count < MAX_RETRIES:
         state.retry_count += 1
+        # If every error sits inside a lesson, only those lessons go back through A2-A4.
+        error_keys = [lesson_index(i.path) for i in report.issues if i.severity == "error"]
+        if error_keys and all(k is not None for k in error_keys):
+            state.retry_lessons = sorted(set(error_keys))
+            await ctx.add_event(StageLogEvent(f"A5: errors are confined to {len(state.retry_lessons)} lessons; retry is lesson-scoped."))
+        else:
+            state.retry_lessons = None
         await ctx.add_event(StageLogEvent(f"A5: Validation failed (errors found). Looping back to A2 (Attempt {state.retry_count}/{MAX_RETRIES})."))
+        write_artifact(state, "a5_retry_report.json", report.model_dump(mode="json"))
+        write_artifact(state, "a5_retry_course.json", repaired_course.model_dump(mode="json"))
         # We DO NOT yield output here. We loop back.
         # The edges in workflow.py will handle the routing, but we need to ensure we don't proceed to 'yield_output'.
         await ctx.send_message(state)
         return
 
+    if state.llm_stats:
+        totals_str = ", ".join(f"{k}={v}" for k, v in sorted(state.llm_stats.items()))
+        await ctx.add_event(StageLogEvent(f"A5: run LLM totals ({totals_str})"))
+
     await ctx.add_event(StageLogEvent("A5: writing final artifacts"))
-    write_json(_artifact_path(state, "a5_course.json"), repaired_course.model_dump(mode="json"))
     write_json(_artifact_path(state, "validation_report.json"), report.model_dump())
+    write_artifact(state, "a5_course.json", repaired_course.model_dump(mode="json"))
 
     # Emit final workflow output
     await ctx.add_event(StageLogEvent("A5: done, emitting final output"))
@@ -182,18 +530,24 @@ async def a5_validator(state: PipelineState, ctx: WorkflowContext[Never, Workflo
 @executor(id="text_analyzer")
 async def text_analyzer(state: PipelineState, ctx: WorkflowContext[PipelineState]) -> None:
     await ctx.add_event(StageLogEvent("Analyzer: starting text analysis"))
-    llm = LLMClient(model_id=state.model_id, name="Text_Analyzer")
-    
-    await ctx.add_event(StageLogEvent("Analyzer: calling LLM"))
-    data = await llm.run_json(analyzer_prompt(state.input_text))
-    
-    await ctx.add_event(StageLogEvent("Analyzer: received LLM response, parsing"))
+    memo = StageMemo(state, "text_analyzer")
+    llm = _llm(state, "text_analyzer", "Text_Analyzer")
+    prompt = analyzer_prompt(state.input_text, reasoning=state.config.include_reasoning)
+    data = memo.get()
+    if data is not None:
+        await _memo_hit(state, ctx, "Analyzer")
+        result = _parse(llm, prompt, TextAnalysisResult, data)
+    else:
+        await ctx.add_event(StageLogEvent("Analyzer: calling LLM"))
+        data = await llm.run_json(prompt, TextAnalysisResult)
+
+        await ctx.add_event(StageLogEvent("Analyzer: received LLM response, parsing"))
+        await _log_llm_stats(state, ctx, "Analyzer", llm)
+        result = _parse(llm, prompt, TextAnalysisResult, data)
+        memo.put(data)
 
-    if "thought_process" in data and isinstance(data["thought_process"], list):
-        thought_str = "\n".join([f"  > {t}" for t in data["thought_process"]])
-        await ctx.add_event(StageLogEvent(f"Analyzer Thought Process:\n{thought_str}"))
+    await _report_thoughts(state, ctx, "Analyzer", data)
 
-    result = TextAnalysisResult.model_validate(data)
     state.analysis_result = result
     
     write_json(_artifact_path(state, "analysis_initial.json"), result.model_dump(mode="json"))
@@ -207,20 +561,26 @@ async def text_reviewer(state: PipelineState, ctx: WorkflowContext[Never, TextAn
         raise RuntimeError("Reviewer requires analysis result.")
         
     await ctx.add_event(StageLogEvent("Reviewer: starting review"))
-    llm = LLMClient(model_id=state.model_id, name="Text_Reviewer")
-    
-    current_json = state.analysis_result.model_dump_json(indent=2)
+    memo = StageMemo(state, "text_reviewer", state.analysis_result)
+    llm = _llm(state, "text_reviewer", "Text_Reviewer")
     
-    await ctx.add_event(StageLogEvent("Reviewer: calling LLM to check content"))
-    data = await llm.run_json(reviewer_prompt(state.input_text, current_json))
-    
-    await ctx.add_event(StageLogEvent("Reviewer: received LLM response, parsing"))
+    current_json = prompt_json(state.analysis_result, stats=llm.stats)
+    prompt = reviewer_prompt(state.input_text, current_json, reasoning=state.config.include_reasoning)
+    data = memo.get()
+    if data is not None:
+        await _memo_hit(state, ctx, "Reviewer")
+        final_result = _parse(llm, prompt, TextAnalysisResult, data)
+    else:
+        await ctx.add_event(StageLogEvent("Reviewer: calling LLM to check content"))
+        data = await llm.run_json(prompt, TextAnalysisResult)
+
+        await ctx.add_event(StageLogEvent("Reviewer: received LLM response, parsing"))
+        await _log_llm_stats(state, ctx, "Reviewer", llm)
+        final_result = _parse(llm, prompt, TextAnalysisResult, data)
+        memo.put(data)
 
-    if "thought_process" in data and isinstance(data["thought_process"], list):
-        thought_str = "\n".join([f"  > {t}" for t in data["thought_process"]])
-        await ctx.add_event(StageLogEvent(f"Reviewer Thought Process:\n{thought_str}"))
+    await _report_thoughts(state, ctx, "Reviewer", data)
 
-    final_result = TextAnalysisResult.model_validate(data)
     state.analysis_result = final_result
     
     await ctx.add_event(StageLogEvent("Reviewer: writing final artifact"))
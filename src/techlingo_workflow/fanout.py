@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import asyncio
+import re
+from typing import Any, Awaitable, Iterable, Optional, TypeVar
+
+from pydantic import BaseModel
+
+from .models import Course, Lesson, Module
+
+R = TypeVar("R")
+
+_LESSON_PATH_RE = re.compile(r"^modules\[(\d+)\]\.lessons\[(\d+)\]")
+
+
+async def gather_bounded(aws: Iterable[Awaitable[R]], limit: int) -> list[R]:
+    """asyncio.gather with at most ``limit`` awaitables in flight; results keep input order."""
+    sem = asyncio.Semaphore(max(1, limit))
+
+    async def _one(aw: Awaitable[R]) -> R:
+        async with sem:
+            return await aw
+
+    return list(await asyncio.gather(*(_one(aw) for aw in aws)))
+
+
+def lesson_index(path: str) -> Optional[tuple[int, int]]:
+    """(module, lesson) indices for a ``modules[i].lessons[j]...`` path, else None."""
+    m = _LESSON_PATH_RE.match(path)
+    if not m:
+        return None
+    return int(m.group(1)), int(m.group(2))
+
+
+def relocate_path(path: str, module_index: int, lesson_index: int) -> str:
+    """Rewrite the ``modules[i].lessons[j]`` prefix of ``path`` to the given indices."""
+    return _LESSON_PATH_RE.sub(f"modules[{module_index}].lessons[{lesson_index}]", path, count=1)
+
+
+class LessonSpan(BaseModel):
+    """Some lessons of one module, addressed by their indices in the full course."""
+
+    module_index: int
+    lesson_indices: list[int]
+
+    @property
+    def label(self) -> str:
+        first, last = self.lesson_indices[0] + 1, self.lesson_indices[-1] + 1
+        lessons = f"L{first}" if first == last else f"L{first}-{last}"
+        return f"M{self.module_index + 1} {lessons}"
+
+    def local_path(self, path: str) -> Optional[str]:
+        """Translate a course-level issue path into this span's sub-course, or None if it is elsewhere."""
+        key = lesson_index(path)
+        if key is None:
+            return path
+        mi, li = key
+        if mi != self.module_index or li not in self.lesson_indices:
+            return None
+        return relocate_path(path, 0, self.lesson_indices.index(li))
+
+    def global_path(self, path: str) -> str:
+        """Inverse of local_path: map ``modules[0].lessons[k]...`` back to course indices."""
+        key = lesson_index(path)
+        if key is None or key[1] >= len(self.lesson_indices):
+            return path
+        return relocate_path(path, self.module_index, self.lesson_indices[key[1]])
+
+
+class LessonBatch(LessonSpan):
+    """A slice of the A1 course map sent to A2 as one request."""
+
+    course_map: dict[str, Any]
+
+    def split(self) -> list[LessonBatch]:
+        """Two halves of this batch (for a request whose output hit the length limit)."""
+        mod = self.course_map["modules"][0]
+        half = len(self.lesson_indices) // 2
+        return [
+            LessonBatch(
+                module_index=self.module_index,
+                lesson_indices=self.lesson_indices[part],
+                course_map={**self.course_map, "modules": [{**mod, "lessons": mod["lessons"][part]}]},
+            )
+            for part in (slice(None, half), slice(half, None))
+        ]
+
+
+class CourseChunk(LessonSpan):
+    """A single-module sub-course sent to A3/A4 as one request."""
+
+    course: Course
+
+    def split(self) -> list[CourseChunk]:
+        """Two halves of this chunk (for a request whose output hit the length limit)."""
+        half = len(self.lesson_indices) // 2
+        halves: list[CourseChunk] = []
+        for part in (slice(None, half), slice(half, None)):
+            sub_course = self.course.model_copy(deep=True)
+            sub_course.modules[0].lessons = sub_course.modules[0].lessons[part]
+            halves.append(
+                CourseChunk(module_index=self.module_index, lesson_indices=self.lesson_indices[part], course=sub_course)
+            )
+        return halves
+
+
+def course_map_batches(course_map: dict[str, Any], lessons_per_batch: int) -> list[LessonBatch]:
+    """Split an A1 course map into single-module sub-maps of at most ``lessons_per_batch`` lessons."""
+    size = max(1, lessons_per_batch)
+    batches: list[LessonBatch] = []
+    for mi, mod in enumerate(course_map.get("modules") or []):
+        lessons = mod.get("lessons") or []
+        for start in range(0, len(lessons), size):
+            indices = list(range(start, min(start + size, len(lessons))))
+            sub_map = {
+                "title": course_map.get("title"),
+                "modules": [{"title": mod.get("title"), "lessons": [lessons[i] for i in indices]}],
+            }
+            batches.append(LessonBatch(module_index=mi, lesson_indices=indices, course_map=sub_map))
+    return batches
+
+
+def course_chunks(
+    course: Course, lessons_per_chunk: int, only: Optional[set[tuple[int, int]]] = None
+) -> list[CourseChunk]:
+    """Split a course into single-module sub-courses of at most ``lessons_per_chunk`` lessons.
+
+    With ``only``, chunks cover just those (module, lesson) indices.
+    """
+    size = max(1, lessons_per_chunk)
+    chunks: list[CourseChunk] = []
+    for mi, mod in enumerate(course.modules):
+        selected = [li for li in range(len(mod.lessons)) if only is None or (mi, li) in only]
+        for start in range(0, len(selected), size):
+            indices = selected[start:start + size]
+            sub_course = Course(
+                title=course.title,
+                difficulty=course.difficulty,
+                modules=[Module(title=mod.title, lessons=[mod.lessons[i] for i in indices])],
+                source_summary=course.source_summary,
+            )
+            chunks.append(CourseChunk(module_index=mi, lesson_indices=indices, course=sub_course))
+    return chunks
+
+
+def lesson_batches(course: Course, keys: set[tuple[int, int]], lessons_per_batch: int) -> list[LessonBatch]:
+    """A2 batches that regenerate only the given lessons of an existing course from their title/SLO."""
+    batches: list[LessonBatch] = []
+    for chunk in course_chunks(course, lessons_per_batch, only=keys):
+        mod = chunk.course.modules[0]
+        sub_map = {
+            "title": course.title,
+            "modules": [{"title": mod.title, "lessons": [{"title": l.title, "slo": l.slo} for l in mod.lessons]}],
+        }
+        batches.append(
+            LessonBatch(module_index=chunk.module_index, lesson_indices=chunk.lesson_indices, course_map=sub_map)
+        )
+    return batches
+
+
+def chunk_lessons(result: Course) -> list[Lesson]:
+    return [lesson for mod in result.modules for lesson in mod.lessons]
+
+
+def join_split_results(results: list[Course]) -> Course:
+    """Recombine the outputs of split halves into one single-module result, lessons in order."""
+    joined = results[0].model_copy(deep=True)
+    joined.modules = joined.modules[:1]
+    joined.modules[0].lessons = [lesson for result in results for lesson in chunk_lessons(result)]
+    joined.thought_process = [t for result in results for t in result.thought_process or []] or None
+    return joined
+
+
+def splice_chunks(course: Course, chunks: list[LessonSpan], results: list[Course]) -> Course:
+    """Copy of ``course`` with each span's lessons replaced by the matching result's lessons.
+
+    Every result must hold exactly as many lessons as its span (callers check this).
+    """
+    spliced = course.model_copy(deep=True)
+    thoughts: list[str] = []
+    for chunk, result in zip(chunks, results):
+        lessons = chunk_lessons(result)
+        if len(lessons) != len(chunk.lesson_indices):
+            raise ValueError(f"{chunk.label}: expected {len(chunk.lesson_indices)} lessons, got {len(lessons)}.")
+        for li, lesson in zip(chunk.lesson_indices, lessons):
+            spliced.modules[chunk.module_index].lessons[li] = lesson
+        thoughts.extend(f"[{chunk.label}] {t}" for t in result.thought_process or [])
+    spliced.thought_process = thoughts or None
+    return spliced
+
+
+def _title_key(title: str) -> str:
+    return " ".join(title.casefold().split())
+
+
+def align_batch_lessons(batch: LessonBatch, result: Course) -> Optional[list[Lesson]]:
+    """The result's lessons in course-map order under the map's titles; None unless the counts match.
+
+    A result that only reorders the lessons is put back in map order (matched by title);
+    otherwise lessons are matched by position and renamed lessons get their planned title back.
+    """
+    planned = batch.course_map["modules"][0]["lessons"]
+    lessons = chunk_lessons(result)
+    if len(lessons) != len(planned):
+        return None
+    by_title = {_title_key(lesson.title): lesson for lesson in lessons}
+    keys = [_title_key(plan.get("title") or "") for plan in planned]
+    if len(by_title) == len(lessons) and set(keys) == set(by_title):
+        lessons = [by_title[key] for key in keys]
+    return [
+        lesson.model_copy(update={"title": plan["title"]}) if plan.get("title") else lesson
+        for plan, lesson in zip(planned, lessons)
+    ]
+
+
+def merge_lesson_batches(course_map: dict[str, Any], batches: list[LessonBatch], results: list[Course]) -> Course:
+    """Assemble per-batch A2 outputs into one Course, in A1 module/lesson order.
+
+    Every result must hold exactly its batch's lessons (see align_batch_lessons; callers check this).
+    """
+    modules = [
+        Module(title=mod.get("title") or f"Module {mi + 1}")
+        for mi, mod in enumerate(course_map.get("modules") or [])
+    ]
+    thoughts: list[str] = []
+    source_summary: Optional[str] = None
+    for batch, result in zip(batches, results):
+        # A batch covers one module; the model may still split it across several.
+        lessons = align_batch_lessons(batch, result)
+        if lessons is None:
+            raise ValueError(
+                f"{batch.label}: expected {len(batch.lesson_indices)} lessons, got {len(chunk_lessons(result))}."
+            )
+        modules[batch.module_index].lessons.extend(lessons)
+        thoughts.extend(f"[{batch.label}] {t}" for t in result.thought_process or [])
+        source_summary = source_summary or result.source_summary
+
+    title = course_map.get("title") or (results[0].title if results else Course().title)
+    return Course(
+        title=title,
+        modules=modules,
+        source_summary=source_summary,
+        thought_process=thoughts or None,
+    )
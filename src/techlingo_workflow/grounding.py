@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import numpy as np
+
+from .retrieval import tokenize
+
+# Shingle sizes scored against the source; longer shingles reward answers lifted from it.
+NGRAM_SIZES = (1, 2, 3)
+
+
+def shingles(tokens: list[str], n: int) -> list[str]:
+    return [" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+
+
+class GroundingIndex:
+    """Word n-gram shingles of the source text, built once per run.
+
+    A text's grounding score is the mean, over the shingle sizes it is long enough for, of
+    the fraction of its shingles that occur in the source (1.0: every word and phrase is
+    in the source; 0.0: none are). Scoring is vectorized over any number of texts.
+    """
+
+    def __init__(self, source_text: str) -> None:
+        tokens = tokenize(source_text)
+        self._ids: dict[str, int] = {}
+        for n in NGRAM_SIZES:
+            for shingle in shingles(tokens, n):
+                self._ids.setdefault(shingle, len(self._ids))
+        # Id len(self._ids) stands for "not in the source".
+        self._in_source = np.ones(len(self._ids) + 1, dtype=bool)
+        self._in_source[-1] = False
+
+    def scores(self, texts: list[str]) -> np.ndarray:
+        """Grounding score of each text (0.0 for texts without content words)."""
+        totals = np.zeros((len(NGRAM_SIZES), len(texts)))
+        hits = np.zeros((len(NGRAM_SIZES), len(texts)))
+        missing = len(self._ids)
+        token_lists = [tokenize(t) for t in texts]
+        for row, n in enumerate(NGRAM_SIZES):
+            owners: list[int] = []
+            ids: list[int] = []
+            for i, tokens in enumerate(token_lists):
+                grams = shingles(tokens, n)
+                owners.extend([i] * len(grams))
+                ids.extend(self._ids.get(g, missing) for g in grams)
+            if not ids:
+                continue
+            owner_arr = np.asarray(owners, dtype=np.intp)
+            totals[row] = np.bincount(owner_arr, minlength=len(texts))
+            hits[row] = np.bincount(owner_arr, weights=self._in_source[np.asarray(ids, dtype=np.intp)], minlength=len(texts))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            coverage = np.where(totals > 0, hits / totals, np.nan)
+            scored = (totals > 0).sum(axis=0)
+            return np.where(scored > 0, np.nansum(coverage, axis=0) / np.maximum(scored, 1), 0.0)
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from pydantic import BaseModel, Field
+
+from .io import ensure_dir
+
+R = TypeVar("R")
+
+DEFAULT_LATENCY_FILE = ".techlingo_cache/latency.json"
+
+# Log-spaced bucket upper bounds from 0.1 s to ~20 min (each 25% wider than the last).
+BUCKET_BOUNDS: list[float] = [round(0.1 * 1.25**i, 3) for i in range(43)]
+
+
+class LatencyHistogram(BaseModel):
+    """Counts of observed request latencies in BUCKET_BOUNDS buckets (last bucket is open-ended)."""
+
+    counts: list[int] = Field(default_factory=lambda: [0] * (len(BUCKET_BOUNDS) + 1))
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, seconds: float) -> None:
+        for i, bound in enumerate(BUCKET_BOUNDS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (0 < q < 1); None when empty."""
+        total = self.total
+        if not total:
+            return None
+        rank = math.ceil(q * total)
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else math.inf
+        return math.inf
+
+
+class LatencyTracker:
+    """Per-stage latency histograms, persisted so thresholds carry over between CLI runs.
+
+    ``observe`` only updates memory; ``flush`` writes new observations in one go (executors
+    call it once per stage) so requests never wait on file I/O.
+    """
+
+    def __init__(self, path: str | Path | None) -> None:
+        self.path = Path(path) if path else None
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self._dirty = False
+        if self.path is not None and self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                self.histograms = {k: LatencyHistogram.model_validate(v) for k, v in data.items()}
+            except (OSError, ValueError):
+                self.histograms = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        self.histograms.setdefault(stage, LatencyHistogram()).observe(seconds)
+        self._dirty = True
+
+    def hedge_delay(self, stage: str, percentile: float, min_samples: int) -> Optional[float]:
+        """Seconds after which a request of this stage is considered slow (None: not enough history)."""
+        hist = self.histograms.get(stage)
+        if hist is None or hist.total < min_samples:
+            return None
+        delay = hist.percentile(percentile)
+        return None if delay is None or math.isinf(delay) else delay
+
+    def flush(self) -> None:
+        """Persist the histograms if anything was observed since the last flush."""
+        if self.path is None or not self._dirty:
+            return
+        self._dirty = False
+        ensure_dir(self.path.parent)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({k: v.model_dump() for k, v in self.histograms.items()}), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+_tracker: Optional[LatencyTracker] = None
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Process-wide tracker stored at TECHLINGO_LATENCY_FILE (default: .techlingo_cache/latency.json)."""
+    global _tracker
+    if _tracker is None:
+        _tracker = LatencyTracker(os.getenv("TECHLINGO_LATENCY_FILE", DEFAULT_LATENCY_FILE))
+    return _tracker
+
+
+async def hedged(
+    attempt: Callable[[], Awaitable[R]],
+    delay: Optional[float],
+    on_hedge: Callable[[], None] | None = None,
+) -> R:
+    """Await ``attempt()``; if it is still running after ``delay`` seconds, start a second one.
+
+    The first attempt to succeed wins and the other is cancelled. If one fails, the other
+    is still awaited; the error is raised only when both fail.
+    """
+    primary = asyncio.ensure_future(attempt())
+    if delay is None:
+        return await primary
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+    except asyncio.CancelledError:
+        primary.cancel()
+        raise
+    if done:
+        return primary.result()
+
+    if on_hedge is not None:
+        on_hedge()
+    pending = {primary, asyncio.ensure_future(attempt())}
+    error: BaseException | None = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = error or task.exception()
+        assert error is not None
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
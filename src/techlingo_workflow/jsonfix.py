@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Callable
+
+# Only a fence wrapping the whole reply; fences inside string values (code samples) are content.
+_FENCE_RE = re.compile(r"\A\s*```[a-zA-Z0-9_-]*[ \t]*\n?(.*?)(?:\n?\s*```\s*)?\Z", re.DOTALL)
+# JSON string literals (with escapes); everything between them is structure.
+_STRING_RE = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_LINE_COMMENT_RE = re.compile(r"//[^\n]*")
+_BLOCK_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+_TRAILING_COMMA_RE = re.compile(r",(\s*[}\]])")
+_PY_LITERAL_RE = re.compile(r"\b(None|True|False)\b")
+_PY_LITERALS = {"None": "null", "True": "true", "False": "false"}
+
+
+def _outside_strings(text: str, fix: Callable[[str], str]) -> str:
+    """Apply ``fix`` to the parts of ``text`` that are not inside JSON string literals."""
+    out: list[str] = []
+    pos = 0
+    for m in _STRING_RE.finditer(text):
+        out.append(fix(text[pos:m.start()]))
+        out.append(m.group(0))
+        pos = m.end()
+    out.append(fix(text[pos:]))
+    return "".join(out)
+
+
+def _strip_fences(text: str) -> str:
+    m = _FENCE_RE.match(text)
+    return m.group(1).strip() if m else text
+
+
+def _extract_object(text: str) -> str:
+    # Drop prose around the payload: first opening bracket to the last matching closer.
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return text
+    start = min(starts)
+    end = text.rfind("}" if text[start] == "{" else "]")
+    return text[start:end + 1] if end > start else text[start:]
+
+
+def _remove_comments(text: str) -> str:
+    return _outside_strings(text, lambda s: _LINE_COMMENT_RE.sub("", _BLOCK_COMMENT_RE.sub("", s)))
+
+
+def _remove_trailing_commas(text: str) -> str:
+    return _outside_strings(text, lambda s: _TRAILING_COMMA_RE.sub(r"\1", s))
+
+
+def _python_literals(text: str) -> str:
+    return _outside_strings(text, lambda s: _PY_LITERAL_RE.sub(lambda m: _PY_LITERALS[m.group(1)], s))
+
+
+# Applied cumulatively, cheapest and most common first.
+FIXES: list[tuple[str, Callable[[str], str]]] = [
+    ("strip_fences", _strip_fences),
+    ("extract_object", _extract_object),
+    ("remove_comments", _remove_comments),
+    ("trailing_commas", _remove_trailing_commas),
+    ("python_literals", _python_literals),
+]
+
+
+def loads_tolerant(text: str) -> tuple[Any, list[str]]:
+    """Parse model output as JSON, repairing common slips locally.
+
+    Returns the data and the names of the fixes that changed the text (empty when it
+    parsed as-is). Raises the original json.JSONDecodeError if no fix makes it parse.
+    """
+    try:
+        return json.loads(text), []
+    except json.JSONDecodeError as e:
+        original = e
+
+    applied: list[str] = []
+    for name, fix in FIXES:
+        fixed = fix(text)
+        if fixed == text:
+            continue
+        text = fixed
+        applied.append(name)
+        try:
+            return json.loads(text), applied
+        except json.JSONDecodeError:
+            continue
+    try:
+        # Raw newlines/tabs inside string values.
+        return json.loads(text, strict=False), applied + ["control_characters"]
+    except json.JSONDecodeError:
+        raise original from None
+
+
+def is_unterminated(text: str) -> bool:
+    """True if ``text`` ends inside a string or with unclosed brackets (cut-off output)."""
+    depth = 0
+    in_string = escaped = False
+    for ch in _strip_fences(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+    return in_string or depth > 0
@@ -1,20 +1,84 @@
 from __future__ import annotations
 
+import asyncio
+import copy
+import functools
 import json
-from typing import Any, TypeVar
+import time
+from collections import Counter
+from typing import Any, Optional, TypeVar
 
+from openai import BadRequestError
 from pydantic import BaseModel, ValidationError
 
-from agent_framework import ChatAgent
-from agent_framework.openai import OpenAIChatClient
-
-from .prompts import SYSTEM_JSON_ONLY
+from .cache import ResponseCache, cache_key
+from .clients import get_chat_agent, request_slot
+from .hedging import get_latency_tracker, hedged
+from .jsonfix import is_unterminated, loads_tolerant
+from .patches import PatchError, apply_patch
+from .prompts import SYSTEM_JSON_ONLY, continuation_prompt
+from .scheduler import estimate_tokens, get_scheduler
 
 T = TypeVar("T", bound=BaseModel)
 
+# Continuation requests allowed for one length-truncated completion.
+MAX_CONTINUATIONS = 2
+
+
+class TruncatedOutputError(ValueError):
+    """The completion hit the output token limit and could not be completed by continuation.
+
+    Retrying the same request would fail the same way; callers should shrink the work
+    (e.g. fewer lessons per request) instead.
+    """
+
+    def __init__(self, message: str, partial_output: str) -> None:
+        super().__init__(message)
+        self.partial_output = partial_output
+
+# Requests currently in flight, by cache key. Concurrent identical requests (same model,
+# instructions and prompt) from any run await the first one instead of calling the model.
+_inflight: dict[str, asyncio.Future] = {}
+
+
+class _FlightAborted(Exception):
+    """The request a caller was waiting on was cancelled; the caller issues its own."""
+
+
+# (model_id, schema name) pairs whose structured-output request the provider rejected.
+_unsupported_formats: set[tuple[str, str]] = set()
+
+
+@functools.lru_cache(maxsize=None)
+def _schema_id(schema: type[BaseModel]) -> str:
+    return cache_key(schema.__name__, json.dumps(schema.model_json_schema(), sort_keys=True))
+
+
+def _finish_reason(result: Any) -> Optional[str]:
+    # AgentRunResponse.raw_representation is the ChatResponse carrying the finish reason.
+    raw = getattr(result, "raw_representation", None)
+    reason = getattr(raw, "finish_reason", None) or getattr(result, "finish_reason", None)
+    return getattr(reason, "value", reason)
+
+
+# Error codes a provider returns when it cannot honour the requested json_schema.
+_FORMAT_ERROR_CODES = frozenset({"invalid_json_schema", "response_format_unsupported"})
+
+
+def _format_rejected(e: Exception) -> bool:
+    # Agent Framework wraps the OpenAI error. Only a rejection of response_format itself
+    # qualifies; any other 400 (even one mentioning a "schema") is re-raised by the caller.
+    cause = e.__cause__ if isinstance(e.__cause__, BadRequestError) else e
+    if not isinstance(cause, BadRequestError):
+        return False
+    if cause.param == "response_format" or cause.code in _FORMAT_ERROR_CODES:
+        return True
+    # Providers that fill in neither field still name the parameter in the message.
+    return cause.param is None and "response_format" in str(cause).lower()
+
 
 class LLMClient:
-    """Thin wrapper around Microsoft Agent Framework OpenAIChatClient with JSON enforcement."""
+    """Thin wrapper around a pooled Microsoft Agent Framework ChatAgent with JSON enforcement."""
 
     def __init__(
         self,
@@ -22,27 +86,219 @@ class LLMClient:
         model_id: str,
         instructions: str = SYSTEM_JSON_ONLY,
         name: str = "TechlingoPipeline",
+        cache: ResponseCache | None = None,
+        refresh_cache: bool = False,
+        run_id: str = "default",
+        structured_output: bool = True,
+        stage: str = "",
+        hedge_percentile: float | None = None,
+        hedge_min_samples: int = 20,
     ) -> None:
-        self._agent = ChatAgent(
-            chat_client=OpenAIChatClient(model_id=model_id),
-            name=name,
-            instructions=instructions,
-        )
+        self.model_id = model_id
+        # Rate-limit queues are fair across runs (see scheduler.RateLimitScheduler).
+        self.run_id = run_id
+        self._instructions = instructions
+        self._cache = cache
+        # Write-only cache: a fresh reply replaces the stored one (A5 retries must not replay it).
+        self._refresh_cache = refresh_cache
+        # Send the target Pydantic schema as response_format when the provider supports it.
+        self._structured_output = structured_output
+        # With hedge_percentile set, latencies are recorded per stage and a request slower than
+        # that percentile of the stage's history gets a duplicate (see hedging.hedged).
+        self.stage = stage
+        self._hedge_percentile = hedge_percentile
+        self._hedge_min_samples = hedge_min_samples
+        # Per-client counters (cache_hits, cache_misses, ...) surfaced in the run log by executors.
+        self.stats: Counter[str] = Counter()
+        self._agent = get_chat_agent(model_id=model_id, instructions=instructions, name=name)
+
+    def _cache_key(self, prompt: str, schema: Optional[type[BaseModel]] = None) -> str:
+        if schema is None or not self._structured_output:
+            return cache_key(self.model_id, self._instructions, prompt)
+        return cache_key(self.model_id, self._instructions, prompt, _schema_id(schema))
 
-    async def run_json(self, prompt: str) -> dict[str, Any]:
-        result = await self._agent.run(prompt)
+    async def run_json(self, prompt: str, schema: Optional[type[BaseModel]] = None) -> dict[str, Any]:
+        """Run ``prompt`` and parse the JSON reply.
+
+        With ``schema``, the model is constrained to that Pydantic model via structured output
+        where the provider accepts it; callers still validate the result.
+        """
+        key = self._cache_key(prompt, schema)
+        if self._cache is not None and not self._refresh_cache:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                return cached
+            self.stats["cache_misses"] += 1
+
+        loop = asyncio.get_running_loop()
+        pending = _inflight.get(key)
+        if pending is not None and pending.get_loop() is loop:
+            self.stats["singleflight_saved"] += 1
+            try:
+                # Shielded: cancelling this caller must not cancel the shared request.
+                return copy.deepcopy(await asyncio.shield(pending))
+            except _FlightAborted:
+                return await self.run_json(prompt, schema)
+
+        flight = loop.create_future()
+        _inflight[key] = flight
+        try:
+            data = await self._request_hedged(prompt, schema)
+        except asyncio.CancelledError:
+            flight.set_exception(_FlightAborted())
+            flight.exception()  # followers re-issue; nothing else retrieves it
+            raise
+        except Exception as e:
+            flight.set_exception(e)
+            flight.exception()
+            raise
+        else:
+            # Followers copy from a private snapshot, so the leader may mutate its result.
+            flight.set_result(copy.deepcopy(data))
+        finally:
+            if _inflight.get(key) is flight:
+                del _inflight[key]
+
+        if self._cache is not None:
+            self._cache.put(key, data)
+        return data
+
+    async def _call(self, prompt: str, schema: Optional[type[BaseModel]]) -> tuple[str, Optional[str]]:
+        """One model request under the rate limits; returns the text and the finish reason."""
+        scheduler = get_scheduler(self.model_id)
+        ticket = await scheduler.acquire(self.run_id, estimate_tokens(self._instructions, prompt))
+        # Expected provider-side prefix cache reuse: instructions plus the prompt's stable segments.
+        self.stats["prompt_tokens"] += estimate_tokens(self._instructions, prompt, output_tokens=0)
+        self.stats["prompt_prefix_tokens"] += estimate_tokens(
+            self._instructions, prompt[:getattr(prompt, "cacheable_chars", 0)], output_tokens=0
+        )
+        if ticket.wait_seconds > 0.001:
+            self.stats["rate_limit_waits"] += 1
+            self.stats["rate_limit_wait_ms"] += int(ticket.wait_seconds * 1000)
+        try:
+            async with request_slot():
+                started = time.monotonic()
+                result = await self._run_agent(prompt, schema)
+                if self.stage and self._hedge_percentile:
+                    get_latency_tracker().observe(self.stage, time.monotonic() - started)
+        except BaseException:
+            # Errors and cancellations (the losing half of a hedged pair) must not keep
+            # their reservation counted against the TPM budget.
+            scheduler.refund(ticket)
+            raise
+        usage = getattr(result, "usage_details", None)
+        scheduler.settle(ticket, getattr(usage, "total_token_count", None))
         # Agent Framework returns a rich response; str() typically yields text content.
-        text = str(result).strip()
-        return json.loads(text)
+        return str(result).strip(), _finish_reason(result)
+
+    def _loads(self, text: str) -> dict[str, Any]:
+        # Fences, surrounding prose and syntax slips are repaired here instead of costing a
+        # model retry; run_and_parse only re-asks when this raises.
+        data, fixes = loads_tolerant(text)
+        if not isinstance(data, dict):
+            # Every caller expects an object; a bare list/scalar is as unusable as broken JSON.
+            raise json.JSONDecodeError(f"Expected a JSON object, got {type(data).__name__}", text, 0)
+        if fixes:
+            self.stats["json_recovered"] += 1
+            for fix in fixes:
+                self.stats[f"json_fix_{fix}"] += 1
+        return data
+
+    async def _request_hedged(self, prompt: str, schema: Optional[type[BaseModel]]) -> dict[str, Any]:
+        delay = None
+        if self._hedge_percentile and self.stage:
+            delay = get_latency_tracker().hedge_delay(self.stage, self._hedge_percentile, self._hedge_min_samples)
+        if delay is None:
+            return await self._request(prompt, schema)
+
+        async def _attempt() -> dict[str, Any]:
+            data = await self._request(prompt, schema)
+            if schema is not None:
+                schema.model_validate(data)  # only a schema-valid result may win
+            return data
+
+        def _on_hedge() -> None:
+            self.stats["hedged_requests"] += 1
+
+        return await hedged(_attempt, delay, _on_hedge)
+
+    async def _request(self, prompt: str, schema: Optional[type[BaseModel]]) -> dict[str, Any]:
+        text, finish_reason = await self._call(prompt, schema)
+        if finish_reason != "length":
+            try:
+                return self._loads(text)
+            except json.JSONDecodeError:
+                if not is_unterminated(text):
+                    raise
+
+        # Cut off by the output limit: ask for the rest instead of repeating the whole request.
+        self.stats["truncated_outputs"] += 1
+        for _ in range(MAX_CONTINUATIONS):
+            self.stats["continuations"] += 1
+            more, finish_reason = await self._call(continuation_prompt(prompt, text), None)
+            if more.startswith("```"):
+                more = more.partition("\n")[2]
+            text += more
+            if finish_reason == "length":
+                continue
+            try:
+                return self._loads(text)
+            except json.JSONDecodeError:
+                break
+        raise TruncatedOutputError(
+            f"Output truncated at the model's length limit ({len(text)} chars after continuation).", text
+        )
+
+    async def _run_agent(self, prompt: str, schema: Optional[type[BaseModel]]) -> Any:
+        if (
+            schema is None
+            or not self._structured_output
+            or (self.model_id, schema.__name__) in _unsupported_formats
+        ):
+            return await self._agent.run(prompt)
+        try:
+            result = await self._agent.run(prompt, response_format=schema)
+        except Exception as e:
+            if not _format_rejected(e):
+                raise
+            # Remember per model so later requests go straight to prompt-only JSON.
+            _unsupported_formats.add((self.model_id, schema.__name__))
+            self.stats["structured_output_fallbacks"] += 1
+            return await self._agent.run(prompt)
+        self.stats["structured_output"] += 1
+        return result
+
+    def forget(self, prompt: str, schema: Optional[type[BaseModel]] = None) -> None:
+        """Drop a cached response (e.g. it parsed as JSON but failed schema validation)."""
+        if self._cache is not None:
+            self._cache.discard(self._cache_key(prompt, schema))
+
+    async def run_patch(self, prompt: str, target: T) -> Optional[tuple[T, list[str]]]:
+        """Run a patch-mode prompt and apply the returned edits to ``target`` locally.
+
+        Returns the validated result and the model's thought_process, or None when the reply
+        does not parse, apply or validate (callers then fall back to a full-output prompt).
+        """
+        try:
+            data = await self.run_json(prompt)
+            patched, edits = apply_patch(target, data)
+        except (json.JSONDecodeError, PatchError):
+            self.forget(prompt)
+            self.stats["patch_fallbacks"] += 1
+            return None
+        self.stats["patch_edits"] += len(edits.edits)
+        return patched, edits.thought_process or []
 
     async def run_and_parse(self, prompt: str, model: type[T], *, max_retries: int = 2) -> T:
         last_err: Exception | None = None
         for attempt in range(max_retries + 1):
             try:
-                data = await self.run_json(prompt)
+                data = await self.run_json(prompt, model)
                 return model.model_validate(data)
             except (json.JSONDecodeError, ValidationError) as e:
                 last_err = e
+                self.forget(prompt, model)
                 # Retry with a simple "repair the JSON" instruction
                 prompt = (
                     "Your previous output was invalid JSON or did not match the required schema.\n"
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+from .cache import DEFAULT_MAX_AGE_DAYS, DEFAULT_MAX_MB, ResponseCache, cache_key
+from .config import A5_SUBSTAGES
+from .io import env_flag
+from .models import PipelineState
+
+DEFAULT_STAGE_CACHE_DIR = ".techlingo_cache/stages"
+
+# WorkflowConfig fields each executor's output depends on. Changing a field reruns the
+# stages that list it and everything downstream of them (their upstream artifact changes).
+STAGE_CONFIG_FIELDS: dict[str, tuple[str, ...]] = {
+    "a1_modularizer": ("modules_count", "min_lessons_total", "max_lessons_total", "include_reasoning"),
+    "a2_scaffolder": (
+        "exercises_per_lesson",
+        "flashcards_per_lesson",
+        "blooms_distribution",
+        "question_type_distribution",
+        "a2_lessons_per_batch",
+        "retrieval_top_k",
+        "fidelity_source_chars",
+        "include_reasoning",
+    ),
+    "a3_scenario_designer": ("blooms_distribution", "lessons_per_chunk", "patch_output", "include_reasoning"),
+    "a4_feedback_architect": ("a4_lessons_per_chunk", "patch_output", "include_reasoning"),
+    "a5_validator": (
+        "modules_count",
+        "min_lessons_total",
+        "max_lessons_total",
+        "exercises_per_lesson",
+        "flashcards_per_lesson",
+        "blooms_distribution",
+        "question_type_distribution",
+        "retrieval_top_k",
+        "fidelity_lessons_per_chunk",
+        "fidelity_source_chars",
+        "fidelity_prescreen",
+        "grounding_threshold",
+        "scoped_repair",
+        "patch_output",
+        "include_reasoning",
+    ),
+    "text_analyzer": ("include_reasoning",),
+    "text_reviewer": ("include_reasoning",),
+}
+
+# Modules that shape stage outputs (prompts, parsing, splitting, validation). CLI, server,
+# caching and scheduling code is left out so editing it keeps the memos.
+RECIPE_MODULES: tuple[str, ...] = (
+    "config.py",
+    "executors.py",
+    "fanout.py",
+    "grounding.py",
+    "jsonfix.py",
+    "llm.py",
+    "models.py",
+    "patches.py",
+    "prescreen.py",
+    "prompts.py",
+    "retrieval.py",
+    "serialize.py",
+    "validate.py",
+)
+
+_code_fingerprint: Optional[str] = None
+_stage_store: Optional[ResponseCache] = None
+
+
+def _fingerprint() -> str:
+    # Prompts and stage logic are part of the recipe: editing them invalidates every memo.
+    global _code_fingerprint
+    if _code_fingerprint is None:
+        h = hashlib.sha256()
+        for name in RECIPE_MODULES:
+            h.update(name.encode("utf-8"))
+            h.update((Path(__file__).parent / name).read_bytes())
+        _code_fingerprint = h.hexdigest()
+    return _code_fingerprint
+
+
+def _digest(value: Any) -> str:
+    if isinstance(value, BaseModel):
+        value = value.model_dump(mode="json")
+    text = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def get_stage_store() -> ResponseCache | None:
+    """Process-wide store of memoized stage outputs (None when disabled).
+
+    - TECHLINGO_STAGE_CACHE: set to 0/false to always execute every stage.
+    - TECHLINGO_STAGE_CACHE_DIR: store location (default: .techlingo_cache/stages).
+    Eviction follows TECHLINGO_CACHE_MAX_MB / TECHLINGO_CACHE_MAX_AGE_DAYS.
+    """
+    global _stage_store
+    if not env_flag("TECHLINGO_STAGE_CACHE", default=True):
+        return None
+    if _stage_store is None:
+        _stage_store = ResponseCache(
+            os.getenv("TECHLINGO_STAGE_CACHE_DIR", DEFAULT_STAGE_CACHE_DIR),
+            max_bytes=int(float(os.getenv("TECHLINGO_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024),
+            max_age_seconds=float(os.getenv("TECHLINGO_CACHE_MAX_AGE_DAYS", DEFAULT_MAX_AGE_DAYS)) * 86400,
+        )
+    return _stage_store
+
+
+class StageMemo:
+    """Memoized output of one executor, keyed on the hashes of everything it reads.
+
+    The key covers the source text, the stage's config fields, difficulty, title override,
+    the stage's model(s), the upstream artifact(s) and the package code. On an A5 retry the
+    memo is write-only: replaying an output that failed validation would fail the same way.
+    """
+
+    def __init__(self, state: PipelineState, stage: str, *upstream: Any) -> None:
+        config = state.config.model_dump(mode="json", include=set(STAGE_CONFIG_FIELDS[stage]))
+        model_stages = A5_SUBSTAGES if stage == "a5_validator" else (stage,)
+        self.stage = stage
+        self.key = cache_key(
+            stage,
+            _fingerprint(),
+            *(state.config.model_for(s, state.model_id) for s in model_stages),
+            state.difficulty.value,
+            state.override_title or "",
+            _digest(state.input_text),
+            _digest(config),
+            *(_digest(u) for u in upstream),
+        )
+        enabled = state.config.stage_memo and stage not in state.config.llm_cache_skip_stages
+        self._store = get_stage_store() if enabled else None
+        self._refresh = state.retry_count > 0
+
+    def get(self) -> Optional[Any]:
+        if self._store is None or self._refresh:
+            return None
+        return self._store.get(self.key)
+
+    def put(self, data: Any) -> None:
+        if self._store is not None:
+            self._store.put(self.key, data)
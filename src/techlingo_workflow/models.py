@@ -6,7 +6,10 @@ from datetime import datetime
 from enum import Enum
 from typing import Annotated, Any, Literal, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
+
+from .grounding import GroundingIndex
+from .retrieval import SourceIndex
 
 
 class BloomsLevel(str, Enum):
@@ -212,6 +215,27 @@ class PipelineState(BaseModel):
     config: WorkflowConfig = Field(default_factory=lambda: WorkflowConfig())
     override_title: Optional[str] = Field(default=None, description="Manual override for the output course/module title.")
     retry_count: int = Field(default=0, description="Number of times the workflow has looped back for self-correction.")
+    retry_lessons: Optional[list[tuple[int, int]]] = Field(
+        default=None,
+        description="(module, lesson) indices to regenerate on a scoped retry; None means regenerate the whole course.",
+    )
+    llm_stats: dict[str, int] = Field(default_factory=dict, description="Accumulated LLM counters for this run (cache hits/misses, ...).")
+
+    # Derived from input_text on first use; never serialized.
+    _source_index: Optional[SourceIndex] = PrivateAttr(default=None)
+    _grounding_index: Optional[GroundingIndex] = PrivateAttr(default=None)
+
+    def source_index(self) -> SourceIndex:
+        """BM25 index over the chunked source text, built once per run."""
+        if self._source_index is None:
+            self._source_index = SourceIndex.from_text(self.input_text)
+        return self._source_index
+
+    def grounding_index(self) -> GroundingIndex:
+        """N-gram grounding index over the source text, built once per run."""
+        if self._grounding_index is None:
+            self._grounding_index = GroundingIndex(self.input_text)
+        return self._grounding_index
 
 
 
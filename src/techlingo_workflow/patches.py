@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import copy
+import re
+from typing import Any, Literal, Optional, TypeVar
+
+from pydantic import BaseModel, Field, ValidationError
+
+M = TypeVar("M", bound=BaseModel)
+
+# One path step: a (dot-prefixed) field name or a [index].
+_STEP_RE = re.compile(r"\.?([A-Za-z_][A-Za-z0-9_]*)|\[(\d+)\]")
+
+
+class PatchError(ValueError):
+    """An edit list could not be applied, or the patched document failed schema validation."""
+
+
+class Edit(BaseModel):
+    op: Literal["set", "remove"] = "set"
+    path: str = Field(..., description='e.g. "modules[0].lessons[1].exercises[4].options[1].feedback"')
+    value: Any = None
+
+
+class EditList(BaseModel):
+    """Reply of a patch-mode prompt: the changes only, instead of the whole document."""
+
+    thought_process: Optional[list[str]] = None
+    edits: list[Edit] = Field(default_factory=list)
+
+
+def parse_path(path: str) -> list[str | int]:
+    """``"modules[2].lessons[0].title"`` -> ``["modules", 2, "lessons", 0, "title"]``."""
+    steps: list[str | int] = []
+    pos = 0
+    while pos < len(path):
+        m = _STEP_RE.match(path, pos)
+        if m is None or (pos == 0 and path.startswith(".")):
+            raise PatchError(f"Invalid edit path: {path!r}")
+        steps.append(m.group(1) if m.group(1) is not None else int(m.group(2)))
+        pos = m.end()
+    if not steps:
+        raise PatchError("Empty edit path.")
+    return steps
+
+
+def _child(node: Any, step: str | int, path: str) -> Any:
+    if isinstance(step, int):
+        if not isinstance(node, list) or step >= len(node):
+            raise PatchError(f"{path}: index {step} does not exist.")
+        return node[step]
+    if not isinstance(node, dict) or node.get(step) is None:
+        raise PatchError(f"{path}: field {step!r} does not exist.")
+    return node[step]
+
+
+def apply_edits(doc: dict[str, Any], edits: list[Edit]) -> dict[str, Any]:
+    """Apply ``edits`` in order to a copy of ``doc`` (a model dump).
+
+    ``set`` replaces a field or list item; setting index ``len(list)`` appends. ``remove``
+    deletes a list item or field, shifting later indices for the edits that follow.
+    """
+    doc = copy.deepcopy(doc)
+    for edit in edits:
+        *parents, last = parse_path(edit.path)
+        node: Any = doc
+        for step in parents:
+            node = _child(node, step, edit.path)
+        if isinstance(last, int):
+            if not isinstance(node, list):
+                raise PatchError(f"{edit.path}: parent is not a list.")
+            if edit.op == "remove":
+                _child(node, last, edit.path)
+                del node[last]
+            elif last < len(node):
+                node[last] = edit.value
+            elif last == len(node):
+                node.append(edit.value)
+            else:
+                raise PatchError(f"{edit.path}: index {last} is past the end of the list.")
+        else:
+            if not isinstance(node, dict):
+                raise PatchError(f"{edit.path}: parent is not an object.")
+            if edit.op == "remove":
+                node.pop(last, None)
+            else:
+                node[last] = edit.value
+    return doc
+
+
+def apply_patch(target: M, data: Any) -> tuple[M, EditList]:
+    """Apply a patch-mode reply to ``target`` and validate the result as ``type(target)``.
+
+    A reply that is a full document instead of an edit list is accepted if it validates.
+    Raises PatchError when the edits do not apply or the result is invalid.
+    """
+    model = type(target)
+    doc = target.model_dump(mode="json")
+    # A full document carries at least the target's non-empty collections (modules, exercises, ...).
+    collections = {k for k, v in doc.items() if isinstance(v, list) and v and k != "thought_process"}
+    try:
+        if isinstance(data, dict) and "edits" not in data and collections and collections <= data.keys():
+            thoughts = data.get("thought_process")
+            return model.model_validate(data), EditList(thought_process=thoughts if isinstance(thoughts, list) else None)
+        edit_list = EditList.model_validate(data)
+        patched = apply_edits(doc, edit_list.edits)
+        return model.model_validate(patched), edit_list
+    except ValidationError as e:
+        raise PatchError(f"Patched {model.__name__} is invalid: {e.error_count()} validation errors.") from e
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Iterator
+
+from pydantic import BaseModel, Field
+
+from .grounding import GroundingIndex
+from .models import Course, ValidationIssue
+
+# Deterministic versions of the source check's "formatting artifacts" and "meta-references"
+# criteria: rule name -> (kind, pattern). All rules run as one compiled alternation.
+# Patterns are anchored to the scraped shape (captions, lone labels, detached markers) so that
+# technical prose ("Docker image 1.2", "HTTP page 404", "arr [0]", "Table 3: Results" in a SQL
+# lesson) does not match. Hits are warnings: the items stay in the LLM check, which confirms them.
+RULES: dict[str, tuple[str, str]] = {
+    "expand_table": ("artifact", r"\b(?:expand|collapse) (?:table|all|section)\b"),
+    "click_here": ("artifact", r"\bclick (?:here|to (?:view|expand|enlarge|open))\b"),
+    "media_label": ("artifact", r"^\s*(?:image|figure|fig\.|slide) \d+(?!\.\d)[:.]"),
+    "note_label": ("artifact", r"^\s*(?:note|tip|warning|important):?\s*$"),
+    "citation_marker": ("artifact", r"(?<=[.,;:!?)\"'])\s?\[\d+\]|(?<=\s)\[\d+\](?=[.,;:!?]?\s*$)|\[citation needed\]"),
+    "markdown_residue": ("artifact", r"!\[[^\]]*\]\([^)]*\)|\]\(https?://|\|\s*-{3,}\s*\|"),
+    "according_to": (
+        "meta",
+        r"\baccording to (?:the|this) (?:text|document|passage|article|reading|source|material|section)\b",
+    ),
+    "as_described": (
+        "meta",
+        r"\bas (?:mentioned|described|stated|shown|explained|discussed|noted|outlined) "
+        r"(?:above|below|earlier|(?:in|by) the (?:text|document|passage|article|section|source|example|author))\b",
+    ),
+    "the_text_says": (
+        "meta",
+        r"\bthe (?:text|document|passage|article|author|reading) "
+        r"(?:says|states|mentions|describes|explains|notes|suggests|defines|lists)\b",
+    ),
+    "in_this_text": (
+        "meta",
+        r"\bin this (?:text|document|passage|article|reading)\b(?!\s+(?:field|box|file|editor|input))"
+        r"|\b(?:given|shown|described|mentioned|explained|discussed|presented|stated) in the "
+        r"(?:text|document|passage|article|reading)\b",
+    ),
+    "example_above": ("meta", r"\b(?:examples?|sections?|tables?|figures?|passages?) (?:above|below)\b(?!\s*[-+]?\d)"),
+}
+
+_RULES_RE = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, (_, pattern) in RULES.items()),
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# Labels and discriminators, not learner-facing prose.
+_NON_LEARNER_KEYS = frozenset({"blooms_level", "question_type", "type", "error_type", "placeholder"})
+
+
+def find_defects(text: str) -> list[tuple[str, str]]:
+    """(rule name, matched text) for every rule hit in ``text``, in one scan."""
+    return [(m.lastgroup or "", m.group(0)) for m in _RULES_RE.finditer(text)]
+
+
+def learner_texts(value: Any, path: str) -> Iterator[tuple[str, str]]:
+    """(path, text) for every learner-facing string in a dumped lesson/exercise/flashcard."""
+    if isinstance(value, str):
+        yield path, value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            if key not in _NON_LEARNER_KEYS:
+                yield from learner_texts(item, f"{path}.{key}")
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            yield from learner_texts(item, f"{path}[{i}]")
+
+
+# Negations are stopwords to the tokenizer, so "X cannot Y" would score like "X can Y".
+_NEGATION_RE = re.compile(r"\b(?:not|no|never|none|cannot|without)\b|n't\b", re.IGNORECASE)
+
+
+def answer_text(exercise: Any) -> str:
+    """What an exercise asserts as correct: correct options, statement, gap answers or ordered tokens."""
+    if hasattr(exercise, "options"):
+        return " ".join(o.text for o in exercise.options if o.is_correct)
+    if hasattr(exercise, "statement"):
+        return exercise.statement
+    if hasattr(exercise, "parts"):
+        return " ".join(a for p in exercise.parts if p.type == "gap" for a in p.accepted_answers)
+    return " ".join(getattr(exercise, "correct_order", []))
+
+
+def always_grounding_check(exercise: Any) -> bool:
+    """Items whose n-gram score says nothing about their correctness.
+
+    A false true/false statement is not asserted by the course, and a negated answer shares
+    its n-grams with the claim it contradicts.
+    """
+    if getattr(exercise, "correct_answer", True) is False:
+        return True
+    return _NEGATION_RE.search(answer_text(exercise)) is not None
+
+
+class LessonScreen(BaseModel):
+    """Pre-screen outcome for one lesson: rule hits plus the items the LLM must still ground.
+
+    Every exercise still goes to the LLM for the logic and integrity checks; only the
+    ``ground_exercises`` are checked against source passages. Flashcards have no other
+    check, so grounded ones are left out of the request.
+    """
+
+    issues: list[ValidationIssue] = Field(default_factory=list)
+    ground_exercises: list[int] = Field(default_factory=list)
+    review_flashcards: list[int] = Field(default_factory=list)
+    skipped: int = Field(0, description="Items exempted from the grounding check.")
+
+
+class Prescreen:
+    """Rule scan of learner-facing text, run before the LLM source-fidelity check.
+
+    Items (exercises, flashcards) with no rule hit whose answer text scores at least
+    ``threshold`` on the source's GroundingIndex are exempt from the LLM grounding check;
+    see LessonScreen for what still goes to the LLM.
+    """
+
+    def __init__(self, grounding: GroundingIndex, threshold: float) -> None:
+        self.grounding = grounding
+        self.threshold = threshold
+
+    def _scan(self, value: Any, path: str) -> list[ValidationIssue]:
+        issues: list[ValidationIssue] = []
+        for text_path, text in learner_texts(value, path):
+            for rule, match in find_defects(text):
+                kind = "Formatting artifact" if RULES[rule][0] == "artifact" else "Meta-reference"
+                issues.append(ValidationIssue(severity="warning", path=text_path, message=f"{kind} {match!r} ({rule})."))
+        return issues
+
+    def screen(self, course: Course, only: set[tuple[int, int]] | None = None) -> dict[tuple[int, int], LessonScreen]:
+        """Screen every lesson (or just ``only``); issue paths use course indices."""
+        keys = [
+            (mi, li)
+            for mi, mod in enumerate(course.modules)
+            for li in range(len(mod.lessons))
+            if only is None or (mi, li) in only
+        ]
+        # One vectorized grounding pass over every answer in scope.
+        owners: list[tuple[int, int, str, int]] = []
+        texts: list[str] = []
+        for mi, li in keys:
+            lesson = course.modules[mi].lessons[li]
+            for ei, ex in enumerate(lesson.exercises):
+                owners.append((mi, li, "exercises", ei))
+                texts.append(answer_text(ex))
+            for fi, fc in enumerate(lesson.flashcards):
+                owners.append((mi, li, "flashcards", fi))
+                texts.append(fc.back)
+        scores = self.grounding.scores(texts) if texts else []
+        ungrounded = {owner for owner, score in zip(owners, scores) if score < self.threshold}
+
+        screens: dict[tuple[int, int], LessonScreen] = {}
+        for mi, li in keys:
+            lesson = course.modules[mi].lessons[li]
+            base_path = f"modules[{mi}].lessons[{li}]"
+            screen = LessonScreen()
+            screen.issues.extend(self._scan(lesson.title, f"{base_path}.title"))
+            screen.issues.extend(self._scan(lesson.slo, f"{base_path}.slo"))
+            for ei, ex in enumerate(lesson.exercises):
+                issues = self._scan(ex.model_dump(mode="json"), f"{base_path}.exercises[{ei}]")
+                screen.issues.extend(issues)
+                if issues or always_grounding_check(ex) or (mi, li, "exercises", ei) in ungrounded:
+                    screen.ground_exercises.append(ei)
+            for fi, fc in enumerate(lesson.flashcards):
+                issues = self._scan(fc.model_dump(mode="json"), f"{base_path}.flashcards[{fi}]")
+                screen.issues.extend(issues)
+                if issues or (mi, li, "flashcards", fi) in ungrounded:
+                    screen.review_flashcards.append(fi)
+            screen.skipped = (
+                len(lesson.exercises) - len(screen.ground_exercises)
+                + len(lesson.flashcards) - len(screen.review_flashcards)
+            )
+            screens[(mi, li)] = screen
+        return screens
+
+
+_FLASHCARD_PATH_RE = re.compile(r"^(modules\[\d+\]\.lessons\[(\d+)\]\.flashcards)\[(\d+)\]")
+
+
+def review_subset(course: Course, screens: list[LessonScreen], *, grounding_only: bool = False) -> Course:
+    """Copy of a one-module chunk with the flashcards each lesson's screen left for review.
+
+    With ``grounding_only``, exercises are also narrowed to the ones that need grounding.
+    """
+    subset = course.model_copy(deep=True)
+    for lesson, screen in zip(subset.modules[0].lessons, screens):
+        if grounding_only:
+            lesson.exercises = [lesson.exercises[i] for i in screen.ground_exercises]
+        lesson.flashcards = [lesson.flashcards[i] for i in screen.review_flashcards]
+    return subset
+
+
+def grounded_paths(course: Course, screens: list[LessonScreen]) -> list[str]:
+    """Paths (in a review_subset of ``course``) of the exercises exempt from the grounding check."""
+    return [
+        f"modules[0].lessons[{k}].exercises[{i}]"
+        for k, (lesson, screen) in enumerate(zip(course.modules[0].lessons, screens))
+        for i in range(len(lesson.exercises))
+        if i not in screen.ground_exercises
+    ]
+
+
+def subset_path(path: str, screens: list[LessonScreen]) -> str:
+    """Map a flashcard path in a review_subset back to the flashcard's index in the full chunk."""
+    m = _FLASHCARD_PATH_RE.match(path)
+    if m is None or int(m.group(2)) >= len(screens):
+        return path
+    kept = screens[int(m.group(2))].review_flashcards
+    index = int(m.group(3))
+    if index >= len(kept):
+        return path
+    return f"{m.group(1)}[{kept[index]}]{path[m.end():]}"
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import re
+from enum import IntEnum
 from textwrap import dedent
 from typing import Any
 from .config import WorkflowConfig, DifficultyLevel
@@ -18,6 +20,48 @@ SYSTEM_JSON_ONLY = dedent(
 )
 
 
+# The optional reasoning trace: its schema field (single- or multi-line) and its instruction.
+_THOUGHT_FIELD_RE = re.compile(r'^[ \t]*"thought_process": \[.*?\],?[ \t]*\n', re.DOTALL | re.MULTILINE)
+_THOUGHT_RULE_RE = re.compile(r'^[ \t]*IMPORTANT: Start your JSON with a "thought_process" field[^\n]*\n?', re.MULTILINE)
+
+
+def strip_reasoning(text: str) -> str:
+    """Remove the "thought_process" field and instruction from prompt text (include_reasoning off)."""
+    return _THOUGHT_RULE_RE.sub("", _THOUGHT_FIELD_RE.sub("", text))
+
+
+class Stability(IntEnum):
+    """How often a prompt segment changes; assemble() orders segments by it."""
+
+    STAGE = 0  # task rules and output schema: fixed for a stage (given config and title)
+    RUN = 1  # difficulty contract, whole source text: fixed within a run
+    CALL = 2  # course/lesson JSON, issues, retrieved passages: differ per request
+
+
+class Prompt(str):
+    """Prompt text plus the length of its leading part that repeats across calls of the stage."""
+
+    cacheable_chars: int = 0
+
+
+def assemble(*segments: tuple[Stability, str], reasoning: bool = True) -> Prompt:
+    """Join prompt segments most stable first, so fanned-out and repeated calls share a prefix.
+
+    OpenAI-compatible providers cache a prompt prefix they have seen recently; anything
+    variable placed early breaks that. Empty segments are skipped; segments of equal
+    stability keep their order. ``cacheable_chars`` covers the STAGE and RUN segments.
+    With ``reasoning=False`` the thought_process request is stripped from the instructions.
+    """
+    if not reasoning:
+        segments = tuple((level, text if level == Stability.CALL else strip_reasoning(text)) for level, text in segments)
+    ordered = sorted((seg for seg in segments if seg[1].strip()), key=lambda seg: seg[0])
+    parts = [text.strip() for _, text in ordered]
+    prompt = Prompt("\n\n".join(parts) + "\n")
+    stable = [part for (level, _), part in zip(ordered, parts) if level < Stability.CALL]
+    prompt.cacheable_chars = sum(len(part) + 2 for part in stable)
+    return prompt
+
+
 def difficulty_contract(difficulty: DifficultyLevel) -> str:
     if difficulty == DifficultyLevel.novice:
         return dedent(
@@ -62,10 +106,39 @@ def difficulty_contract(difficulty: DifficultyLevel) -> str:
     )
 
 
+def edits_output_contract(document: str, *, example_path: str, reasoning: str, resize: bool = False) -> str:
+    """Patch-mode output instructions: path-addressed edits to the input ``document`` JSON."""
+    if resize:
+        resize_rule = (
+            '- To add a list item, set index len(list); to delete one, use {"op": "remove", "path": "..."}. '
+            "Edits apply in order, so later paths see earlier removals."
+        )
+    else:
+        resize_rule = "- Do not add or remove list items; only replace existing fields or items."
+    return dedent(
+        f"""\
+        Output: return ONLY your changes, as a list of edits to the input {document} JSON (do NOT return the full {document}):
+        {{
+          "thought_process": ["..."],
+          "edits": [
+            {{ "path": "{example_path}", "value": "..." }}
+          ]
+        }}
+        - "path" addresses the input {document} JSON: dot-separated field names and 0-based [index] list positions.
+        - "value" is the complete new JSON value at that path (string, object, list, ...).
+        - Use the narrowest path that covers a change; replace a whole exercise only when most of its fields change.
+        - Fields you do not change must NOT appear in the edits.
+        {resize_rule}
+
+        IMPORTANT: Start your JSON with a "thought_process" field (array of strings) explaining {reasoning}.
+        """
+    )
+
+
 def a1_modularizer_prompt(source_text: str, *, difficulty: DifficultyLevel, config: WorkflowConfig, override_title: str | None = None) -> str:
     target_title = override_title if override_title else "AI Core Capabilities and Responsibility"
     
-    return dedent(
+    prompt = dedent(
         f"""\
         {difficulty_contract(difficulty)}
 
@@ -108,6 +181,7 @@ def a1_modularizer_prompt(source_text: str, *, difficulty: DifficultyLevel, conf
         }}
         """
     )
+    return prompt if config.include_reasoning else strip_reasoning(prompt)
 
 
 def a2_scaffolder_prompt(
@@ -116,7 +190,8 @@ def a2_scaffolder_prompt(
     difficulty: DifficultyLevel, 
     config: WorkflowConfig, 
     override_title: str | None = None,
-    validation_issues: list[dict[str, Any]] | None = None
+    validation_issues: list[dict[str, Any]] | None = None,
+    source_passages: str | None = None,
 ) -> str:
     target_title = override_title if override_title else "AI Core Capabilities and Responsibility"
     blooms_reqs = "\n".join([f"- {k}: {v} exercises" for k, v in config.blooms_distribution.items()])
@@ -134,15 +209,12 @@ def a2_scaffolder_prompt(
         Refuse to generate the same broken content again.
         """)
 
-    return dedent(
-        f"""\
-        {difficulty_contract(difficulty)}
-
-        {feedback_section}
-
-        Input course map JSON:
-        {course_map_json}
+    source_section = ""
+    if source_passages:
+        source_section = f"Relevant source passages (the facts your exercises must be based on):\n{source_passages}\n"
 
+    task = dedent(
+        f"""\
         Task (A2 Scaffolder - Q&A Generator):
         For EACH lesson SLO, generate exactly {config.exercises_per_lesson} exercises with vertical progression using Bloom's Taxonomy:
         {blooms_reqs}
@@ -155,6 +227,7 @@ def a2_scaffolder_prompt(
 
 
         Constraints:
+        - Return exactly the lessons of the input map, in the same order and under the same titles.
         - Each lesson must include:
           - exercises: exactly {config.exercises_per_lesson} items, with this exact per-lesson mix:
         {type_reqs}
@@ -243,16 +316,34 @@ def a2_scaffolder_prompt(
         }}
         """
     )
+    return assemble(
+        (Stability.STAGE, task),
+        (Stability.RUN, difficulty_contract(difficulty)),
+        (Stability.CALL, feedback_section),
+        (Stability.CALL, source_section),
+        (Stability.CALL, f"Input course map JSON:\n{course_map_json}"),
+        reasoning=config.include_reasoning,
+    )
     
-def a3_scenario_designer_prompt(course_json: str, *, difficulty: DifficultyLevel, config: WorkflowConfig) -> str:
+def a3_scenario_designer_prompt(
+    course_json: str, *, difficulty: DifficultyLevel, config: WorkflowConfig, patch: bool = False
+) -> str:
     blooms_counts = "/".join([str(v) for v in config.blooms_distribution.values()])
-    return dedent(
-        f"""\
-        {difficulty_contract(difficulty)}
-
-        Input course JSON:
-        {course_json}
+    reasoning = "your decisions for the scenario updates"
+    if patch:
+        output_contract = edits_output_contract(
+            "course", example_path="modules[0].lessons[1].exercises[4].prompt", reasoning=reasoning
+        )
+    else:
+        output_contract = dedent(
+            f"""\
+            Output: return the FULL updated course JSON (same schema as input).
 
+            IMPORTANT: Start your JSON with a "thought_process" field (array of strings) explaining {reasoning}.
+            """
+        )
+    task = dedent(
+        f"""\
         Task (A3 Merrill’s Agent - Scenario Designer):
         Rewrite exercises to ensure contextual relevance and stylistic variety:
         
@@ -287,22 +378,35 @@ def a3_scenario_designer_prompt(course_json: str, *, difficulty: DifficultyLevel
         - Do not add or remove exercises.
         - Do not add or remove flashcards.
         - Keep the correct answer semantically correct.
-
-        Output: return the FULL updated course JSON (same schema as input).
-        
-        IMPORTANT: Start your JSON with a "thought_process" field (array of strings) explaining your decisions for the scenario updates.
         """
     )
+    return assemble(
+        (Stability.STAGE, task),
+        (Stability.STAGE, output_contract),
+        (Stability.RUN, difficulty_contract(difficulty)),
+        (Stability.CALL, f"Input course JSON:\n{course_json}"),
+        reasoning=config.include_reasoning,
+    )
 
 
-def a4_feedback_architect_prompt(course_json: str, *, difficulty: DifficultyLevel, config: WorkflowConfig) -> str:
-    return dedent(
-        f"""\
-        {difficulty_contract(difficulty)}
-
-        Input course JSON:
-        {course_json}
+def a4_feedback_architect_prompt(
+    course_json: str, *, difficulty: DifficultyLevel, config: WorkflowConfig, patch: bool = False
+) -> str:
+    reasoning = "your feedback generation strategy"
+    if patch:
+        output_contract = edits_output_contract(
+            "course", example_path="modules[0].lessons[1].exercises[4].options[1].feedback", reasoning=reasoning
+        )
+    else:
+        output_contract = dedent(
+            f"""\
+            Output: return the FULL updated course JSON.
 
+            IMPORTANT: Start your JSON with a "thought_process" field (array of strings) explaining {reasoning}.
+            """
+        )
+    task = dedent(
+        f"""\
         Task (A4 Feedback Architect - Instructional Coaching):
         You must populate all feedback fields for every exercise.
         
@@ -339,26 +443,25 @@ def a4_feedback_architect_prompt(course_json: str, *, difficulty: DifficultyLeve
         - Do not remove existing fields.
         - Keep feedback/rationale concise and learner-friendly.
         - Do not add or remove exercises or flashcards.
-
-        Output: return the FULL updated course JSON.
-        
-        IMPORTANT: Start your JSON with a "thought_process" field (array of strings) explaining your feedback generation strategy.
         """
     )
+    return assemble(
+        (Stability.STAGE, task),
+        (Stability.STAGE, output_contract),
+        (Stability.RUN, difficulty_contract(difficulty)),
+        (Stability.CALL, f"Input course JSON:\n{course_json}"),
+        reasoning=config.include_reasoning,
+    )
 
 
-def a5_source_check_prompt(course_json: str, source_text: str) -> str:
-    return dedent(
+def a5_source_check_prompt(
+    course_json: str, source_text: str, *, reasoning: bool = True, grounded: list[str] | None = None
+) -> str:
+    task = dedent(
         f"""\
         You are a strict Fact Checker and Editor.
         Your goal is to identify ALL quality issues: Hallucinations, Logical Flaws, Bad Formatting, and Broken Integrity.
 
-        Source Text:
-        {source_text}
-
-        Course Content:
-        {course_json}
-
         Task:
         Review every exercise and flag ANY of the following issues:
 
@@ -392,18 +495,42 @@ def a5_source_check_prompt(course_json: str, source_text: str) -> str:
         Return ONLY valid JSON. If no issues found, return {{ "issues": [] }}.
         """
     )
+    # Exercises pre-screened as grounded were matched against the source locally.
+    exempt = ""
+    if grounded:
+        exempt = (
+            "Already verified against the source text; skip check 1 (Hallucinations) for these and "
+            "apply checks 2-5 only:\n" + "\n".join(f"- {path}" for path in grounded)
+        )
+    return assemble(
+        (Stability.STAGE, task),
+        (Stability.CALL, f"Source Text:\n{source_text}" if source_text else ""),
+        (Stability.CALL, exempt),
+        (Stability.CALL, f"Course Content:\n{course_json}"),
+        reasoning=reasoning,
+    )
 
 
-def a5_repair_prompt(bad_course_json: str, issues_json: str, config: WorkflowConfig) -> str:
+def a5_repair_prompt(bad_course_json: str, issues_json: str, config: WorkflowConfig, *, patch: bool = False) -> str:
     blooms_reqs = ", ".join([f"{v} {k}" for k, v in config.blooms_distribution.items()])
     type_reqs = "\n".join([f"          - {k}: {v}" for k, v in config.question_type_distribution.items()])
+    reasoning = "the repairs you are making"
+    if patch:
+        output_contract = edits_output_contract(
+            "course", example_path="modules[0].lessons[1].exercises[4].options[1].rationale", reasoning=reasoning, resize=True
+        )
+    else:
+        output_contract = dedent(
+            f"""\
+            Return ONLY corrected JSON.
 
-    return dedent(
+            IMPORTANT: Start your JSON with a "thought_process" field (array of strings) explaining {reasoning}.
+            """
+        )
+
+    task = dedent(
         f"""\
         You must repair the course JSON to satisfy all constraints.
-        Return ONLY corrected JSON.
-        
-        IMPORTANT: Start your JSON with a "thought_process" field (array of strings) explaining the repairs you are making.
 
         Constraints to satisfy:
         - Exactly {config.modules_count} modules.
@@ -428,19 +555,83 @@ def a5_repair_prompt(bad_course_json: str, issues_json: str, config: WorkflowCon
             - `statement`: The core statement to judge (e.g., "The tool is appropriate.").
         - **Logic**: Ensure all questions and answers are logically valid and properly structured.
         - **Meta-References**: REMOVE all pointers to "the text", "the document", or "examples above". Rewrite as direct statements.
+        """
+    )
+    return assemble(
+        (Stability.STAGE, task),
+        (Stability.STAGE, output_contract),
+        (Stability.CALL, f"Validation issues:\n{issues_json}"),
+        (Stability.CALL, f"Current course JSON:\n{bad_course_json}"),
+        reasoning=config.include_reasoning,
+    )
 
-        Validation issues:
-        {issues_json}
-        
-        Current course JSON:
-        {bad_course_json}
+
+def a5_lesson_repair_prompt(
+    lesson_json: str,
+    issues_json: str,
+    config: WorkflowConfig,
+    *,
+    source_passages: str | None = None,
+    patch: bool = False,
+) -> str:
+    blooms_reqs = ", ".join([f"{v} {k}" for k, v in config.blooms_distribution.items()])
+    type_reqs = "\n".join([f"          - {k}: {v}" for k, v in config.question_type_distribution.items()])
+    reasoning = "the repairs you are making"
+    if patch:
+        output_contract = edits_output_contract(
+            "lesson", example_path="exercises[3].options[1].rationale", reasoning=reasoning, resize=True
+        )
+    else:
+        output_contract = dedent(
+            f"""\
+            Return ONLY the corrected lesson JSON (same schema as the input lesson: title, slo, exercises, flashcards).
+
+            IMPORTANT: Start your JSON with a "thought_process" field (array of strings) explaining {reasoning}.
+            """
+        )
+    source_section = ""
+    if source_passages:
+        source_section = f"Relevant source passages (fixes must stay faithful to these):\n{source_passages}\n"
+
+    task = dedent(
+        f"""\
+        You must repair ONE lesson of a course so that it satisfies all constraints.
+        Issue paths are relative to this lesson (e.g., "exercises[3].options[1].rationale").
+
+        Constraints to satisfy:
+        - Keep the lesson title and SLO unless an issue targets them.
+        - Exactly {config.exercises_per_lesson} exercises.
+        - Bloom distribution: {blooms_reqs}.
+        - Exercise type mix (exact counts within the {config.exercises_per_lesson} exercises):
+{type_reqs}
+        - Exactly {config.flashcards_per_lesson} flashcards.
+        - Every Applying and Analyzing/Evaluating exercise must be scenario-based (EXCEPT rearrange/fill_gaps).
+        - For scenario-based single_choice and multi_choice exercises: each incorrect option must include paired feedback (intrinsic + instructional).
+        - For single_choice and multi_choice exercises:
+          - ALL options must have a 'rationale' (2-3 sentences explaining why it is correct/incorrect).
+          - ALL incorrect options must have a 'better_fit' (1-2 sentences describing where it would be correct).
+        - For scenario-based true_false exercises: feedback_for_incorrect must be present (intrinsic + instructional).
+        - For fill_gaps: Ensure grammatical correctness, semantic coherence, and that context uniquely determines the answer.
+        - For rearrange: Ensure the final order forms a valid grammatical sentence (in existing language) or logical process step.
+        - **Formatting**: REMOVE all scraping artifacts (e.g., "Expand table", "Image 1", "click here").
+        - **Integrity**: TRUE/FALSE questions MUST be statements (declarative sentences), NOT instructions (e.g., "Choose the tool").
+        - **Meta-References**: REMOVE all pointers to "the text", "the document", or "examples above". Rewrite as direct statements.
+        - Leave exercises and flashcards that have no issues unchanged.
         """
     )
+    return assemble(
+        (Stability.STAGE, task),
+        (Stability.STAGE, output_contract),
+        (Stability.CALL, source_section),
+        (Stability.CALL, f"Validation issues:\n{issues_json}"),
+        (Stability.CALL, f"Current lesson JSON:\n{lesson_json}"),
+        reasoning=config.include_reasoning,
+    )
 
 
 
-def analyzer_prompt(source_text: str) -> str:
-    return dedent(
+def analyzer_prompt(source_text: str, *, reasoning: bool = True) -> str:
+    prompt = dedent(
         f"""\
         You are an expert Text Analyst and Linguist.
         Your goal is to break down the source text into its constituent parts to ensure absolutely NOTHING is missed.
@@ -527,10 +718,11 @@ def analyzer_prompt(source_text: str) -> str:
         pick the single closest difficulty level.
         """
     )
+    return prompt if reasoning else strip_reasoning(prompt)
 
 
-def reviewer_prompt(source_text: str, current_analysis_json: str) -> str:
-    return dedent(
+def reviewer_prompt(source_text: str, current_analysis_json: str, *, reasoning: bool = True) -> str:
+    prompt = dedent(
         f"""\
         You are a meticulous Content Reviewer.
         Your goal is to check if the previous analysis missed ANYTHING from the source text.
@@ -562,3 +754,15 @@ def reviewer_prompt(source_text: str, current_analysis_json: str) -> str:
         IMPORTANT: Start your JSON with a "thought_process" field (array of strings) detailing your review findings and what you fixed.
         """
     )
+    return prompt if reasoning else strip_reasoning(prompt)
+
+
+def continuation_prompt(original_prompt: str, partial_output: str) -> str:
+    # Plain concatenation (not an f-string inside dedent): both parts are multi-line.
+    return (
+        "Your previous response to the task below was cut off by the output length limit.\n"
+        "Continue the JSON from exactly the character where it stopped. Do NOT repeat any of it,\n"
+        "do NOT restart the object, and do NOT add fences or commentary.\n\n"
+        f"Task:\n{original_prompt}\n\n"
+        f"Output so far:\n{partial_output}"
+    )
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+PASSAGE_CHARS = 1200
+
+# Short function words that carry no topical signal.
+STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have how in into is it its of on or that the their "
+    "this to was what when which who why will with you your not do does".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _WORD_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def split_passages(text: str, max_chars: int = PASSAGE_CHARS) -> list[str]:
+    """Paragraph-based passages; paragraphs longer than max_chars are split on sentence boundaries."""
+    passages: list[str] = []
+    for para in _PARAGRAPH_RE.split(text):
+        para = para.strip()
+        if not para:
+            continue
+        if len(para) <= max_chars:
+            passages.append(para)
+            continue
+        current = ""
+        for sentence in _SENTENCE_END_RE.split(para):
+            if current and len(current) + len(sentence) + 1 > max_chars:
+                passages.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            passages.append(current)
+    return passages
+
+
+class SourceIndex:
+    """Okapi BM25 index over the passages of a source text, built once per run."""
+
+    def __init__(self, passages: list[str], *, k1: float = 1.5, b: float = 0.75) -> None:
+        self.passages = passages
+        self.k1 = k1
+        self.b = b
+        self._lengths: list[int] = []
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        for i, passage in enumerate(passages):
+            counts = Counter(tokenize(passage))
+            self._lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self._postings.setdefault(term, []).append((i, tf))
+        n = len(passages)
+        self._avg_length = (sum(self._lengths) / n) if n else 0.0
+        self._idf = {
+            term: math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for term, posting in self._postings.items()
+        }
+
+    @classmethod
+    def from_text(cls, text: str, *, passage_chars: int = PASSAGE_CHARS) -> SourceIndex:
+        return cls(split_passages(text, passage_chars))
+
+    def scores(self, query: str) -> list[float]:
+        scores = [0.0] * len(self.passages)
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self._postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / (self._avg_length or 1.0))
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query: str, k: int) -> list[int]:
+        """Indices of the top-k passages with a positive score, best first."""
+        scores = self.scores(query)
+        ranked = sorted((i for i, s in enumerate(scores) if s > 0), key=lambda i: scores[i], reverse=True)
+        return ranked[:k]
+
+    def relevant(self, query: str, *, k: int, max_chars: int) -> str:
+        """Top-k passages for ``query`` (at most max_chars), joined in source order.
+
+        Sources that already fit in max_chars are returned whole.
+        """
+        total = sum(len(p) for p in self.passages) + 2 * max(len(self.passages) - 1, 0)
+        if total <= max_chars:
+            return "\n\n".join(self.passages)
+        chosen: list[int] = []
+        used = 0
+        for i in self.search(query, k):
+            if used + len(self.passages[i]) > max_chars:
+                continue
+            chosen.append(i)
+            used += len(self.passages[i])
+        if not chosen:
+            return "\n\n".join(self.passages)[:max_chars]
+        return "\n\n".join(self.passages[i] for i in sorted(chosen))
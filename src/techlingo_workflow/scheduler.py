@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+# Rough prompt size estimate (characters per token) and the output allowance reserved up
+# front; the reservation is corrected with the provider's usage once the response arrives.
+CHARS_PER_TOKEN = 4
+DEFAULT_OUTPUT_TOKENS = 2000
+
+
+def estimate_tokens(*texts: str, output_tokens: int = DEFAULT_OUTPUT_TOKENS) -> int:
+    return sum(len(t) for t in texts) // CHARS_PER_TOKEN + output_tokens
+
+
+class Ticket(BaseModel):
+    """Grant for one LLM request; ``reserved_tokens`` is reconciled via RateLimitScheduler.settle
+    (or returned via RateLimitScheduler.refund when the request fails or is cancelled)."""
+
+    run_id: str
+    reserved_tokens: int
+    wait_seconds: float
+    queue_depth: int
+
+
+class _Waiter:
+    __slots__ = ("run_id", "tokens", "future", "enqueued_at", "queue_depth")
+
+    def __init__(self, run_id: str, tokens: int, future: asyncio.Future, queue_depth: int) -> None:
+        self.run_id = run_id
+        self.tokens = tokens
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.queue_depth = queue_depth
+
+
+class RateLimitScheduler:
+    """Requests-per-minute / tokens-per-minute budget shared by every run in the process.
+
+    Both budgets are token buckets refilled continuously (a full minute's budget at most).
+    Waiters queue per run and are granted round-robin across runs, so one run fanning out
+    dozens of requests cannot starve another. A limit of 0 disables that budget.
+    """
+
+    def __init__(self, *, rpm: int = 0, tpm: int = 0) -> None:
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._refilled_at = time.monotonic()
+        self._queues: OrderedDict[str, deque[_Waiter]] = OrderedDict()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.granted = 0
+        self.waited = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def stats(self) -> dict[str, Any]:
+        """Snapshot for logs and the server status endpoint."""
+        return {
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "queue_depth": self.queue_depth,
+            "queue_depth_by_run": {run_id: len(q) for run_id, q in self._queues.items()},
+            "granted": self.granted,
+            "waited": self.waited,
+            "avg_wait_seconds": round(self.total_wait_seconds / self.granted, 3) if self.granted else 0.0,
+            "max_wait_seconds": round(self.max_wait_seconds, 3),
+        }
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        if self.rpm:
+            self._requests = min(float(self.rpm), self._requests + elapsed * self.rpm / 60.0)
+        if self.tpm:
+            self._tokens = min(float(self.tpm), self._tokens + elapsed * self.tpm / 60.0)
+
+    def _shortfall_seconds(self, tokens: int) -> float:
+        """Seconds until a request of ``tokens`` fits both budgets (0 if it fits now)."""
+        wait = 0.0
+        if self.rpm and self._requests < 1:
+            wait = max(wait, (1 - self._requests) * 60.0 / self.rpm)
+        if self.tpm:
+            # A request larger than the whole budget only needs a full bucket.
+            needed = min(tokens, self.tpm)
+            if self._tokens < needed:
+                wait = max(wait, (needed - self._tokens) * 60.0 / self.tpm)
+        return wait
+
+    def _pump(self) -> None:
+        self._timer = None
+        self._refill()
+        while self._queues:
+            run_id, queue = next(iter(self._queues.items()))
+            waiter = queue[0]
+            if waiter.future.done():  # cancelled while queued
+                self._pop(run_id)
+                continue
+            wait = self._shortfall_seconds(waiter.tokens)
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._pump)
+                return
+            if self.rpm:
+                self._requests -= 1
+            if self.tpm:
+                self._tokens -= waiter.tokens
+            self._pop(run_id)
+            waiter.future.set_result(None)
+
+    def _pop(self, run_id: str) -> None:
+        queue = self._queues.pop(run_id)
+        queue.popleft()
+        if queue:
+            # Round-robin: the run goes to the back of the rotation.
+            self._queues[run_id] = queue
+
+    async def acquire(self, run_id: str, tokens: int) -> Ticket:
+        """Wait for this run's turn and budget for one request of about ``tokens`` tokens."""
+        if not self.rpm and not self.tpm:
+            return Ticket(run_id=run_id, reserved_tokens=tokens, wait_seconds=0.0, queue_depth=0)
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(run_id, tokens, loop.create_future(), self.queue_depth)
+        self._queues.setdefault(run_id, deque()).append(waiter)
+        if self._timer is None:
+            self._pump()
+        # A waiter cancelled while queued is dropped when it reaches the head of the queue.
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted, but cancelled before the caller got its ticket.
+                self._return_tokens(tokens)
+            raise
+
+        wait = time.monotonic() - waiter.enqueued_at
+        self.granted += 1
+        self.total_wait_seconds += wait
+        self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        if wait > 0.001:
+            self.waited += 1
+        return Ticket(run_id=run_id, reserved_tokens=tokens, wait_seconds=wait, queue_depth=waiter.queue_depth)
+
+    def settle(self, ticket: Ticket, used_tokens: int | None) -> None:
+        """Correct the token budget with the provider-reported usage of a granted request."""
+        if used_tokens is not None:
+            self._return_tokens(ticket.reserved_tokens - used_tokens)
+
+    def refund(self, ticket: Ticket) -> None:
+        """Return the reservation of a request that raised or was cancelled (e.g. a lost hedge)."""
+        self._return_tokens(ticket.reserved_tokens)
+
+    def _return_tokens(self, tokens: int) -> None:
+        if not self.tpm:
+            return
+        self._refill()
+        self._tokens = min(float(self.tpm), self._tokens + tokens)
+        if self._queues:
+            # Returned budget may let the head waiter go before its scheduled timer.
+            if self._timer is not None:
+                self._timer.cancel()
+            self._pump()
+
+
+_schedulers: dict[str, RateLimitScheduler] = {}
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_scheduler(model_id: str) -> RateLimitScheduler:
+    """Process-wide scheduler for a model (provider limits apply per model).
+
+    Budgets come from TECHLINGO_RPM and TECHLINGO_TPM (unset or 0: unlimited).
+    """
+    global _loop
+    loop = asyncio.get_running_loop()
+    if loop is not _loop:
+        # Queued futures and timers belong to one event loop.
+        _loop = loop
+        _schedulers.clear()
+    scheduler = _schedulers.get(model_id)
+    if scheduler is None:
+        scheduler = RateLimitScheduler(
+            rpm=int(os.getenv("TECHLINGO_RPM", 0)),
+            tpm=int(os.getenv("TECHLINGO_TPM", 0)),
+        )
+        _schedulers[model_id] = scheduler
+    return scheduler
+
+
+def scheduler_stats() -> dict[str, dict[str, Any]]:
+    """Queue depth and wait times of every active scheduler, by model id."""
+    return {model_id: s.stats() for model_id, s in _schedulers.items()}
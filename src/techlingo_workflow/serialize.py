@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+from collections import Counter
+from typing import Any, TypeVar
+
+from pydantic import BaseModel
+
+from .models import Course
+from .scheduler import CHARS_PER_TOKEN
+
+C = TypeVar("C", bound=Course)
+
+# Top-level bookkeeping fields no stage reads; the previous stage's thought_process is noise to the next.
+PROMPT_EXCLUDE: frozenset[str] = frozenset({"generated_at", "schema_version", "thought_process", "difficulty"})
+
+# Lesson fields a stage neither reads nor may change; they are left out of its prompts and
+# copied back from the input (see restore_omitted).
+STAGE_OMITTED_LESSON_FIELDS: dict[str, frozenset[str]] = {
+    "a3_scenario_designer": frozenset({"flashcards"}),
+    "a4_feedback_architect": frozenset({"flashcards"}),
+}
+
+
+def _drop_nulls(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _drop_nulls(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_drop_nulls(v) for v in value]
+    return value
+
+
+def _project(data: dict[str, Any], omitted: frozenset[str]) -> None:
+    for module in data.get("modules") or []:
+        for lesson in module.get("lessons") or []:
+            for field in omitted:
+                lesson.pop(field, None)
+
+
+def prompt_json(value: BaseModel | dict[str, Any] | list[Any], *, stage: str = "", stats: Counter[str] | None = None) -> str:
+    """Compact JSON of ``value`` for embedding in a prompt.
+
+    Drops nulls and PROMPT_EXCLUDE fields, omits the stage's STAGE_OMITTED_LESSON_FIELDS and
+    uses compact separators. With ``stats``, adds the estimated tokens saved versus the
+    indented full dump to ``stats["prompt_tokens_saved"]``.
+    """
+    data = value.model_dump(mode="json") if isinstance(value, BaseModel) else value
+    lean = _drop_nulls(data)
+    if isinstance(lean, dict):
+        lean = {k: v for k, v in lean.items() if k not in PROMPT_EXCLUDE}
+    omitted = STAGE_OMITTED_LESSON_FIELDS.get(stage)
+    if omitted and isinstance(lean, dict):
+        _project(lean, omitted)
+    text = json.dumps(lean, ensure_ascii=False, separators=(",", ":"))
+    if stats is not None:
+        full = json.dumps(data, ensure_ascii=False, indent=2)
+        stats["prompt_tokens_saved"] += max(0, len(full) - len(text)) // CHARS_PER_TOKEN
+    return text
+
+
+def restore_omitted(original: C, result: C, stage: str) -> C:
+    """Copy the fields omitted from ``stage``'s prompt back from ``original`` (same lesson layout)."""
+    omitted = STAGE_OMITTED_LESSON_FIELDS.get(stage)
+    if not omitted:
+        return result
+    for orig_module, module in zip(original.modules, result.modules):
+        for orig_lesson, lesson in zip(orig_module.lessons, module.lessons):
+            for field in omitted:
+                setattr(lesson, field, getattr(orig_lesson, field))
+    return result
@@ -4,14 +4,17 @@ import json
 from collections import Counter
 from typing import Any
 
+from pydantic import ValidationError
+
 from .config import WorkflowConfig
-from .llm import LLMClient
+from .llm import LLMClient, TruncatedOutputError
 from .models import (
     BloomsLevel,
     Course,
     Feedback,
     FillGapsExercise,
     Flashcard,
+    Lesson,
     MultiChoiceExercise,
     RearrangeExercise,
     SingleChoiceExercise,
@@ -19,343 +22,355 @@ from .models import (
     ValidationIssue,
     ValidationReport,
 )
-from .prompts import a5_repair_prompt
+from .fanout import CourseChunk, course_chunks, gather_bounded, lesson_index
+from .grounding import GroundingIndex
+from .prescreen import LessonScreen, Prescreen, grounded_paths, review_subset, subset_path
+from .prompts import a5_lesson_repair_prompt, a5_repair_prompt
+from .retrieval import SourceIndex
+from .serialize import prompt_json
 
 
 def _count_lessons(course: Course) -> int:
     return sum(len(m.lessons) for m in course.modules)
 
 
-def validate_course(course: Course, config: WorkflowConfig) -> ValidationReport:
+def validate_lesson(lesson: Lesson, config: WorkflowConfig, base_path: str) -> list[ValidationIssue]:
+    """Structural checks for one lesson; issue paths are prefixed with ``base_path``."""
     issues: list[ValidationIssue] = []
+    if not lesson.slo.strip():
+        issues.append(
+            ValidationIssue(severity="error", path=f"{base_path}.slo", message="SLO must be non-empty.")
+        )
 
-    # Module count
-    if len(course.modules) != config.modules_count:
+    # Flashcards checks (schema v2)
+    if len(lesson.flashcards) != config.flashcards_per_lesson:
         issues.append(
             ValidationIssue(
                 severity="error",
-                path="modules",
-                message=f"Expected exactly {config.modules_count} modules, got {len(course.modules)}.",
+                path=f"{base_path}.flashcards",
+                message=f"Expected exactly {config.flashcards_per_lesson} flashcards, got {len(lesson.flashcards)}.",
             )
         )
+    for fi, fc in enumerate(lesson.flashcards):
+        fc_path = f"{base_path}.flashcards[{fi}]"
+        # (Type annotation to help linters / IDEs; pydantic already validated model.)
+        _ = fc  # type: Flashcard
+        if not fc.front.strip():
+            issues.append(
+                ValidationIssue(severity="error", path=f"{fc_path}.front", message="Flashcard front must be non-empty.")
+            )
+        if not fc.back.strip():
+            issues.append(
+                ValidationIssue(severity="error", path=f"{fc_path}.back", message="Flashcard back must be non-empty.")
+            )
 
-    # Lesson count
-    lesson_count = _count_lessons(course)
-    if not (config.min_lessons_total <= lesson_count <= config.max_lessons_total):
+    if len(lesson.exercises) != config.exercises_per_lesson:
         issues.append(
             ValidationIssue(
                 severity="error",
-                path="modules[*].lessons",
-                message=f"Expected total lessons {config.min_lessons_total}–{config.max_lessons_total}, got {lesson_count}.",
+                path=f"{base_path}.exercises",
+                message=f"Expected exactly {config.exercises_per_lesson} exercises, got {len(lesson.exercises)}.",
             )
         )
+        # Skip deeper distribution checks if exercise count is wrong
+        return issues
 
-    # Per-lesson checks
-    for mi, mod in enumerate(course.modules):
-        for li, lesson in enumerate(mod.lessons):
-            base_path = f"modules[{mi}].lessons[{li}]"
-            if not lesson.slo.strip():
+    levels = [ex.blooms_level.value for ex in lesson.exercises]
+    dist = Counter(levels)
+    expected = config.blooms_distribution
+    if dist != expected:
+        issues.append(
+            ValidationIssue(
+                severity="error",
+                path=f"{base_path}.exercises[*].blooms_level",
+                message=f"Bloom distribution must be {expected}, got {dict(dist)}.",
+            )
+        )
+
+    # Exercise type mix (schema v2)
+    type_counts = Counter(ex.question_type for ex in lesson.exercises)
+    expected_types = Counter(config.question_type_distribution)
+    if type_counts != expected_types:
+        issues.append(
+            ValidationIssue(
+                severity="error",
+                path=f"{base_path}.exercises[*].question_type",
+                message=f"Exercise type mix must be {dict(expected_types)}, got {dict(type_counts)}.",
+            )
+        )
+
+    # Scenario + structure + feedback checks for Applying / Analyzing/Evaluating
+    for ei, ex in enumerate(lesson.exercises):
+        ex_path = f"{base_path}.exercises[{ei}]"
+        prompt_lc = ex.prompt.lower()
+        if ex.blooms_level in {BloomsLevel.applying, BloomsLevel.analyzing_evaluating}:
+            looks_like_scenario = any(
+                key in prompt_lc
+                for key in (
+                    "scenario",
+                    "you are",
+                    "as a ",
+                    "imagine you",
+                    "your team",
+                    "decision",
+                    "what should you do",
+                    "what do you do",
+                )
+            )
+            if not looks_like_scenario:
                 issues.append(
-                    ValidationIssue(severity="error", path=f"{base_path}.slo", message="SLO must be non-empty.")
+                    ValidationIssue(
+                        severity="warning",
+                        path=f"{ex_path}.prompt",
+                        message="Applying/Analyzing exercise should clearly read as a scenario with a decision point.",
+                    )
                 )
 
-            # Flashcards checks (schema v2)
-            if len(lesson.flashcards) != config.flashcards_per_lesson:
+        # Type-specific structural validation + feedback rules
+        if isinstance(ex, SingleChoiceExercise):
+            if len(ex.options) != 4:
+                issues.append(
+                    ValidationIssue(
+                        severity="error",
+                        path=f"{ex_path}.options",
+                        message=f"single_choice must have exactly 4 options, got {len(ex.options)}.",
+                    )
+                )
+            correct = [o for o in ex.options if o.is_correct]
+            if len(correct) != 1:
                 issues.append(
                     ValidationIssue(
                         severity="error",
-                        path=f"{base_path}.flashcards",
-                        message=f"Expected exactly {config.flashcards_per_lesson} flashcards, got {len(lesson.flashcards)}.",
+                        path=f"{ex_path}.options[*].is_correct",
+                        message=f"single_choice must have exactly 1 correct option, got {len(correct)}.",
                     )
                 )
-            for fi, fc in enumerate(lesson.flashcards):
-                fc_path = f"{base_path}.flashcards[{fi}]"
-                # (Type annotation to help linters / IDEs; pydantic already validated model.)
-                _ = fc  # type: Flashcard
-                if not fc.front.strip():
+            for oi, opt in enumerate(ex.options):
+                if not opt.text.strip():
                     issues.append(
-                        ValidationIssue(severity="error", path=f"{fc_path}.front", message="Flashcard front must be non-empty.")
+                        ValidationIssue(severity="error", path=f"{ex_path}.options[{oi}].text", message="Option text must be non-empty.")
                     )
-                if not fc.back.strip():
+                # New Rationale + Better Fit checks
+                if not opt.rationale or not opt.rationale.strip():
                     issues.append(
-                        ValidationIssue(severity="error", path=f"{fc_path}.back", message="Flashcard back must be non-empty.")
+                        ValidationIssue(
+                            severity="error",
+                            path=f"{ex_path}.options[{oi}].rationale",
+                            message="All options must include a rationale.",
+                        )
+                    )
+                if not opt.is_correct and (not opt.better_fit or not opt.better_fit.strip()):
+                     issues.append(
+                        ValidationIssue(
+                            severity="error",
+                            path=f"{ex_path}.options[{oi}].better_fit",
+                            message="Incorrect options must include a 'better_fit' explanation.",
+                        )
                     )
 
-            if len(lesson.exercises) != config.exercises_per_lesson:
-                issues.append(
-                    ValidationIssue(
-                        severity="error",
-                        path=f"{base_path}.exercises",
-                        message=f"Expected exactly {config.exercises_per_lesson} exercises, got {len(lesson.exercises)}.",
+                if not opt.is_correct and not (opt.error_type and opt.error_type.strip()):
+                    issues.append(
+                        ValidationIssue(
+                            severity="error",
+                            path=f"{ex_path}.options[{oi}].error_type",
+                            message="Incorrect options must include error_type.",
+                        )
+                    )
+                if (
+                    ex.blooms_level in {BloomsLevel.applying, BloomsLevel.analyzing_evaluating}
+                    and not opt.is_correct
+                    and not isinstance(opt.feedback, Feedback)
+                ):
+                    issues.append(
+                        ValidationIssue(
+                            severity="error",
+                            path=f"{ex_path}.options[{oi}].feedback",
+                            message="Scenario incorrect options must include paired feedback (intrinsic + instructional).",
+                        )
                     )
-                )
-                # Skip deeper distribution checks if exercise count is wrong
-                continue
 
-            levels = [ex.blooms_level.value for ex in lesson.exercises]
-            dist = Counter(levels)
-            expected = config.blooms_distribution
-            if dist != expected:
+        elif isinstance(ex, MultiChoiceExercise):
+            if len(ex.options) != 4:
                 issues.append(
                     ValidationIssue(
                         severity="error",
-                        path=f"{base_path}.exercises[*].blooms_level",
-                        message=f"Bloom distribution must be {expected}, got {dict(dist)}.",
+                        path=f"{ex_path}.options",
+                        message=f"multi_choice must have exactly 4 options, got {len(ex.options)}.",
                     )
                 )
-
-            # Exercise type mix (schema v2)
-            type_counts = Counter(ex.question_type for ex in lesson.exercises)
-            expected_types = Counter(config.question_type_distribution)
-            if type_counts != expected_types:
+            correct = [o for o in ex.options if o.is_correct]
+            if len(correct) not in {2, 3}:
                 issues.append(
                     ValidationIssue(
                         severity="error",
-                        path=f"{base_path}.exercises[*].question_type",
-                        message=f"Exercise type mix must be {dict(expected_types)}, got {dict(type_counts)}.",
+                        path=f"{ex_path}.options[*].is_correct",
+                        message=f"multi_choice must have 2 or 3 correct options, got {len(correct)}.",
                     )
                 )
-
-            # Scenario + structure + feedback checks for Applying / Analyzing/Evaluating
-            for ei, ex in enumerate(lesson.exercises):
-                ex_path = f"{base_path}.exercises[{ei}]"
-                prompt_lc = ex.prompt.lower()
-                if ex.blooms_level in {BloomsLevel.applying, BloomsLevel.analyzing_evaluating}:
-                    looks_like_scenario = any(
-                        key in prompt_lc
-                        for key in (
-                            "scenario",
-                            "you are",
-                            "as a ",
-                            "imagine you",
-                            "your team",
-                            "decision",
-                            "what should you do",
-                            "what do you do",
+            for oi, opt in enumerate(ex.options):
+                if not opt.text.strip():
+                    issues.append(
+                        ValidationIssue(severity="error", path=f"{ex_path}.options[{oi}].text", message="Option text must be non-empty.")
+                    )
+                # New Rationale + Better Fit checks
+                if not opt.rationale or not opt.rationale.strip():
+                    issues.append(
+                        ValidationIssue(
+                            severity="error",
+                            path=f"{ex_path}.options[{oi}].rationale",
+                            message="All options must include a rationale.",
                         )
                     )
-                    if not looks_like_scenario:
-                        issues.append(
-                            ValidationIssue(
-                                severity="warning",
-                                path=f"{ex_path}.prompt",
-                                message="Applying/Analyzing exercise should clearly read as a scenario with a decision point.",
-                            )
+                if not opt.is_correct and (not opt.better_fit or not opt.better_fit.strip()):
+                     issues.append(
+                        ValidationIssue(
+                            severity="error",
+                            path=f"{ex_path}.options[{oi}].better_fit",
+                            message="Incorrect options must include a 'better_fit' explanation.",
                         )
+                    )
 
-                # Type-specific structural validation + feedback rules
-                if isinstance(ex, SingleChoiceExercise):
-                    if len(ex.options) != 4:
-                        issues.append(
-                            ValidationIssue(
-                                severity="error",
-                                path=f"{ex_path}.options",
-                                message=f"single_choice must have exactly 4 options, got {len(ex.options)}.",
-                            )
+                if not opt.is_correct and not (opt.error_type and opt.error_type.strip()):
+                    issues.append(
+                        ValidationIssue(
+                            severity="error",
+                            path=f"{ex_path}.options[{oi}].error_type",
+                            message="Incorrect options must include error_type.",
                         )
-                    correct = [o for o in ex.options if o.is_correct]
-                    if len(correct) != 1:
-                        issues.append(
-                            ValidationIssue(
-                                severity="error",
-                                path=f"{ex_path}.options[*].is_correct",
-                                message=f"single_choice must have exactly 1 correct option, got {len(correct)}.",
-                            )
+                    )
+                if (
+                    ex.blooms_level in {BloomsLevel.applying, BloomsLevel.analyzing_evaluating}
+                    and not opt.is_correct
+                    and not isinstance(opt.feedback, Feedback)
+                ):
+                    issues.append(
+                        ValidationIssue(
+                            severity="error",
+                            path=f"{ex_path}.options[{oi}].feedback",
+                            message="Scenario incorrect options must include paired feedback (intrinsic + instructional).",
                         )
-                    for oi, opt in enumerate(ex.options):
-                        if not opt.text.strip():
-                            issues.append(
-                                ValidationIssue(severity="error", path=f"{ex_path}.options[{oi}].text", message="Option text must be non-empty.")
-                            )
-                        # New Rationale + Better Fit checks
-                        if not opt.rationale or not opt.rationale.strip():
-                            issues.append(
-                                ValidationIssue(
-                                    severity="error",
-                                    path=f"{ex_path}.options[{oi}].rationale",
-                                    message="All options must include a rationale.",
-                                )
-                            )
-                        if not opt.is_correct and (not opt.better_fit or not opt.better_fit.strip()):
-                             issues.append(
-                                ValidationIssue(
-                                    severity="error",
-                                    path=f"{ex_path}.options[{oi}].better_fit",
-                                    message="Incorrect options must include a 'better_fit' explanation.",
-                                )
-                            )
+                    )
 
-                        if not opt.is_correct and not (opt.error_type and opt.error_type.strip()):
-                            issues.append(
-                                ValidationIssue(
-                                    severity="error",
-                                    path=f"{ex_path}.options[{oi}].error_type",
-                                    message="Incorrect options must include error_type.",
-                                )
-                            )
-                        if (
-                            ex.blooms_level in {BloomsLevel.applying, BloomsLevel.analyzing_evaluating}
-                            and not opt.is_correct
-                            and not isinstance(opt.feedback, Feedback)
-                        ):
-                            issues.append(
-                                ValidationIssue(
-                                    severity="error",
-                                    path=f"{ex_path}.options[{oi}].feedback",
-                                    message="Scenario incorrect options must include paired feedback (intrinsic + instructional).",
-                                )
-                            )
+        elif isinstance(ex, TrueFalseExercise):
+            if not ex.statement.strip():
+                issues.append(
+                    ValidationIssue(severity="error", path=f"{ex_path}.statement", message="true_false.statement must be non-empty.")
+                )
+            if (
+                ex.blooms_level in {BloomsLevel.applying, BloomsLevel.analyzing_evaluating}
+                and not isinstance(ex.feedback_for_incorrect, Feedback)
+            ):
+                issues.append(
+                    ValidationIssue(
+                        severity="error",
+                        path=f"{ex_path}.feedback_for_incorrect",
+                        message="Scenario true/false must include feedback_for_incorrect (intrinsic + instructional).",
+                    )
+                )
 
-                elif isinstance(ex, MultiChoiceExercise):
-                    if len(ex.options) != 4:
+        elif isinstance(ex, FillGapsExercise):
+            gap_count = sum(1 for p in ex.parts if getattr(p, "type", None) == "gap")
+            if gap_count < 1:
+                issues.append(
+                    ValidationIssue(
+                        severity="error",
+                        path=f"{ex_path}.parts",
+                        message="fill_gaps must include at least 1 gap part.",
+                    )
+                )
+            for pi, part in enumerate(ex.parts):
+                if getattr(part, "type", None) == "text":
+                    if not part.text.strip():
                         issues.append(
                             ValidationIssue(
                                 severity="error",
-                                path=f"{ex_path}.options",
-                                message=f"multi_choice must have exactly 4 options, got {len(ex.options)}.",
+                                path=f"{ex_path}.parts[{pi}].text",
+                                message="fill_gaps text parts must be non-empty.",
                             )
                         )
-                    correct = [o for o in ex.options if o.is_correct]
-                    if len(correct) not in {2, 3}:
+                elif getattr(part, "type", None) == "gap":
+                    if not part.accepted_answers or not all(a.strip() for a in part.accepted_answers):
                         issues.append(
                             ValidationIssue(
                                 severity="error",
-                                path=f"{ex_path}.options[*].is_correct",
-                                message=f"multi_choice must have 2 or 3 correct options, got {len(correct)}.",
+                                path=f"{ex_path}.parts[{pi}].accepted_answers",
+                                message="fill_gaps gap parts must include non-empty accepted_answers.",
                             )
                         )
-                    for oi, opt in enumerate(ex.options):
-                        if not opt.text.strip():
-                            issues.append(
-                                ValidationIssue(severity="error", path=f"{ex_path}.options[{oi}].text", message="Option text must be non-empty.")
-                            )
-                        # New Rationale + Better Fit checks
-                        if not opt.rationale or not opt.rationale.strip():
-                            issues.append(
-                                ValidationIssue(
-                                    severity="error",
-                                    path=f"{ex_path}.options[{oi}].rationale",
-                                    message="All options must include a rationale.",
-                                )
-                            )
-                        if not opt.is_correct and (not opt.better_fit or not opt.better_fit.strip()):
-                             issues.append(
-                                ValidationIssue(
-                                    severity="error",
-                                    path=f"{ex_path}.options[{oi}].better_fit",
-                                    message="Incorrect options must include a 'better_fit' explanation.",
-                                )
-                            )
 
-                        if not opt.is_correct and not (opt.error_type and opt.error_type.strip()):
-                            issues.append(
-                                ValidationIssue(
-                                    severity="error",
-                                    path=f"{ex_path}.options[{oi}].error_type",
-                                    message="Incorrect options must include error_type.",
-                                )
-                            )
-                        if (
-                            ex.blooms_level in {BloomsLevel.applying, BloomsLevel.analyzing_evaluating}
-                            and not opt.is_correct
-                            and not isinstance(opt.feedback, Feedback)
-                        ):
-                            issues.append(
-                                ValidationIssue(
-                                    severity="error",
-                                    path=f"{ex_path}.options[{oi}].feedback",
-                                    message="Scenario incorrect options must include paired feedback (intrinsic + instructional).",
-                                )
-                            )
+        elif isinstance(ex, RearrangeExercise):
+            if len(ex.word_bank) < 2:
+                issues.append(
+                    ValidationIssue(
+                        severity="error",
+                        path=f"{ex_path}.word_bank",
+                        message="rearrange.word_bank must contain at least 2 tokens.",
+                    )
+                )
+            if len(ex.correct_order) < 2:
+                issues.append(
+                    ValidationIssue(
+                        severity="error",
+                        path=f"{ex_path}.correct_order",
+                        message="rearrange.correct_order must contain at least 2 tokens.",
+                    )
+                )
+            if any(not t.strip() for t in ex.word_bank):
+                issues.append(
+                    ValidationIssue(
+                        severity="error",
+                        path=f"{ex_path}.word_bank",
+                        message="rearrange.word_bank tokens must be non-empty.",
+                    )
+                )
+            if any(not t.strip() for t in ex.correct_order):
+                issues.append(
+                    ValidationIssue(
+                        severity="error",
+                        path=f"{ex_path}.correct_order",
+                        message="rearrange.correct_order tokens must be non-empty.",
+                    )
+                )
+            if Counter(ex.word_bank) != Counter(ex.correct_order):
+                issues.append(
+                    ValidationIssue(
+                        severity="error",
+                        path=f"{ex_path}.correct_order",
+                        message="rearrange.correct_order must use the same tokens (multiset) as word_bank.",
+                    )
+                )
 
-                elif isinstance(ex, TrueFalseExercise):
-                    if not ex.statement.strip():
-                        issues.append(
-                            ValidationIssue(severity="error", path=f"{ex_path}.statement", message="true_false.statement must be non-empty.")
-                        )
-                    if (
-                        ex.blooms_level in {BloomsLevel.applying, BloomsLevel.analyzing_evaluating}
-                        and not isinstance(ex.feedback_for_incorrect, Feedback)
-                    ):
-                        issues.append(
-                            ValidationIssue(
-                                severity="error",
-                                path=f"{ex_path}.feedback_for_incorrect",
-                                message="Scenario true/false must include feedback_for_incorrect (intrinsic + instructional).",
-                            )
-                        )
+    return issues
 
-                elif isinstance(ex, FillGapsExercise):
-                    gap_count = sum(1 for p in ex.parts if getattr(p, "type", None) == "gap")
-                    if gap_count < 1:
-                        issues.append(
-                            ValidationIssue(
-                                severity="error",
-                                path=f"{ex_path}.parts",
-                                message="fill_gaps must include at least 1 gap part.",
-                            )
-                        )
-                    for pi, part in enumerate(ex.parts):
-                        if getattr(part, "type", None) == "text":
-                            if not part.text.strip():
-                                issues.append(
-                                    ValidationIssue(
-                                        severity="error",
-                                        path=f"{ex_path}.parts[{pi}].text",
-                                        message="fill_gaps text parts must be non-empty.",
-                                    )
-                                )
-                        elif getattr(part, "type", None) == "gap":
-                            if not part.accepted_answers or not all(a.strip() for a in part.accepted_answers):
-                                issues.append(
-                                    ValidationIssue(
-                                        severity="error",
-                                        path=f"{ex_path}.parts[{pi}].accepted_answers",
-                                        message="fill_gaps gap parts must include non-empty accepted_answers.",
-                                    )
-                                )
-
-                elif isinstance(ex, RearrangeExercise):
-                    if len(ex.word_bank) < 2:
-                        issues.append(
-                            ValidationIssue(
-                                severity="error",
-                                path=f"{ex_path}.word_bank",
-                                message="rearrange.word_bank must contain at least 2 tokens.",
-                            )
-                        )
-                    if len(ex.correct_order) < 2:
-                        issues.append(
-                            ValidationIssue(
-                                severity="error",
-                                path=f"{ex_path}.correct_order",
-                                message="rearrange.correct_order must contain at least 2 tokens.",
-                            )
-                        )
-                    if any(not t.strip() for t in ex.word_bank):
-                        issues.append(
-                            ValidationIssue(
-                                severity="error",
-                                path=f"{ex_path}.word_bank",
-                                message="rearrange.word_bank tokens must be non-empty.",
-                            )
-                        )
-                    if any(not t.strip() for t in ex.correct_order):
-                        issues.append(
-                            ValidationIssue(
-                                severity="error",
-                                path=f"{ex_path}.correct_order",
-                                message="rearrange.correct_order tokens must be non-empty.",
-                            )
-                        )
-                    if Counter(ex.word_bank) != Counter(ex.correct_order):
-                        issues.append(
-                            ValidationIssue(
-                                severity="error",
-                                path=f"{ex_path}.correct_order",
-                                message="rearrange.correct_order must use the same tokens (multiset) as word_bank.",
-                            )
-                        )
+
+def validate_course(course: Course, config: WorkflowConfig) -> ValidationReport:
+    issues: list[ValidationIssue] = []
+
+    # Module count
+    if len(course.modules) != config.modules_count:
+        issues.append(
+            ValidationIssue(
+                severity="error",
+                path="modules",
+                message=f"Expected exactly {config.modules_count} modules, got {len(course.modules)}.",
+            )
+        )
+
+    # Lesson count
+    lesson_count = _count_lessons(course)
+    if not (config.min_lessons_total <= lesson_count <= config.max_lessons_total):
+        issues.append(
+            ValidationIssue(
+                severity="error",
+                path="modules[*].lessons",
+                message=f"Expected total lessons {config.min_lessons_total}–{config.max_lessons_total}, got {lesson_count}.",
+            )
+        )
+
+    # Per-lesson checks
+    for mi, mod in enumerate(course.modules):
+        for li, lesson in enumerate(mod.lessons):
+            issues.extend(validate_lesson(lesson, config, f"modules[{mi}].lessons[{li}]"))
 
     counts: dict[str, Any] = {
         "modules": len(course.modules),
@@ -366,40 +381,245 @@ def validate_course(course: Course, config: WorkflowConfig) -> ValidationReport:
     return ValidationReport(ok=ok, issues=issues, counts=counts, repaired=False)
 
 
-async def check_source_fidelity(course: Course, source_text: str, llm: LLMClient) -> list[ValidationIssue]:
+def _fidelity_issues(data: dict[str, Any]) -> list[ValidationIssue]:
+    return [
+        ValidationIssue(severity="error", path=i.get("path", "unknown"), message=i.get("message", "Source fidelity issue"))
+        for i in data.get("issues", [])
+    ]
+
+
+def _lesson_query_text(lesson: Lesson) -> str:
+    """Learner-facing text of a lesson, used to retrieve the relevant source passages."""
+    parts = [lesson.title, lesson.slo]
+    for ex in lesson.exercises:
+        parts.append(ex.prompt)
+        parts.extend(o.text for o in getattr(ex, "options", []))
+        parts.append(getattr(ex, "statement", ""))
+        parts.extend(getattr(ex, "correct_order", []))
+    parts.extend(f"{fc.front} {fc.back}" for fc in lesson.flashcards)
+    return "\n".join(parts)
+
+
+def _course_query_text(course: Course) -> str:
+    return "\n".join(
+        f"{mod.title}\n{_lesson_query_text(lesson)}" for mod in course.modules for lesson in mod.lessons
+    )
+
+
+async def check_source_fidelity(
+    course: Course,
+    source_text: str,
+    llm: LLMClient,
+    *,
+    only: set[tuple[int, int]] | None = None,
+    source_index: SourceIndex | None = None,
+    top_k: int = 6,
+    lessons_per_chunk: int = 1,
+    source_chars: int = 6000,
+    concurrency: int = 4,
+    reasoning: bool = True,
+    prescreen: bool = True,
+    grounding_index: GroundingIndex | None = None,
+    grounding_threshold: float = 0.8,
+) -> list[ValidationIssue]:
+    """LLM fact check of the course against the source text, one request per lesson chunk.
+
+    Each chunk is paired with only its top-k source passages (at most ``source_chars``),
+    and chunks run concurrently. With ``only``, just those (module, lesson) subtrees are
+    checked. With ``prescreen``, artifacts and meta-references are flagged locally (as warnings), and
+    items that are clean and score at least ``grounding_threshold`` on the n-gram grounding
+    index skip the grounding check: exercises stay in the request for the logic/integrity
+    checks, flashcards are dropped, and source passages are retrieved only for the rest (a
+    chunk with nothing left makes no request). Returned paths use course indices.
+    """
     from .prompts import a5_source_check_prompt
 
-    # For very large texts, we might need chunking, but for this MVP we send it whole.
-    # We truncate if strictly necessary, but better to rely on modern context windows.
-    course_json = course.model_dump_json(indent=2)
-    
-    # We expect a JSON object with a list of issues
+    index = source_index or SourceIndex.from_text(source_text)
+    screens: dict[tuple[int, int], LessonScreen] = {}
+    if prescreen:
+        screener = Prescreen(grounding_index or GroundingIndex(source_text), grounding_threshold)
+        screens = screener.screen(course, only)
+        llm.stats["grounding_checks_skipped"] += sum(s.skipped for s in screens.values())
+        llm.stats["prescreen_issues"] += sum(len(s.issues) for s in screens.values())
+
+    async def _check(chunk: CourseChunk) -> list[ValidationIssue]:
+        target = query = chunk.course
+        chunk_screens = [screens[(chunk.module_index, li)] for li in chunk.lesson_indices] if screens else []
+        issues = [issue for s in chunk_screens for issue in s.issues]
+        exempt: list[str] = []
+        if chunk_screens:
+            target = review_subset(chunk.course, chunk_screens)
+            if not any(lesson.exercises or lesson.flashcards for lesson in target.modules[0].lessons):
+                llm.stats["fidelity_requests_skipped"] += 1
+                return issues
+            query = review_subset(chunk.course, chunk_screens, grounding_only=True)
+            exempt = grounded_paths(target, chunk_screens)
+        try:
+            needs_source = any(lesson.exercises or lesson.flashcards for lesson in query.modules[0].lessons)
+            source_slice = (
+                index.relevant(_course_query_text(query), k=top_k, max_chars=source_chars) if needs_source else ""
+            )
+            data = await llm.run_json(a5_source_check_prompt(
+                prompt_json(target, stats=llm.stats), source_slice, reasoning=reasoning, grounded=exempt
+            ))
+        except Exception as e:
+            # Fallback: if source check fails (e.g. LLM error), we warn but don't block
+            return issues + [
+                ValidationIssue(
+                    severity="warning",
+                    path=f"modules[{chunk.module_index}].lessons[{chunk.lesson_indices[0]}]",
+                    message=f"Source fidelity check failed to run for {chunk.label}: {str(e)}",
+                )
+            ]
+        for issue in _fidelity_issues(data):
+            local = subset_path(issue.path, chunk_screens) if chunk_screens else issue.path
+            issue.path = chunk.global_path(local)
+            issues.append(issue)
+        return issues
+
+    chunks = course_chunks(course, lessons_per_chunk, only=only)
+    results = await gather_bounded((_check(c) for c in chunks), concurrency)
+    return [issue for issues in results for issue in issues]
+
+
+def _fidelity_options(config: WorkflowConfig) -> dict[str, Any]:
+    return {
+        "top_k": config.retrieval_top_k,
+        "lessons_per_chunk": config.fidelity_lessons_per_chunk,
+        "source_chars": config.fidelity_source_chars,
+        "concurrency": config.llm_concurrency,
+        "reasoning": config.include_reasoning,
+        "prescreen": config.fidelity_prescreen,
+        "grounding_threshold": config.grounding_threshold,
+    }
+
+
+def _lesson_scope(report: ValidationReport) -> set[tuple[int, int]] | None:
+    """Lessons holding the report's errors, or None if any error is course-level."""
+    keys = [lesson_index(i.path) for i in report.issues if i.severity == "error"]
+    if not keys or any(k is None for k in keys):
+        return None
+    return set(keys)
+
+
+async def _repair_lesson(
+    course: Course,
+    key: tuple[int, int],
+    report: ValidationReport,
+    llm: LLMClient,
+    config: WorkflowConfig,
+    source_index: SourceIndex | None,
+) -> tuple[Lesson, list[str]]:
+    mi, li = key
+    lesson = course.modules[mi].lessons[li]
+    base_path = f"modules[{mi}].lessons[{li}]"
+    local_issues = [
+        {**i.model_dump(), "path": i.path[len(base_path):].lstrip(".") or "lesson"}
+        for i in report.issues
+        if lesson_index(i.path) == key
+    ]
+    source_passages = None
+    if source_index is not None:
+        source_passages = source_index.relevant(
+            _lesson_query_text(lesson), k=config.retrieval_top_k, max_chars=config.fidelity_source_chars
+        )
+    lesson_json = prompt_json(lesson, stats=llm.stats)
+    issues_json = prompt_json(local_issues, stats=llm.stats)
+    label = f"[M{mi + 1} L{li + 1}]"
+    if config.patch_output:
+        patch_prompt = a5_lesson_repair_prompt(
+            lesson_json, issues_json, config, source_passages=source_passages, patch=True
+        )
+        try:
+            patched = await llm.run_patch(patch_prompt, lesson)
+        except TruncatedOutputError:
+            patched = None
+        if patched is not None:
+            repaired, thoughts = patched
+            return repaired, [f"{label} {t}" for t in thoughts]
+    prompt = a5_lesson_repair_prompt(lesson_json, issues_json, config, source_passages=source_passages)
     try:
-        data = await llm.run_json(a5_source_check_prompt(course_json, source_text))
-        raw_issues = data.get("issues", [])
-        return [
-            ValidationIssue(severity="error", path=i.get("path", "unknown"), message=i.get("message", "Source fidelity issue"))
-            for i in raw_issues
-        ]
-    except Exception as e:
-        # Fallback: if source check fails (e.g. LLM error), we warn but don't block
-        return [
-            ValidationIssue(
-                severity="warning",
-                path="global",
-                message=f"Source fidelity check failed to run: {str(e)}",
+        data = await llm.run_json(prompt, Lesson)
+        thoughts = data.pop("thought_process", None) or []
+        return Lesson.model_validate(data), [f"{label} {t}" for t in thoughts]
+    except (json.JSONDecodeError, ValidationError, TruncatedOutputError) as e:
+        # Keep the original lesson; its issues stay in the report.
+        llm.forget(prompt, Lesson)
+        return lesson, [f"{label} repair failed: {type(e).__name__}"]
+
+
+async def _repair_lessons(
+    course: Course,
+    keys: set[tuple[int, int]],
+    report: ValidationReport,
+    llm: LLMClient,
+    config: WorkflowConfig,
+    source_text: str | None,
+    source_index: SourceIndex | None,
+    grounding_index: GroundingIndex | None,
+    check_llm: LLMClient,
+) -> tuple[Course, ValidationReport]:
+    """Repair only the given lessons (in parallel), splice them back and re-validate those subtrees."""
+    ordered = sorted(keys)
+    results = await gather_bounded(
+        (_repair_lesson(course, key, report, llm, config, source_index) for key in ordered), config.llm_concurrency
+    )
+    repaired = course.model_copy(deep=True)
+    thoughts: list[str] = []
+    for (mi, li), (lesson, lesson_thoughts) in zip(ordered, results):
+        repaired.modules[mi].lessons[li] = lesson
+        thoughts.extend(lesson_thoughts)
+    repaired.thought_process = thoughts or None
+
+    # Issues outside the repaired lessons are still valid (lesson count/structure is unchanged).
+    issues = [i for i in report.issues if lesson_index(i.path) not in keys]
+    for mi, li in ordered:
+        issues.extend(validate_lesson(repaired.modules[mi].lessons[li], config, f"modules[{mi}].lessons[{li}]"))
+    if source_text:
+        issues.extend(
+            await check_source_fidelity(
+                repaired,
+                source_text,
+                check_llm,
+                only=keys,
+                source_index=source_index,
+                grounding_index=grounding_index,
+                **_fidelity_options(config),
             )
-        ]
+        )
+    ok = not any(i.severity == "error" for i in issues)
+    return repaired, ValidationReport(ok=ok, issues=issues, counts=report.counts, repaired=False)
 
 
 async def repair_course_if_needed(
-    course: Course, llm: LLMClient, config: WorkflowConfig, *, max_repairs: int = 1, source_text: str | None = None
+    course: Course,
+    llm: LLMClient,
+    config: WorkflowConfig,
+    *,
+    max_repairs: int = 1,
+    source_text: str | None = None,
+    source_index: SourceIndex | None = None,
+    grounding_index: GroundingIndex | None = None,
+    check_llm: LLMClient | None = None,
 ) -> tuple[Course, ValidationReport]:
+    """Validate, run the source-fidelity check (on ``check_llm``, default ``llm``) and repair with ``llm``."""
+    check_llm = check_llm or llm
     report = validate_course(course, config)
+    if source_text and source_index is None:
+        source_index = SourceIndex.from_text(source_text)
+    if source_text and grounding_index is None and config.fidelity_prescreen:
+        grounding_index = GroundingIndex(source_text)
     
     # Run source fidelity check if source_text is provided
     if source_text:
-        source_issues = await check_source_fidelity(course, source_text, llm)
+        source_issues = await check_source_fidelity(
+            course,
+            source_text,
+            check_llm,
+            source_index=source_index,
+            grounding_index=grounding_index,
+            **_fidelity_options(config),
+        )
         report.issues.extend(source_issues)
         if any(i.severity == "error" for i in source_issues):
             report.ok = False
@@ -409,17 +629,54 @@ async def repair_course_if_needed(
 
     repaired = course
     for _ in range(max_repairs):
-        issues_json = json.dumps([i.model_dump() for i in report.issues], ensure_ascii=False, indent=2)
-        course_json = repaired.model_dump_json(indent=2)
-        repaired_data = await llm.run_json(a5_repair_prompt(course_json, issues_json, config))
-        repaired = Course.model_validate(repaired_data)
+        # Lesson-scoped repair when every error sits inside a lesson: cost scales with the defects.
+        scope = _lesson_scope(report) if config.scoped_repair else None
+        if scope is not None:
+            repaired, report = await _repair_lessons(
+                repaired, scope, report, llm, config, source_text, source_index, grounding_index, check_llm
+            )
+            if report.ok:
+                report.repaired = True
+                return repaired, report
+            continue
+
+        issues_json = prompt_json([i.model_dump() for i in report.issues], stats=llm.stats)
+        course_json = prompt_json(repaired, stats=llm.stats)
+        patched = None
+        if config.patch_output:
+            try:
+                patched = await llm.run_patch(a5_repair_prompt(course_json, issues_json, config, patch=True), repaired)
+            except TruncatedOutputError:
+                pass
+        if patched is not None:
+            repaired, thoughts = patched
+            repaired.thought_process = thoughts or None
+        else:
+            prompt = a5_repair_prompt(course_json, issues_json, config)
+            try:
+                repaired_data = await llm.run_json(prompt, Course)
+            except TruncatedOutputError:
+                # The whole course does not fit in one completion; leave it to the A5 loop-back.
+                break
+            try:
+                repaired = Course.model_validate(repaired_data)
+            except ValidationError:
+                llm.forget(prompt, Course)
+                raise
         
         # Re-validate structure
         report = validate_course(repaired, config)
         
         # Re-validate source fidelity (optional: can be expensive, but needed for strictness)
         if source_text:
-            source_issues = await check_source_fidelity(repaired, source_text, llm)
+            source_issues = await check_source_fidelity(
+                repaired,
+                source_text,
+                check_llm,
+                source_index=source_index,
+                grounding_index=grounding_index,
+                **_fidelity_options(config),
+            )
             report.issues.extend(source_issues)
             if any(i.severity == "error" for i in source_issues):
                 report.ok = False
@@ -429,5 +686,3 @@ async def repair_course_if_needed(
             return repaired, report
 
     return repaired, report
-
-
@@ -16,18 +16,26 @@ def should_loop(state: PipelineState) -> bool:
     # Loop back if validation report exists and has errors
     return state.validation_report is not None and not state.validation_report.ok
 
+def _techlingo_builder(start_executor=a1_modularizer) -> WorkflowBuilder:
+    builder = WorkflowBuilder().set_start_executor(start_executor)
+    # A1 is only part of the graph when the run starts there (resumed runs begin later).
+    if start_executor is a1_modularizer:
+        builder = builder.add_edge(a1_modularizer, a2_scaffolder)
+    return (
+        builder
+        .add_edge(a2_scaffolder, a3_scenario_designer)
+        .add_edge(a3_scenario_designer, a4_feedback_architect)
+        .add_edge(a4_feedback_architect, a5_validator)
+        .add_edge(a5_validator, a2_scaffolder, condition=should_loop)
+    )
+
+_TECHLINGO_EXECUTORS = {
+    e.id: e for e in (a1_modularizer, a2_scaffolder, a3_scenario_designer, a4_feedback_architect, a5_validator)
+}
+
 # Pre-build workflows using function references
 # We ignore the warning because we purposely build these once at module level
-_techlingo_workflow = (
-    WorkflowBuilder()
-    .set_start_executor(a1_modularizer)
-    .add_edge(a1_modularizer, a2_scaffolder)
-    .add_edge(a2_scaffolder, a3_scenario_designer)
-    .add_edge(a3_scenario_designer, a4_feedback_architect)
-    .add_edge(a4_feedback_architect, a5_validator)
-    .add_edge(a5_validator, a2_scaffolder, condition=should_loop)
-    .build()
-)
+_techlingo_workflow = _techlingo_builder().build()
 
 _analysis_workflow = (
     WorkflowBuilder()
@@ -36,9 +44,15 @@ _analysis_workflow = (
     .build()
 )
 
-def build_techlingo_workflow():
-    """Returns the pre-built Techlingo workflow."""
-    return _techlingo_workflow
+def build_techlingo_workflow(start_executor_id: str | None = None, *, fresh: bool = False):
+    """Returns the pre-built Techlingo workflow, or a new one starting at the given executor (resume).
+
+    A workflow instance runs one state at a time; pass fresh=True to get a separate
+    instance for runs that execute concurrently in the same process (batch mode).
+    """
+    if start_executor_id is None and not fresh:
+        return _techlingo_workflow
+    return _techlingo_builder(_TECHLINGO_EXECUTORS[start_executor_id or a1_modularizer.id]).build()
 
 def build_analysis_workflow():
     """Returns the pre-built Analysis workflow."""
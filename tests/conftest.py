@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Same as main.py: import the package from src/ without an editable install.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
@@ -0,0 +1,23 @@
+import os
+import time
+
+from techlingo_workflow.cache import ResponseCache, cache_key
+
+
+def test_put_prunes_only_once_over_the_byte_budget(tmp_path, monkeypatch):
+    cache = ResponseCache(tmp_path, max_bytes=450)
+    scans = []
+    prune = cache.prune
+    monkeypatch.setattr(cache, "prune", lambda: (scans.append(1), prune()))
+
+    keys = [cache_key(str(i)) for i in range(4)]
+    for i, key in enumerate(keys):
+        cache.put(key, "x" * 100)
+        # Distinct mtimes, so eviction order does not depend on the filesystem's resolution.
+        stamp = time.time() - 100 + i
+        os.utime(cache._path(key), (stamp, stamp))
+
+    # One scan on the first write, one when the running count passes max_bytes.
+    assert len(scans) == 2
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[3]) == "x" * 100
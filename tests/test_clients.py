@@ -0,0 +1,14 @@
+from techlingo_workflow import clients
+
+
+def test_pooled_client_uses_openai_settings(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("OPENAI_BASE_URL", "http://proxy.local/v1")
+    monkeypatch.setenv("OPENAI_ORG_ID", "org-test")
+    monkeypatch.setattr(clients, "_openai_client", None)
+    monkeypatch.setattr(clients, "_loop", None)
+
+    client = clients.get_openai_client()
+    assert client.api_key == "sk-test"
+    assert str(client.base_url) == "http://proxy.local/v1/"
+    assert client.organization == "org-test"
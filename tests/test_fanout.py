@@ -0,0 +1,92 @@
+import pytest
+
+from techlingo_workflow.fanout import (
+    LessonBatch,
+    align_batch_lessons,
+    course_chunks,
+    course_map_batches,
+    join_split_results,
+    lesson_index,
+    merge_lesson_batches,
+    splice_chunks,
+)
+from techlingo_workflow.models import Course, Lesson, Module
+
+COURSE_MAP = {
+    "title": "Course",
+    "modules": [
+        {"title": "M1", "lessons": [{"title": f"A{i}", "slo": f"slo A{i}"} for i in range(3)]},
+        {"title": "M2", "lessons": [{"title": f"B{i}", "slo": f"slo B{i}"} for i in range(2)]},
+    ],
+}
+
+
+def _result(*titles, module="M"):
+    return Course(title="Course", modules=[Module(title=module, lessons=[Lesson(title=t, slo="s") for t in titles])])
+
+
+def _titles(course):
+    return [[lesson.title for lesson in mod.lessons] for mod in course.modules]
+
+
+def test_course_map_batches_stay_within_a_module():
+    batches = course_map_batches(COURSE_MAP, 2)
+    assert [(b.module_index, b.lesson_indices) for b in batches] == [(0, [0, 1]), (0, [2]), (1, [0, 1])]
+    assert [b.label for b in batches] == ["M1 L1-2", "M1 L3", "M2 L1-2"]
+
+
+def test_merge_lesson_batches_keeps_map_order():
+    batches = course_map_batches(COURSE_MAP, 2)
+    results = [_result("A0", "A1"), _result("A2"), _result("B1", "B0")]
+    merged = merge_lesson_batches(COURSE_MAP, batches, results)
+    assert _titles(merged) == [["A0", "A1", "A2"], ["B0", "B1"]]
+
+
+@pytest.mark.parametrize("titles", [("A0",), ("A0", "A1", "A1")])
+def test_merge_lesson_batches_rejects_wrong_lesson_count(titles):
+    batch = course_map_batches(COURSE_MAP, 2)[0]
+    assert align_batch_lessons(batch, _result(*titles)) is None
+    with pytest.raises(ValueError):
+        merge_lesson_batches(COURSE_MAP, [batch], [_result(*titles)])
+
+
+@pytest.mark.parametrize(
+    "titles, expected",
+    [
+        (("A0", "A1"), ["A0", "A1"]),
+        (("a1 ", "A0"), ["A0", "A1"]),  # reordered: matched back by title
+        (("Intro to A", "A1"), ["A0", "A1"]),  # renamed: planned title restored by position
+    ],
+)
+def test_align_batch_lessons(titles, expected):
+    batch = course_map_batches(COURSE_MAP, 2)[0]
+    assert [lesson.title for lesson in align_batch_lessons(batch, _result(*titles))] == expected
+
+
+def test_batch_split_halves_the_map():
+    halves = course_map_batches(COURSE_MAP, 3)[0].split()
+    assert [h.lesson_indices for h in halves] == [[0], [1, 2]]
+    assert [l["title"] for l in halves[1].course_map["modules"][0]["lessons"]] == ["A1", "A2"]
+
+
+def test_splice_chunks_replaces_only_chunk_lessons():
+    course = merge_lesson_batches(
+        COURSE_MAP, course_map_batches(COURSE_MAP, 3), [_result("A0", "A1", "A2"), _result("B0", "B1")]
+    )
+    chunks = course_chunks(course, 2, only={(0, 2), (1, 0)})
+    assert [(c.module_index, c.lesson_indices) for c in chunks] == [(0, [2]), (1, [0])]
+    spliced = splice_chunks(course, chunks, [_result("A2*"), _result("B0*")])
+    assert _titles(spliced) == [["A0", "A1", "A2*"], ["B0*", "B1"]]
+    assert _titles(course) == [["A0", "A1", "A2"], ["B0", "B1"]]
+    with pytest.raises(ValueError):
+        splice_chunks(course, chunks, [_result("A2*", "extra"), _result("B0*")])
+
+
+def test_join_split_results_and_paths():
+    joined = join_split_results([_result("A0"), _result("A1", "A2")])
+    assert _titles(joined) == [["A0", "A1", "A2"]]
+    span = LessonBatch(module_index=1, lesson_indices=[3, 4], course_map={})
+    assert span.local_path("modules[1].lessons[4].exercises[0]") == "modules[0].lessons[1].exercises[0]"
+    assert span.local_path("modules[0].lessons[4]") is None
+    assert span.global_path("modules[0].lessons[1].title") == "modules[1].lessons[4].title"
+    assert lesson_index("modules[2].lessons[7].flashcards[0]") == (2, 7)
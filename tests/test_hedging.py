@@ -0,0 +1,35 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from techlingo_workflow.config import WorkflowConfig
+from techlingo_workflow.hedging import LatencyHistogram, LatencyTracker
+
+
+def test_percentile_returns_bucket_upper_bound():
+    hist = LatencyHistogram()
+    for seconds in (1, 2, 3, 4, 100):
+        hist.observe(seconds)
+    assert 3 <= hist.percentile(0.5) < 3 * 1.25
+    assert hist.percentile(0.99) >= 100
+
+
+def test_tracker_writes_only_on_flush(tmp_path):
+    path = tmp_path / "latency.json"
+    tracker = LatencyTracker(path)
+    for _ in range(3):
+        tracker.observe("a2_scaffolder", 0.5)
+    assert not path.exists()
+    tracker.flush()
+    assert LatencyHistogram.model_validate(json.loads(path.read_text())["a2_scaffolder"]).total == 3
+    path.unlink()
+    tracker.flush()  # nothing new since the last flush
+    assert not path.exists()
+    assert LatencyTracker(tmp_path / "missing.json").hedge_delay("a2_scaffolder", 0.95, 1) is None
+
+
+@pytest.mark.parametrize("value", [0, 1, 95])
+def test_hedge_percentile_must_be_a_fraction(value):
+    with pytest.raises(ValidationError):
+        WorkflowConfig(hedge_percentile=value)
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from techlingo_workflow.jsonfix import is_unterminated, loads_tolerant
+
+
+@pytest.mark.parametrize(
+    "text, expected, fixes",
+    [
+        ('{"a": 1}', {"a": 1}, []),
+        ('```json\n{"a": 1}\n```', {"a": 1}, ["strip_fences"]),
+        ('  ```\n{"a": 1}\n```  \n', {"a": 1}, ["strip_fences"]),
+        ('Here is the course:\n{"a": 1}\nHope this helps!', {"a": 1}, ["extract_object"]),
+        ('Sure:\n```json\n{"a": 1}\n```', {"a": 1}, ["extract_object"]),
+        ('{"a": 1, // note\n"b": 2}', {"a": 1, "b": 2}, ["remove_comments"]),
+        ('{"a": [1, 2,], "b": 3,}', {"a": [1, 2], "b": 3}, ["trailing_commas"]),
+        ('{"a": None, "b": True}', {"a": None, "b": True}, ["python_literals"]),
+        ('{"url": "http://x.io/a,}", "b": 1,}', {"url": "http://x.io/a,}", "b": 1}, ["trailing_commas"]),
+        ('{"a": "line\nbreak"}', {"a": "line\nbreak"}, ["control_characters"]),
+    ],
+)
+def test_loads_tolerant_repairs(text, expected, fixes):
+    assert loads_tolerant(text) == (expected, fixes)
+
+
+def test_fence_inside_string_value_is_content():
+    text = '{"code": "```python\\nprint(1)\\n```", "x": 1,}'
+    data, fixes = loads_tolerant(text)
+    assert data == {"code": "```python\nprint(1)\n```", "x": 1}
+    assert fixes == ["trailing_commas"]
+
+
+def test_unrepairable_raises_original_error():
+    with pytest.raises(json.JSONDecodeError):
+        loads_tolerant('{"a": 1 "b": 2}')
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('{"a": [1, 2', True),
+        ('{"a": "cut off', True),
+        ('```json\n{"a": {"b": 1}', True),
+        ('{"a": "}"}', False),
+        ('{"a": 1 "b": 2}', False),
+    ],
+)
+def test_is_unterminated(text, expected):
+    assert is_unterminated(text) is expected
+
+
+def test_llm_rejects_non_object_reply(monkeypatch):
+    from techlingo_workflow import llm
+
+    monkeypatch.setattr(llm, "get_chat_agent", lambda **kwargs: None)
+    client = llm.LLMClient(model_id="m")
+    assert client._loads('```json\n{"a": 1}\n```') == {"a": 1}
+    with pytest.raises(json.JSONDecodeError):
+        client._loads('[{"a": 1}]')
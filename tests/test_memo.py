@@ -0,0 +1,22 @@
+from pathlib import Path
+
+import techlingo_workflow
+from techlingo_workflow.config import WorkflowConfig
+from techlingo_workflow.memo import RECIPE_MODULES, StageMemo
+from techlingo_workflow.models import PipelineState
+
+
+def _state(**config):
+    return PipelineState(run_id="r", run_dir="out", input_text="AI is scalable.", model_id="m", config=WorkflowConfig(**config))
+
+
+def test_recipe_modules_exist():
+    package = Path(techlingo_workflow.__file__).parent
+    assert all((package / name).is_file() for name in RECIPE_MODULES)
+    assert "cli.py" not in RECIPE_MODULES
+
+
+def test_a4_chunk_size_does_not_invalidate_a3():
+    base, changed = _state(), _state(a4_lessons_per_chunk=5)
+    assert StageMemo(base, "a3_scenario_designer", {}).key == StageMemo(changed, "a3_scenario_designer", {}).key
+    assert StageMemo(base, "a4_feedback_architect", {}).key != StageMemo(changed, "a4_feedback_architect", {}).key
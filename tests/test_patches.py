@@ -0,0 +1,76 @@
+import pytest
+
+from techlingo_workflow.models import Lesson
+from techlingo_workflow.patches import Edit, PatchError, apply_edits, apply_patch, parse_path
+
+
+@pytest.mark.parametrize(
+    "path, steps",
+    [
+        ("title", ["title"]),
+        ("modules[2].lessons[0].title", ["modules", 2, "lessons", 0, "title"]),
+        ("exercises[4].options[1].feedback", ["exercises", 4, "options", 1, "feedback"]),
+    ],
+)
+def test_parse_path(path, steps):
+    assert parse_path(path) == steps
+
+
+@pytest.mark.parametrize("path", ["", ".title", "modules[x]", "modules[0]..title", "modules[0]-title"])
+def test_parse_path_rejects_malformed(path):
+    with pytest.raises(PatchError):
+        parse_path(path)
+
+
+DOC = {"title": "T", "items": [{"v": 1}, {"v": 2}], "meta": {"k": "a"}}
+
+
+@pytest.mark.parametrize(
+    "edits, expected",
+    [
+        ([Edit(path="title", value="U")], {**DOC, "title": "U"}),
+        ([Edit(path="items[1].v", value=9)], {**DOC, "items": [{"v": 1}, {"v": 9}]}),
+        ([Edit(path="items[2]", value={"v": 3})], {**DOC, "items": [{"v": 1}, {"v": 2}, {"v": 3}]}),
+        ([Edit(op="remove", path="items[0]")], {**DOC, "items": [{"v": 2}]}),
+        ([Edit(op="remove", path="meta")], {"title": "T", "items": DOC["items"]}),
+        # Later edits see the indices left by earlier ones.
+        (
+            [Edit(op="remove", path="items[0]"), Edit(path="items[0].v", value=7)],
+            {**DOC, "items": [{"v": 7}]},
+        ),
+    ],
+)
+def test_apply_edits(edits, expected):
+    assert apply_edits(DOC, edits) == expected
+    assert DOC["items"] == [{"v": 1}, {"v": 2}]  # input is not mutated
+
+
+@pytest.mark.parametrize(
+    "edit",
+    [
+        Edit(path="items[5]", value={}),
+        Edit(op="remove", path="items[2]"),
+        Edit(path="missing.v", value=1),
+        Edit(path="title[0]", value="x"),
+        Edit(path="items.v", value=1),
+    ],
+)
+def test_apply_edits_rejects_bad_paths(edit):
+    with pytest.raises(PatchError):
+        apply_edits(DOC, [edit])
+
+
+LESSON = Lesson(title="L", slo="S", flashcards=[{"front": "f", "back": "b"}])
+
+
+def test_apply_patch_validates_result():
+    lesson, edits = apply_patch(LESSON, {"thought_process": ["t"], "edits": [{"path": "flashcards[0].back", "value": "c"}]})
+    assert lesson.flashcards[0].back == "c" and edits.thought_process == ["t"]
+    with pytest.raises(PatchError):
+        apply_patch(LESSON, {"edits": [{"path": "flashcards[0]", "value": {"front": "only"}}]})
+
+
+def test_apply_patch_accepts_full_document():
+    full = {**LESSON.model_dump(mode="json"), "title": "New"}
+    lesson, edits = apply_patch(LESSON, full)
+    assert lesson.title == "New" and edits.edits == []
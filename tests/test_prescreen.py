@@ -0,0 +1,128 @@
+import pytest
+
+from techlingo_workflow.grounding import GroundingIndex
+from techlingo_workflow.models import Course, FillGapsExercise, Lesson, TrueFalseExercise
+from techlingo_workflow.prescreen import (
+    LessonScreen,
+    Prescreen,
+    always_grounding_check,
+    answer_text,
+    find_defects,
+    subset_path,
+)
+
+SOURCE = "Generative AI creates original content such as text and images. Overfitting happens when a model memorizes noise."
+
+
+@pytest.mark.parametrize(
+    "text, rule",
+    [
+        ("Figure 3: The training pipeline", "media_label"),
+        ("Image 2. Results by model", "media_label"),
+        ("Note:\nModels can drift.", "note_label"),
+        ("AI systems learn from data [3].", "citation_marker"),
+        ("AI systems learn from data.[12] Models drift.", "citation_marker"),
+        ("This claim [citation needed] is common.", "citation_marker"),
+        ("Expand table", "expand_table"),
+        ("Click here to learn more.", "click_here"),
+        ("According to the text, models drift.", "according_to"),
+        ("As described above, models drift.", "as_described"),
+        ("The passage says models drift.", "the_text_says"),
+        ("See the examples above.", "example_above"),
+        ("Which tool is mentioned in the reading?", "in_this_text"),
+    ],
+)
+def test_rules_flag_scraped_text(text, rule):
+    assert rule in [name for name, _ in find_defects(text)]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "items[0] is the first element.",
+        "Return arr[1] + matrix[2][3].",
+        "Pull Docker image 1.2 before deploying.",
+        "The server returns HTTP page 404.",
+        "Look the key up in a table 2 levels deep.",
+        "Tie a figure 8 knot.",
+        "Figure 1.2 shows the architecture.",
+        "Important: rotate keys regularly.",
+        "As described by Newton, force equals mass times acceleration.",
+        "Paste the token in the text field.",
+        "Use arr [0] to get the first element",
+        "Which value is stored in the document under the _id key?",
+        "Which sections below 50% load should be scaled?",
+        "In the reading room, books are sorted by topic.",
+        "Table 3: Results of the JOIN query",
+    ],
+)
+def test_rules_ignore_technical_text(text):
+    assert find_defects(text) == []
+
+
+def test_subset_path_maps_flashcards_back_to_chunk_indices():
+    screens = [LessonScreen(ground_exercises=[1], review_flashcards=[2, 5])]
+    assert subset_path("modules[0].lessons[0].flashcards[1].back", screens) == "modules[0].lessons[0].flashcards[5].back"
+    # Exercises are never dropped from the request, so their paths are unchanged.
+    assert subset_path("modules[0].lessons[0].exercises[1].prompt", screens) == "modules[0].lessons[0].exercises[1].prompt"
+    assert subset_path("modules[0].lessons[0].title", screens) == "modules[0].lessons[0].title"
+
+
+def _true_false(statement, correct):
+    return TrueFalseExercise(blooms_level="Remembering", prompt="True or false?", statement=statement, correct_answer=correct)
+
+
+def _fill_gaps(text, answer):
+    return FillGapsExercise(
+        blooms_level="Remembering",
+        prompt="Fill the gap.",
+        parts=[{"type": "text", "text": text}, {"type": "gap", "accepted_answers": [answer]}],
+    )
+
+
+def test_answer_text_scores_only_gap_answers():
+    assert answer_text(_fill_gaps("Generative AI creates original", "content")) == "content"
+
+
+@pytest.mark.parametrize(
+    "exercise, expected",
+    [
+        (_true_false("Generative AI creates original content.", True), False),
+        (_true_false("Generative AI creates original content.", False), True),
+        (_true_false("Generative AI cannot create original content.", True), True),
+        (_true_false("Overfitting doesn't involve noise.", True), True),
+    ],
+)
+def test_always_grounding_check(exercise, expected):
+    assert always_grounding_check(exercise) is expected
+
+
+def test_screen_keeps_false_and_ungrounded_items_for_grounding():
+    lesson = Lesson(
+        title="L",
+        slo="slo",
+        exercises=[
+            _true_false("Generative AI creates original content such as text and images.", True),
+            _true_false("Generative AI creates original content such as text and images.", False),
+            _true_false("Quantum computers factor primes instantly.", True),
+        ],
+        flashcards=[{"front": "Overfitting?", "back": "A model memorizes noise."}, {"front": "GPU?", "back": "Fast chips."}],
+    )
+    course = {"title": "C", "modules": [{"title": "M", "lessons": [lesson.model_dump(mode="json")]}]}
+    screen = Prescreen(GroundingIndex(SOURCE), 0.8).screen(Course.model_validate(course))[(0, 0)]
+    assert screen.ground_exercises == [1, 2]
+    assert screen.review_flashcards == [1]
+    assert screen.skipped == 2
+
+
+def test_rule_hits_are_warnings_the_llm_confirms():
+    lesson = Lesson(
+        title="L",
+        slo="slo",
+        exercises=[],
+        flashcards=[{"front": "Overfitting?", "back": "A model memorizes noise [3]."}],
+    )
+    course = {"title": "C", "modules": [{"title": "M", "lessons": [lesson.model_dump(mode="json")]}]}
+    screen = Prescreen(GroundingIndex(SOURCE), 0.8).screen(Course.model_validate(course))[(0, 0)]
+    assert [i.severity for i in screen.issues] == ["warning"]
+    assert screen.review_flashcards == [0]
@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import pytest
+
+from techlingo_workflow.scheduler import RateLimitScheduler, estimate_tokens
+
+
+def test_estimate_tokens_adds_output_allowance():
+    assert estimate_tokens("a" * 400, output_tokens=100) == 200
+
+
+def test_unlimited_scheduler_grants_immediately():
+    async def main():
+        ticket = await RateLimitScheduler().acquire("run", 10_000)
+        return ticket.wait_seconds
+
+    assert asyncio.run(main()) == 0.0
+
+
+def test_runs_are_served_round_robin():
+    async def main():
+        scheduler = RateLimitScheduler(rpm=6000)
+        scheduler._requests = 0  # empty bucket: every grant waits for a refill
+        order = []
+
+        async def request(run_id):
+            await scheduler.acquire(run_id, 1)
+            order.append(run_id)
+
+        tasks = [asyncio.create_task(request("A")) for _ in range(4)]
+        tasks += [asyncio.create_task(request("B")) for _ in range(2)]
+        await asyncio.gather(*tasks)
+        return "".join(order), scheduler.stats()
+
+    order, stats = asyncio.run(main())
+    assert order == "ABABAA"
+    assert stats["granted"] == 6 and stats["queue_depth"] == 0
+
+
+def test_tpm_budget_refills_over_time():
+    async def main():
+        scheduler = RateLimitScheduler(tpm=60_000)  # 1000 tokens/s
+        scheduler._tokens = 0
+        started = time.monotonic()
+        ticket = await scheduler.acquire("run", 100)
+        return ticket, time.monotonic() - started
+
+    ticket, elapsed = asyncio.run(main())
+    assert 0.05 <= elapsed < 1.0
+    assert ticket.wait_seconds > 0
+
+
+@pytest.mark.parametrize("used, expected", [(300, 700), (None, 0)])
+def test_settle_corrects_reservation_with_usage(used, expected):
+    async def main():
+        scheduler = RateLimitScheduler(tpm=1000)
+        ticket = await scheduler.acquire("run", 1000)
+        scheduler.settle(ticket, used)
+        return scheduler._tokens
+
+    assert asyncio.run(main()) == pytest.approx(expected, abs=5)
+
+
+def test_refund_returns_reservation_and_wakes_waiters():
+    async def main():
+        scheduler = RateLimitScheduler(tpm=600)  # 10 tokens/s: a second 600-token grant would take a minute
+        first = await scheduler.acquire("run", 600)
+        second = asyncio.create_task(scheduler.acquire("run", 600))
+        await asyncio.sleep(0.01)
+        assert not second.done()
+        scheduler.refund(first)  # e.g. the request raised, or lost a hedge
+        return await asyncio.wait_for(second, 1.0)
+
+    assert asyncio.run(main()).reserved_tokens == 600
+
+
+def test_cancelled_waiter_does_not_consume_budget():
+    async def main():
+        scheduler = RateLimitScheduler(tpm=600)
+        first = await scheduler.acquire("run", 600)
+        queued = asyncio.create_task(scheduler.acquire("run", 600))
+        await asyncio.sleep(0.01)
+        queued.cancel()
+        scheduler.refund(first)
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        return scheduler._tokens
+
+    assert asyncio.run(main()) == pytest.approx(600, abs=5)
+
+
+def test_failed_request_refunds_its_reservation(monkeypatch):
+    from techlingo_workflow import llm
+    from techlingo_workflow.scheduler import get_scheduler
+
+    class FailingAgent:
+        async def run(self, prompt, **kwargs):
+            raise RuntimeError("provider error")
+
+    monkeypatch.setenv("TECHLINGO_TPM", "100000")
+    monkeypatch.setattr(llm, "get_chat_agent", lambda **kwargs: FailingAgent())
+
+    async def main():
+        client = llm.LLMClient(model_id="refund-test")
+        with pytest.raises(RuntimeError):
+            await client._call("prompt", None)
+        return get_scheduler("refund-test")._tokens
+
+    assert asyncio.run(main()) == pytest.approx(100_000, abs=5)
@@ -0,0 +1,35 @@
+import httpx
+import pytest
+from openai import BadRequestError
+
+from techlingo_workflow.llm import _format_rejected
+
+
+def _bad_request(message, **body):
+    response = httpx.Response(400, request=httpx.Request("POST", "http://test"))
+    return BadRequestError(message, response=response, body=body or None)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        _bad_request("Invalid schema for response_format 'Lesson'", param="response_format"),
+        _bad_request("Invalid schema: 'additionalProperties' is required", code="invalid_json_schema"),
+        _bad_request("response_format of type json_schema is not supported with this model"),
+    ],
+)
+def test_response_format_rejections_fall_back(error):
+    assert _format_rejected(error)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        _bad_request("Invalid 'messages[1].content': schema of tool call is malformed", param="messages"),
+        _bad_request("This model's maximum context length is 128000 tokens", code="context_length_exceeded"),
+        _bad_request("Input does not match the expected schema"),
+        ValueError("response_format"),
+    ],
+)
+def test_other_errors_are_not_format_rejections(error):
+    assert not _format_rejected(error)